@@ -1,6 +1,8 @@
 # Import necessary libraries
 import pygame
+import math
 import os
+import time
 
 # --------------------------------------------------------------------------
 #                               CONSTANTS
@@ -11,6 +13,14 @@ WIDTH = 800
 HEIGHT = 600
 FPS = 60
 
+# Fixed-timestep loop: the game always advances in ticks of 1 / FPS seconds (every speed
+# is per tick) however fast frames are drawn. Frames are drawn up to MAX_RENDER_FPS per
+# second (0 matches the display's refresh rate), with positions interpolated between the
+# last two ticks. After a stall at most MAX_CATCH_UP_TICKS ticks run in one frame.
+FIXED_TIMESTEP = True
+MAX_RENDER_FPS = 0
+MAX_CATCH_UP_TICKS = 5
+
 # Player and enemy movement speeds
 PLAYER_SPEED = 3
 DEFAULT_ENEMY_SPEED = 3
@@ -19,6 +29,9 @@ ENEMY_SPEED_INCREMENT = 2  # Speed increment for enemies with each level
 # Margin around the edges of the screen where enemies can spawn
 SPAWN_MARGIN = 50
 
+# Enemy types (each has an animation of the same name in the asset manifest)
+ENEMY_TYPES = ("orc", "undead", "demon")
+
 # Scale factors for various assets (used for resizing images)
 ENEMY_SCALE_FACTOR = 2
 PLAYER_SCALE_FACTOR = 2
@@ -29,6 +42,127 @@ HEALTH_SCALE_FACTOR = 1
 PUSHBACK_DISTANCE = 100
 ENEMY_KNOCKBACK_SPEED = 5
 
+# Cell size (in pixels) of the uniform grid used for collision broadphase
+COLLISION_CELL_SIZE = 64
+
+# Auto-aim: F toggles auto-fire (shoot at the nearest enemy every tick), and each pair of
+# side bullets turns towards the nearest enemy inside its own cone, if one is in range
+AUTO_FIRE = False
+SIDE_BULLET_AIM = True
+SIDE_BULLET_AIM_RANGE = 600
+
+# Store enemies in the NumPy-backed EnemyPool and update them in one batch
+USE_ENEMY_POOL = False
+
+# Enemy flow field (see steering.py): paths to the player over a grid of FLOW_CELL_SIZE pixel
+# cells covering the view plus FLOW_FIELD_MARGIN cells around it. Enemies head for the point
+# FLOW_LOOKAHEAD cells further along their cell's path (closer than that, for the player).
+ENEMY_FLOW_FIELD = True
+FLOW_CELL_SIZE = 64
+FLOW_FIELD_MARGIN = 2
+FLOW_LOOKAHEAD = 2
+
+# Pool enemy separation (see steering.py): pushes apart enemies within SEPARATION_RANGE pixels
+# of the player that share a cell of SEPARATION_CELL_SIZE pixels or crowd their neighbours;
+# SEPARATION_STRENGTH is how hard, relative to their speed (above 1 a crowd can spread out
+# against the pull of the player).
+ENEMY_SEPARATION = True
+SEPARATION_CELL_SIZE = 32
+SEPARATION_STRENGTH = 2.0
+SEPARATION_RANGE = 2000
+
+# Store the player's bullets in the NumPy-backed BulletArray (moved, culled and drawn in batches)
+USE_BULLET_ARRAY = False
+
+# Replays: set REPLAY_PATH to a file name to record every tick's input (python replay.py
+# plays it back). Recordings are written in compressed chunks of REPLAY_CHUNK_TICKS ticks,
+# with a hash of the game state every REPLAY_HASH_INTERVAL ticks to catch divergence.
+REPLAY_PATH = None
+REPLAY_CHUNK_TICKS = 600
+REPLAY_HASH_INTERVAL = 60
+
+# Frame profiler: number of frames kept for the overlay/trace and where F4 writes the trace
+PROFILER_HISTORY = 300
+PROFILER_TRACE_PATH = "profile_trace.json"
+
+# Dirty-rectangle rendering: only redraw the parts of the screen that changed, unless
+# more than DIRTY_RECT_MAX_FRACTION of the screen is dirty (then flip the whole screen)
+DIRTY_RECT_RENDERING = False
+DIRTY_RECT_MAX_FRACTION = 0.5
+
+# Batched rendering: sprites are queued by layer and drawn with Surface.blits.
+# RENDER_FILL_PRIMITIVES draws solid-colour sprites (bullets, coins) as filled rectangles
+# instead; it needs no surfaces, but SDL's fill is slower than blits for sprites this small
+BATCHED_RENDERING = False
+RENDER_FILL_PRIMITIVES = False
+
+# Maximum number of rendered text/overlay surfaces kept by the HUD and menu cache
+SURFACE_CACHE_SIZE = 64
+
+# Load images from a pre-scaled texture atlas (cached in this sub-folder of the assets
+# folder) instead of decoding and scaling every PNG on each launch
+USE_ASSET_ATLAS = True
+ASSET_CACHE_FOLDER = ".cache"
+
+# Show a loading screen and decode assets on this many background threads (windowed games only)
+STAGED_LOADING = True
+LOADER_THREADS = 4
+
+# Scrolling world: an endless floor streamed in chunks of CHUNK_TILES x CHUNK_TILES tiles, with
+# at most CHUNK_CACHE_BYTES of rendered chunks kept (False keeps the single-screen arena)
+CHUNKED_WORLD = False
+CHUNK_TILES = 8
+CHUNK_CACHE_BYTES = 16 * 1024 * 1024
+
+# Enemy level of detail: (max distance from the player, update interval in ticks) bands.
+# Enemies further away get a full update less often and just keep moving in between.
+# The first band reaches the screen's diagonal, so every enemy that can be on screen
+# (wherever the player stands) gets a full update every tick.
+ENEMY_LOD = True
+LOD_BANDS = ((math.hypot(WIDTH, HEIGHT), 1), (1600, 2), (float("inf"), 4))
+
+# Maximum number of enemies created per tick; bigger waves are spread over several ticks
+SPAWN_BUDGET = 8
+
+# Entity budget: entity type -> (maximum live count, overflow policy), see budget.py.
+# In adaptive mode enemy waves shrink (down to MIN_SPAWN_SCALE of their size)
+# while a frame's update and draw take longer than FRAME_TIME_BUDGET seconds.
+ENTITY_CAPS = {
+    "enemies": (400, "throttle"),
+    "coins": (200, "merge"),
+    "bullets": (600, "despawn_oldest"),
+}
+ADAPTIVE_SPAWNING = True
+FRAME_TIME_BUDGET = 1 / FPS
+MIN_SPAWN_SCALE = 0.25
+
+# Coins: grid cell size of the coin index, distance under which a dropped coin joins
+# an existing one, and how far/fast each Coin Magnet upgrade pulls coins to the player
+COIN_CELL_SIZE = 64
+COIN_MERGE_RADIUS = 12
+MAGNET_RADIUS_STEP = 80
+MAGNET_SPEED = 6
+
+# Bullets: ticks a bullet lives before it is removed, and how many enemies it can hit
+BULLET_LIFETIME = 180
+BULLET_PIERCE = 1
+
+# Balance: how enemy waves start and grow, and what each upgrade adds. Every Game
+# takes its own copy, so single values can be overridden with Game(balance=...) (see sweep.py).
+BALANCE = {
+    "enemy_spawn_interval": 60,  # Ticks between waves at the start
+    "enemies_per_spawn": 1,  # Enemies in a wave at the start
+    "enemies_per_level": 5,  # Extra enemies per wave every time the player levels up
+    "bullet_size_step": 5,  # Bigger Bullet
+    "side_bullet_step": 1,  # Extra Side Bullets
+    "spray_bullet_step": 2,  # Spray Bullet
+    "cooldown_factor": 0.8,  # Shorter Cooldown (the cooldown is multiplied by this)
+    "magnet_radius_step": MAGNET_RADIUS_STEP,  # Coin Magnet
+}
+
+# How the last load_assets() call got its images ("png", "atlas" or "atlas-rebuilt") and its duration
+LOAD_REPORT = {"source": None, "seconds": 0.0}
+
 # --------------------------------------------------------------------------
 #                       ASSET LOADING FUNCTIONS
 # --------------------------------------------------------------------------
@@ -84,34 +218,112 @@ def load_floor_tiles(folder="assets"):
         floor_tiles.append(tile)  # Add the tile to the list
     return floor_tiles
 
-def load_assets():
+def mirror_frames(frames):
     """
-    Loads all game assets (images, animations, etc.).
+    Creates horizontally flipped copies of animation frames.
+    This is done once at load time so nothing has to be flipped while drawing.
+    
+    Arguments:
+    - frames: A list of Pygame surfaces.
     
     Returns:
-    - A dictionary containing all game assets, such as enemies, player animations, floor tiles, and health images.
+    - A list of flipped surfaces, in the same order as the input.
     """
-    assets = {}
+    return [pygame.transform.flip(frame, True, False) for frame in frames]
 
-    # Load enemy frames (animations)
-    assets["enemies"] = {
-        "orc":    load_frames("orc",    4, scale_factor=ENEMY_SCALE_FACTOR),
-        "undead": load_frames("undead", 4, scale_factor=ENEMY_SCALE_FACTOR),
-        "demon":  load_frames("demon",  4, scale_factor=ENEMY_SCALE_FACTOR),
+def asset_manifest():
+    """
+    Describes every image the game loads.
+    
+    Returns:
+    - A dictionary mapping each animation name to (file prefix, frame count, scale factor).
+    """
+    return {
+        "orc":         ("orc",         4, ENEMY_SCALE_FACTOR),
+        "undead":      ("undead",      4, ENEMY_SCALE_FACTOR),
+        "demon":       ("demon",       4, ENEMY_SCALE_FACTOR),
+        "player_idle": ("player_idle", 4, PLAYER_SCALE_FACTOR),
+        "player_run":  ("player_run",  4, PLAYER_SCALE_FACTOR),
+        "floor":       ("floor",       8, FLOOR_TILE_SCALE_FACTOR),
+        "health":      ("health",      6, HEALTH_SCALE_FACTOR),
     }
 
-    # Load player frames (animations)
-    assets["player"] = {
-        "idle": load_frames("player_idle", 4, scale_factor=PLAYER_SCALE_FACTOR),
-        "run":  load_frames("player_run",  4, scale_factor=PLAYER_SCALE_FACTOR),
-    }
+def load_png_frames(folder="assets"):
+    """
+    Loads every animation in the asset manifest from its PNG files.
+    
+    Returns:
+    - A dictionary mapping each animation name to its list of frames.
+    """
+    frames = {}
+    for name, (prefix, count, scale_factor) in asset_manifest().items():
+        if name == "floor":
+            frames[name] = load_floor_tiles(folder)
+        else:
+            frames[name] = load_frames(prefix, count, scale_factor=scale_factor, folder=folder)
+    return frames
+
+def new_assets():
+    """
+    Creates an empty assets dictionary for add_frames() to fill in.
+    
+    Returns:
+    - A dictionary with empty enemy and player animation tables.
+    """
+    return {"enemies": {}, "enemies_mirrored": {}, "player": {}, "player_mirrored": {}}
 
-    # Load floor tiles for background
-    assets["floor_tiles"] = load_floor_tiles()
+def add_frames(assets, name, frames):
+    """
+    Stores one animation from the asset manifest in the assets dictionary.
+    Character animations also get mirrored (left-facing) copies.
+    
+    Arguments:
+    - assets: The dictionary made by new_assets().
+    - name: The animation's name in asset_manifest().
+    - frames: The loaded frames.
+    """
+    if name in ENEMY_TYPES:
+        # Enemy frames (animations)
+        assets["enemies"][name] = frames
+        assets["enemies_mirrored"][name] = mirror_frames(frames)
+    elif name.startswith("player_"):
+        # Player frames (animations), keyed by state ("idle", "run")
+        state = name[len("player_"):]
+        assets["player"][state] = frames
+        assets["player_mirrored"][state] = mirror_frames(frames)
+    elif name == "floor":
+        assets["floor_tiles"] = frames  # Floor tiles for background
+    elif name == "health":
+        assets["health"] = frames  # Health images (for player health display)
+
+def load_assets(folder="assets", use_atlas=USE_ASSET_ATLAS):
+    """
+    Loads all game assets (images, animations, etc.).
+    
+    Arguments:
+    - folder: The folder where assets are located (default is "assets").
+    - use_atlas: Load the frames from the pre-scaled texture atlas (built on first
+      use and rebuilt whenever a source PNG or scale factor changes).
+    
+    Returns:
+    - A dictionary containing all game assets, such as enemies, player animations, floor tiles, and health images.
+    """
+    start = time.perf_counter()
+    frames = None
+    source = "png"
+    if use_atlas:
+        import atlas  # Imported here because the atlas module itself uses app's constants
+        frames, source = atlas.load_atlas_frames(folder)
+    if frames is None:
+        frames = load_png_frames(folder)
 
-    # Load health images (for player health display)
-    assets["health"] = load_frames("health", 6, scale_factor=HEALTH_SCALE_FACTOR)
+    assets = new_assets()
+    for name, anim in frames.items():
+        add_frames(assets, name, anim)
 
+    # Remember how the assets were loaded and how long it took (see atlas.py --report)
+    LOAD_REPORT["source"] = source
+    LOAD_REPORT["seconds"] = time.perf_counter() - start
     return assets
 
 # --------------------------------------------------------------------------
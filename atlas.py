@@ -0,0 +1,243 @@
+"""
+Pre-scaled texture atlas for the game's images.
+
+The build step decodes every PNG listed in app.asset_manifest(), scales it and
+packs all frames into a single RGBA image. The image is saved as raw pixel
+bytes next to an index of where each frame sits (written with marshal, which
+is built into Python and needs no extra imports at startup). At runtime the atlas is
+read with one bulk read and every frame becomes a subsurface of it.
+
+The index stores a fingerprint of the source PNGs (size and modification time)
+and of the scale factors. When either changes, the atlas is rebuilt
+automatically the next time the assets are loaded.
+
+Usage:
+    python atlas.py            # build the atlas if it is out of date
+    python atlas.py --build    # always rebuild it
+    python atlas.py --report   # compare cold start times with and without the atlas
+"""
+import marshal
+import os
+import sys
+
+import pygame
+import app
+
+ATLAS_VERSION = 1  # Bump when the file layout changes
+ATLAS_WIDTH = 512  # Width of the packed image; the height grows to fit
+INDEX_FILE = "atlas.index"
+PIXELS_FILE = "atlas.rgba"
+
+
+def cache_paths(folder="assets"):
+    """Return the paths of the atlas index and pixel files for an assets folder."""
+    cache_dir = os.path.join(folder, app.ASSET_CACHE_FOLDER)
+    return os.path.join(cache_dir, INDEX_FILE), os.path.join(cache_dir, PIXELS_FILE)
+
+
+def source_files(folder="assets"):
+    """
+    List the source PNG of every frame in the manifest.
+
+    Returns:
+    - A list of (animation name, frame number, path, scale factor) tuples.
+    """
+    files = []
+    for name, (prefix, count, scale_factor) in app.asset_manifest().items():
+        for i in range(count):
+            files.append((name, i, os.path.join(folder, f"{prefix}_{i}.png"), scale_factor))
+    return files
+
+
+def fingerprint(folder="assets"):
+    """
+    Return a list of strings identifying the current source PNGs and scale factors.
+    Only file metadata is read, so checking it costs a few stat() calls.
+    """
+    # marshal's format depends on the Python version, so that is part of the fingerprint too
+    entries = [f"version:{ATLAS_VERSION}:{sys.version_info[:2]}"]
+    for name, i, path, scale_factor in source_files(folder):
+        stat = os.stat(path)
+        entries.append(f"{name}:{i}:{scale_factor}:{stat.st_size}:{stat.st_mtime_ns}")
+    return entries
+
+
+def pack(sizes, width=ATLAS_WIDTH):
+    """
+    Place rectangles into rows ("shelves") of a fixed-width image, tallest first.
+
+    Arguments:
+    - sizes: A list of (w, h) sizes.
+
+    Returns:
+    - A list of (x, y) positions in the same order as sizes, and the total height.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = 0
+    for i in order:
+        w, h = sizes[i]
+        if x + w > width:  # Start a new shelf
+            x = 0
+            y += shelf_height
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w
+        shelf_height = max(shelf_height, h)
+    return positions, y + shelf_height
+
+
+def decode_image(path, scale_factor=1):
+    """
+    Decode a PNG into a 32-bit RGBA surface and scale it.
+    This doesn't touch the display, so it is safe to call from a worker thread.
+    """
+    loaded = pygame.image.load(path)
+    # Copy onto a 32-bit RGBA surface so every frame has the same pixel format
+    img = pygame.Surface(loaded.get_size(), pygame.SRCALPHA, 32)
+    img.blit(loaded, (0, 0))
+    if scale_factor != 1:
+        img = pygame.transform.scale(img, (img.get_width() * scale_factor, img.get_height() * scale_factor))
+    return img
+
+
+def build_atlas(folder="assets"):
+    """
+    Decode, scale and pack every source PNG, then write the atlas to the cache folder.
+    This doesn't need a display, so it can run as a separate build step.
+    """
+    images = []
+    for name, i, path, scale_factor in source_files(folder):
+        images.append((name, i, decode_image(path, scale_factor)))
+
+    positions, height = pack([img.get_size() for _, _, img in images])
+    sheet = pygame.Surface((ATLAS_WIDTH, height), pygame.SRCALPHA, 32)
+    frames = {}
+    for (name, i, img), (x, y) in zip(images, positions):
+        sheet.blit(img, (x, y))
+        frames.setdefault(name, []).append([x, y, img.get_width(), img.get_height()])
+
+    index_path, pixels_path = cache_paths(folder)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    with open(pixels_path, "wb") as f:
+        f.write(pygame.image.tostring(sheet, "RGBA"))
+    # The index is written last, so a half-written atlas is never treated as valid
+    with open(index_path, "wb") as f:
+        marshal.dump({"fingerprint": fingerprint(folder), "size": [ATLAS_WIDTH, height], "frames": frames}, f)
+
+
+def read_index(folder="assets"):
+    """Return the atlas index if it exists and matches the current sources, otherwise None."""
+    index_path, pixels_path = cache_paths(folder)
+    try:
+        with open(index_path, "rb") as f:
+            index = marshal.load(f)
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+    if index.get("fingerprint") != fingerprint(folder) or not os.path.exists(pixels_path):
+        return None
+    return index
+
+
+def load_atlas_frames(folder="assets"):
+    """
+    Load every animation frame from the atlas, rebuilding it first if it is out of date.
+    A display mode must already be set (frames are converted for fast blitting).
+
+    Returns:
+    - A dictionary of animation name -> list of frames (or None if the atlas
+      can't be used, e.g. the cache folder isn't writable), and the source
+      ("atlas" or "atlas-rebuilt") for app.LOAD_REPORT.
+    """
+    source = "atlas"
+    index = read_index(folder)
+    if index is None:
+        try:
+            build_atlas(folder)
+        except OSError:
+            return None, "png"  # Fall back to loading the PNGs directly
+        index = read_index(folder)
+        source = "atlas-rebuilt"
+        if index is None:
+            return None, "png"
+
+    return slice_atlas(index, read_pixels(folder)), source
+
+
+def read_pixels(folder="assets"):
+    """Read the atlas pixels with one bulk read (safe to call from a worker thread)."""
+    _, pixels_path = cache_paths(folder)
+    with open(pixels_path, "rb") as f:
+        return f.read()
+
+
+def slice_atlas(index, pixels):
+    """
+    Turn the atlas pixels into per-animation frames (must run on the main thread).
+
+    Returns:
+    - A dictionary of animation name -> list of frames.
+    """
+    size = tuple(index["size"])
+    sheet = pygame.image.frombuffer(pixels, size, "RGBA").convert_alpha()
+
+    frames = {}
+    for name, rects in index["frames"].items():
+        frames[name] = [sheet.subsurface(pygame.Rect(rect)) for rect in rects]
+    # Floor tiles are opaque (app.load_floor_tiles uses convert(), which drops their alpha)
+    frames["floor"] = [tile.convert() for tile in frames["floor"]]
+    return frames
+
+
+STARTUP_PROBE = """
+import os, sys, time, json
+start = time.perf_counter()
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+import pygame, app
+pygame.display.init()
+pygame.display.set_mode((app.WIDTH, app.HEIGHT))
+app.load_assets(use_atlas=sys.argv[1] == "1")
+print(json.dumps({"total": time.perf_counter() - start, "assets": app.LOAD_REPORT["seconds"]}))
+"""
+
+
+def startup_report(runs=5):
+    """
+    Start fresh interpreters that open the (dummy) window and load the assets,
+    with and without the atlas, and print the median times.
+    """
+    import json
+    import subprocess  # Only needed for the report, keep them out of the game's startup
+    for use_atlas in (False, True):
+        results = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", STARTUP_PROBE, "1" if use_atlas else "0"],
+                                    capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        total = sorted(r["total"] for r in results)[runs // 2] * 1000
+        assets = sorted(r["assets"] for r in results)[runs // 2] * 1000
+        label = "atlas" if use_atlas else "png"
+        print(f"{label:6s} start to window + assets: {total:7.1f} ms   load_assets: {assets:6.1f} ms")
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the texture atlas used by app.load_assets().")
+    parser.add_argument("--folder", default="assets", help="Assets folder.")
+    parser.add_argument("--build", action="store_true", help="Rebuild even if the atlas is up to date.")
+    parser.add_argument("--report", action="store_true", help="Print a startup timing comparison.")
+    args = parser.parse_args(argv)
+
+    if args.build or read_index(args.folder) is None:
+        build_atlas(args.folder)
+        print(f"Atlas written to {os.path.dirname(cache_paths(args.folder)[0])}")
+    else:
+        print("Atlas is up to date.")
+
+    if args.report:
+        startup_report()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
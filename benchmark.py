@@ -0,0 +1,181 @@
+"""
+Benchmark harness for the per-frame hot paths of Game.
+
+Each scenario drives a headless Game with a fixed seed and keeps the number of
+enemies, bullets and coins topped up to the scenario's targets, then reports
+p50/p95/p99 timings (in milliseconds) for every profiled phase of the frame.
+
+Usage:
+    python benchmark.py                                  # run every scenario
+    python benchmark.py --scenario level8 --frames 600
+    python benchmark.py --output new.json --baseline old.json --threshold 0.2
+
+With --baseline, the run fails (exit code 1) if any phase's metric got slower
+than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import app
+from coin import Coin
+from game import Game
+from profiler import FrameProfiler, percentile
+
+# Preset scenarios: the level to simulate and how many entities to keep alive
+SCENARIOS = {
+    "level1":     {"level": 1, "enemies": 10,  "bullets": 0,   "coins": 0},
+    "level8":     {"level": 8, "enemies": 500, "bullets": 200, "coins": 0},
+    "coin_flood": {"level": 1, "enemies": 10,  "bullets": 0,   "coins": 2000},
+    # Rendering stress tests: about 1000 and 5000 sprites on screen
+    "sprites_1k": {"level": 1, "enemies": 400,  "bullets": 300,  "coins": 300},
+    "sprites_5k": {"level": 1, "enemies": 2000, "bullets": 1500, "coins": 1500},
+}
+
+PERCENTILES = (50, 95, 99)
+
+# Phases smaller than this (in ms) are never reported as regressions (timer noise)
+MIN_REGRESSION_MS = 0.05
+
+
+def random_point(rng):
+    """Return a random position on (or just outside) the screen."""
+    x = rng.uniform(-app.SPAWN_MARGIN, app.WIDTH + app.SPAWN_MARGIN)
+    y = rng.uniform(-app.SPAWN_MARGIN, app.HEIGHT + app.SPAWN_MARGIN)
+    return x, y
+
+
+def populate(game, scenario, rng):
+    """Top the game's entity lists up to the scenario's targets."""
+    enemy_types = list(game.assets["enemies"].keys())
+    while len(game.enemies) < scenario["enemies"]:
+        x, y = random_point(rng)
+        game.enemies.append(game.create_enemy(x, y, rng.choice(enemy_types)))
+
+    player = game.player
+    while len(player.bullets) < scenario["bullets"]:
+        x, y = random_point(rng)
+        vx, vy = rng.uniform(-1, 1) * player.bullet_speed, rng.uniform(-1, 1) * player.bullet_speed
+        player.add_bullet(x, y, vx, vy)
+
+    while len(game.coins) < scenario["coins"]:
+        game.coins.add(Coin(*random_point(rng)))
+
+
+def run_scenario(scenario, frames=300, warmup=30, seed=1, use_enemy_pool=app.USE_ENEMY_POOL,
+                 use_bullet_array=app.USE_BULLET_ARRAY, batched_rendering=app.BATCHED_RENDERING):
+    """
+    Run one scenario and return its per-phase timings.
+
+    Returns:
+    - A dictionary mapping each phase name (plus "frame") to its p50/p95/p99 in ms.
+    """
+    # No entity caps: the scenarios set their own entity counts
+    game = Game(headless=True, seed=seed, use_enemy_pool=use_enemy_pool, entity_caps=None,
+                use_bullet_array=use_bullet_array, batched_rendering=batched_rendering)
+    game.load_fonts()  # Fonts are needed to benchmark the HUD in draw()
+    for _ in range(scenario["level"] - 1):
+        game.raise_level()  # Wave sizes follow the game's balance settings
+
+    profiler = FrameProfiler(history=frames)
+    for i in range(warmup + frames):
+        # Keep the scenario steady (not timed): invulnerable player, topped-up entities
+        game.player.health = 5
+        game.player.xp = 0
+        populate(game, scenario, game.rng)
+
+        if i == warmup:
+            game.profiler = profiler  # Only time frames after the warm-up
+        game.profiler.begin_frame()
+        game.tick()
+        game.draw()
+        game.profiler.end_frame()
+
+    results = {}
+    for name in ["frame"] + profiler.phase_names():
+        samples = profiler.samples(name)
+        results[name] = {f"p{p}": round(percentile(samples, p) * 1000, 4) for p in PERCENTILES}
+    return results
+
+
+def find_regressions(results, baseline, metric="p95", threshold=0.2):
+    """
+    Compare results against a baseline results file.
+
+    Returns:
+    - A list of human-readable regression descriptions (empty if none).
+    """
+    regressions = []
+    for scenario, phases in results["scenarios"].items():
+        old_phases = baseline.get("scenarios", {}).get(scenario)
+        if old_phases is None:
+            continue
+        for phase, stats in phases.items():
+            if phase not in old_phases:
+                continue
+            old, new = old_phases[phase][metric], stats[metric]
+            if new - old > MIN_REGRESSION_MS and new > old * (1 + threshold):
+                regressions.append(f"{scenario}/{phase}: {metric} {old:.3f} ms -> {new:.3f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game's per-frame hot paths.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable, default: all).")
+    parser.add_argument("--frames", type=int, default=300, help="Timed frames per scenario.")
+    parser.add_argument("--warmup", type=int, default=30, help="Untimed frames before measuring.")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the game's RNG.")
+    parser.add_argument("--enemy-pool", action="store_true", help="Use the NumPy enemy pool.")
+    parser.add_argument("--bullet-array", action="store_true", help="Use the NumPy bullet array.")
+    parser.add_argument("--batched-rendering", action="store_true", help="Draw sprites through the render queue.")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON results.")
+    parser.add_argument("--baseline", help="Results file to compare against.")
+    parser.add_argument("--metric", default="p95", choices=[f"p{p}" for p in PERCENTILES],
+                        help="Percentile used for the regression check.")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Allowed slowdown vs. the baseline (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "frames": args.frames,
+            "seed": args.seed,
+            "enemy_pool": args.enemy_pool,
+            "bullet_array": args.bullet_array,
+            "batched_rendering": args.batched_rendering,
+        },
+        "scenarios": {},
+    }
+    for name in args.scenario or SCENARIOS:
+        phases = run_scenario(SCENARIOS[name], args.frames, args.warmup, args.seed, args.enemy_pool,
+                              args.bullet_array, args.batched_rendering)
+        results["scenarios"][name] = phases
+        print(f"{name}:")
+        for phase, stats in phases.items():
+            print(f"  {phase:32s} " + "  ".join(f"{k}={v:8.3f}ms" for k, v in stats.items()))
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, args.metric, args.threshold)
+        if regressions:
+            print("Regressions:")
+            for line in regressions:
+                print("  " + line)
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
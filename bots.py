@@ -0,0 +1,117 @@
+"""
+Scripted players for headless games (used by sweep.py).
+
+A bot is set as game.input_source and is asked for every tick's input, the same
+way a replay is played back: next_tick(game) returns (movement bits, actions).
+Each bot has its own random generator, so it doesn't change the game's random
+sequence and a run is fully decided by the game seed and the bot seed.
+"""
+import math
+import random
+
+import app
+import controls
+
+# Every direction a bot can hold (including standing still), as MOVE_* bits
+DIRECTIONS = [
+    0,
+    controls.MOVE_LEFT,
+    controls.MOVE_RIGHT,
+    controls.MOVE_UP,
+    controls.MOVE_DOWN,
+    controls.MOVE_LEFT | controls.MOVE_UP,
+    controls.MOVE_LEFT | controls.MOVE_DOWN,
+    controls.MOVE_RIGHT | controls.MOVE_UP,
+    controls.MOVE_RIGHT | controls.MOVE_DOWN,
+]
+
+UPGRADE_KEYS = (controls.UPGRADE_1, controls.UPGRADE_2, controls.UPGRADE_3)
+
+
+def movement_toward(dx, dy, dead_zone=0.3):
+    """
+    Return the movement bits that head (roughly) along the direction (dx, dy).
+
+    A component smaller than dead_zone times the length of the direction is
+    ignored, so mostly-horizontal directions don't also move up or down.
+    """
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return 0
+    movement = 0
+    if dx > dead_zone * length:
+        movement |= controls.MOVE_RIGHT
+    elif dx < -dead_zone * length:
+        movement |= controls.MOVE_LEFT
+    if dy > dead_zone * length:
+        movement |= controls.MOVE_DOWN
+    elif dy < -dead_zone * length:
+        movement |= controls.MOVE_UP
+    return movement
+
+
+class RandomBot:
+    """
+    Wanders in random directions, shoots at random and picks random upgrades.
+    """
+
+    def __init__(self, seed, turn_chance=0.05, shoot_chance=0.5):
+        self.rng = random.Random(seed)
+        self.turn_chance = turn_chance  # Chance per tick of picking a new direction
+        self.shoot_chance = shoot_chance  # Chance per tick of pressing shoot
+        self.movement = 0
+
+    def next_tick(self, game):
+        rng = self.rng
+        if game.in_level_up_menu:
+            return 0, [rng.choice(UPGRADE_KEYS[:len(game.upgrade_options)])]
+        if rng.random() < self.turn_chance:
+            self.movement = rng.choice(DIRECTIONS)
+        actions = [controls.SHOOT] if rng.random() < self.shoot_chance else []
+        return self.movement, actions
+
+
+class KiteBot:
+    """
+    Plays like a cautious player: runs from the nearest enemy when it gets close,
+    otherwise drifts back towards the middle of the screen, shoots every tick
+    and takes upgrades in a fixed order of preference.
+    """
+
+    UPGRADE_PREFERENCE = ["Shorter Cooldown", "Spray Bullet", "Extra Side Bullets", "Bigger Bullet", "Coin Magnet"]
+
+    def __init__(self, seed, flee_distance=250, home_radius=50, jitter=0.1):
+        self.rng = random.Random(seed)
+        self.flee_distance = flee_distance  # Enemies closer than this are run from
+        self.home_radius = home_radius  # How close to the middle counts as back in the middle
+        self.jitter = jitter  # Chance per tick of a random step (so runs with different seeds differ)
+
+    def next_tick(self, game):
+        if game.in_level_up_menu:
+            names = [upgrade["name"] for upgrade in game.upgrade_options]
+            preference = self.UPGRADE_PREFERENCE
+            best = min(range(len(names)),
+                       key=lambda i: preference.index(names[i]) if names[i] in preference else len(preference))
+            return 0, [UPGRADE_KEYS[best]]
+
+        player = game.player
+        if self.rng.random() < self.jitter:
+            return self.rng.choice(DIRECTIONS), [controls.SHOOT]
+
+        nearest = game.find_nearest_enemy()
+        if nearest is not None and math.hypot(nearest.x - player.x, nearest.y - player.y) < self.flee_distance:
+            dx, dy = player.x - nearest.x, player.y - nearest.y
+            if game.world is None:
+                # Lean towards the middle so the player isn't pinned against an edge
+                dx += (app.WIDTH / 2 - player.x) * 0.5
+                dy += (app.HEIGHT / 2 - player.y) * 0.5
+            return movement_toward(dx, dy), [controls.SHOOT]
+        if game.world is None:
+            dx, dy = app.WIDTH / 2 - player.x, app.HEIGHT / 2 - player.y
+            if math.hypot(dx, dy) > self.home_radius:
+                return movement_toward(dx, dy), [controls.SHOOT]
+        return 0, [controls.SHOOT]
+
+
+# Bots by the name sweep.py knows them by
+BOTS = {"random": RandomBot, "kite": KiteBot}
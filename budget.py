@@ -0,0 +1,145 @@
+import heapq
+from operator import attrgetter
+
+import app
+
+class EntityBudget:
+    """
+    Keeps the number of live enemies, coins and bullets under per-type caps.
+
+    Each capped type has an overflow policy:
+    - "merge" (coins): nearby coins are combined into one coin worth their total.
+    - "despawn_oldest": the entities that have been alive longest are removed.
+    - "throttle" (enemies): no new ones are spawned until there is room again.
+
+    In adaptive mode the budget also watches the measured frame time and scales
+    the size of enemy waves down while frames take longer than the frame budget,
+    then lets it recover once they are fast again.
+    """
+
+    POLICIES = {
+        "enemies": ("throttle", "despawn_oldest"),
+        "coins": ("merge", "despawn_oldest"),
+        "bullets": ("despawn_oldest",),
+    }
+
+    def __init__(self, caps=app.ENTITY_CAPS, frame_budget=app.FRAME_TIME_BUDGET, adaptive=app.ADAPTIVE_SPAWNING):
+        """
+        Arguments:
+        - caps: Dictionary of entity type -> (maximum count, overflow policy).
+          Types that are missing (or the whole argument being None) aren't limited.
+        - frame_budget: Target time for one frame's work (update and draw), in seconds.
+        - adaptive: Scale enemy waves down while frames go over frame_budget.
+        """
+        self.caps = dict(caps or {})
+        for kind, (_, policy) in self.caps.items():
+            if policy not in self.POLICIES.get(kind, ()):
+                raise ValueError(f"Unsupported overflow policy {policy!r} for {kind}")
+        self.frame_budget = frame_budget
+        self.adaptive = adaptive
+        self.frame_time = 0.0  # Smoothed frame time in seconds
+        self.spawn_scale = 1.0  # Multiplier for the size of enemy waves (adaptive mode)
+        # How often each policy has kicked in since the game started
+        self.stats = {"merged": 0, "despawned": 0, "throttled": 0}
+
+    def room(self, kind, live):
+        """
+        Return how many more entities of a type may be created right now
+        (None means no limit).
+        """
+        cap = self.caps.get(kind)
+        if cap is None or cap[1] != "throttle":
+            return None
+        return max(0, cap[0] - live)
+
+    def wave_size(self, count):
+        """Return the size of an enemy wave after adaptive scaling (at least 1)."""
+        return max(1, round(count * self.spawn_scale))
+
+    def enforce(self, game):
+        """Apply the overflow policies to the game's entity lists (called once per tick)."""
+        cap = self.caps.get("enemies")
+        if cap is not None and cap[1] == "despawn_oldest" and len(game.enemies) > cap[0]:
+            excess = len(game.enemies) - cap[0]
+            game.remove_enemies(set(game.enemies[:excess]))  # Oldest enemies are at the front
+            self.stats["despawned"] += excess
+
+        cap = self.caps.get("coins")
+        if cap is not None and len(game.coins) > cap[0]:
+            before = len(game.coins)
+            if cap[1] == "merge":
+                merge_coins(game.coins, cap[0])
+                self.stats["merged"] += before - len(game.coins)
+            # Despawn policy, or a limit merging can't get down to (merging always leaves one coin)
+            excess = len(game.coins) - cap[0]
+            if excess > 0:
+                for coin in heapq.nsmallest(excess, game.coins, key=attrgetter("serial")):
+                    game.coins.remove(coin)
+                self.stats["despawned"] += excess
+
+        cap = self.caps.get("bullets")
+        bullets = game.player.bullets
+        if cap is not None and len(bullets) > cap[0]:
+            excess = len(bullets) - cap[0]
+            game.player.discard_oldest_bullets(excess)
+            self.stats["despawned"] += excess
+
+    def record_frame(self, seconds):
+        """
+        Feed the time one frame's work took into the adaptive spawn rate.
+
+        Arguments:
+        - seconds: Time spent updating and drawing the frame (not waiting for the clock).
+        """
+        self.frame_time += (seconds - self.frame_time) * 0.1  # Exponential moving average
+        if not self.adaptive:
+            return
+        if self.frame_time > self.frame_budget:
+            self.spawn_scale = max(app.MIN_SPAWN_SCALE, self.spawn_scale * 0.95)
+        elif self.frame_time < self.frame_budget * 0.8:
+            self.spawn_scale = min(1.0, self.spawn_scale + 0.01)
+
+
+def merge_coins(coins, limit, cell_size=16):
+    """
+    Combine coins that share a grid cell into single coins worth their total value,
+    doubling the cell size until there are at most limit coins left. Only as many
+    coins are merged as needed, so the index ends up exactly at the limit.
+
+    Arguments:
+    - coins: The game's CoinIndex.
+    - limit: Number of coins to merge down to. Merging can't go below one coin,
+      so a limit of 0 stops at 1.
+
+    The merged coin sits at the value-weighted centre of the coins it replaces.
+    """
+    limit = max(limit, 1)
+    if len(coins) <= limit:
+        return
+    # Cells are counted from the top-left coin, so once a cell is as big as the
+    # area the coins cover they all share it and the loop has to make progress
+    left = min(coin.x for coin in coins)
+    top = min(coin.y for coin in coins)
+    while len(coins) > limit:
+        cells = {}
+        for coin in coins:
+            cells.setdefault((int((coin.x - left) // cell_size), int((coin.y - top) // cell_size)), []).append(coin)
+        cell_size *= 2
+        if len(cells) == len(coins):
+            continue  # Every coin is in its own cell, try bigger cells
+
+        excess = len(coins) - limit
+        for group in cells.values():
+            if excess <= 0:
+                break
+            if len(group) > 1:
+                combine = group[:excess + 1]  # Don't merge more coins than needed
+                value = sum(coin.value for coin in combine)
+                x = sum(coin.x * coin.value for coin in combine) / value
+                y = sum(coin.y * coin.value for coin in combine) / value
+                keep = combine[0]
+                for coin in combine[1:]:
+                    coins.remove(coin)
+                coins.move(keep, x, y)
+                keep.set_value(value)
+                excess -= len(combine) - 1
@@ -2,47 +2,167 @@ import app
 import math
 import pygame
 
+class BulletType:
+    """
+    Everything bullets of one look share: their size, color and surface.
+    Bullets keep a reference to their type (see get_bullet_type).
+    """
+
+    __slots__ = ("size", "color", "image")
+
+    def __init__(self, size, color):
+        self.size = size  # Size of the bullet
+        self.color = color  # Color of the bullet
+        # Create a surface with the given size and fill it with the color
+        self.image = pygame.Surface((size, size))
+        self.image.fill(color)
+
+# Bullet types shared by every bullet with the same (size, color)
+_type_cache = {}
+
+def get_bullet_type(size, color):
+    """
+    Returns the (shared) BulletType for bullets of the given size and color.
+    The type is created the first time it is asked for and reused after that,
+    so bullets must never draw onto their image.
+    """
+    key = (size, tuple(color))
+    bullet_type = _type_cache.get(key)
+    if bullet_type is None:
+        bullet_type = _type_cache[key] = BulletType(size, color)
+    return bullet_type
+
 class Bullet:
-    def __init__(self, x, y, vx, vy, size, color=(255, 0, 0)):  # Default color is red
+    # Size and color live in the shared BulletType (self.kind)
+    __slots__ = ("x", "y", "prev_x", "prev_y", "vx", "vy", "kind", "image", "ttl", "pierce", "rect")
+
+    def __init__(self, x, y, vx, vy, size, color=(255, 0, 0),  # Default color is red
+                 ttl=app.BULLET_LIFETIME, pierce=app.BULLET_PIERCE):
         # Initialise the bullet's position (x, y) and velocity (vx, vy)
         self.x = x
         self.y = y
+        self.prev_x = x  # Position before the last tick (for interpolated drawing)
+        self.prev_y = y
         self.vx = vx  # Horizontal velocity
         self.vy = vy  # Vertical velocity
-        self.size = size  # Size of the bullet
-        self.color = color  # Store color as a property (default red)
+        self.kind = get_bullet_type(size, color)  # Size, color and surface (shared)
+        self.ttl = ttl  # Ticks left before the bullet disappears
+        self.pierce = pierce  # Enemies the bullet can still hit
         
-        # Create the bullet image based on size and color
-        self.image = self.create_bullet_image()
+        # The bullet image (the type's surface, kept on the bullet since drawing reads it so often)
+        self.image = self.kind.image
         
         # Get the rectangular area for the bullet image, used for positioning and collision detection
         self.rect = self.image.get_rect(center=(self.x, self.y))
 
+    def reset(self, x, y, vx, vy, size, color=(255, 0, 0), ttl=app.BULLET_LIFETIME, pierce=app.BULLET_PIERCE):
+        """Re-initialises a recycled bullet in place (used by BulletPool)."""
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.vx = vx
+        self.vy = vy
+        self.ttl = ttl
+        self.pierce = pierce
+        if size != self.size or color != self.color:
+            # Only look up a new type (and resize the rect) if the look changed
+            self.set_type(get_bullet_type(size, color))
+        self.rect.center = (x, y)
+
+    def set_type(self, bullet_type):
+        """Gives the bullet another look (its rect keeps its centre)."""
+        self.kind = bullet_type
+        self.image = bullet_type.image
+        center = self.rect.center
+        self.rect.size = self.image.get_size()
+        self.rect.center = center
+
+    @property
+    def size(self):
+        return self.kind.size
+
+    @size.setter
+    def size(self, value):
+        self.set_type(get_bullet_type(value, self.color))
+
+    @property
+    def color(self):
+        return self.kind.color
+
+    @color.setter
+    def color(self, value):
+        self.set_type(get_bullet_type(self.size, value))
+
     def create_bullet_image(self):
-        """Creates and returns the surface for the bullet image."""
-        # Create a surface with the given size
-        bullet_image = pygame.Surface((self.size, self.size))
-        
-        # Fill the surface with the specified color
-        bullet_image.fill(self.color)
-        
-        return bullet_image
+        """Returns the surface for the bullet image (shared through its BulletType)."""
+        return self.kind.image
 
     def update(self):
-        """Updates the bullet's position based on its velocity."""
+        """Updates the bullet's position based on its velocity and counts down its lifetime."""
         # Update the bullet's x and y positions by adding the velocity components
         self.x += self.vx
         self.y += self.vy
+        self.ttl -= 1
         
         # Update the bullet's rectangle position (used for drawing and collision detection)
         self.rect.center = (self.x, self.y)
 
-    def draw(self, screen):
-        """Draws the bullet on the given screen."""
+    def draw(self, screen, offset=(0, 0)):
+        """Draws the bullet on the given screen (offset is the camera position)."""
         # Blit (draw) the bullet image onto the screen at the bullet's current position
-        screen.blit(self.image, self.rect.topleft)
+        screen.blit(self.image, (self.rect.x - offset[0], self.rect.y - offset[1]))
 
-    def off_screen(self, width, height):
-        """Checks if the bullet is off the screen."""
+    @staticmethod
+    def submit_all(queue, bullets, offset=(0, 0), layer=0):
+        """Queue every bullet in a list for batched drawing (as rectangles when the queue fills primitives)."""
+        ox, oy = offset
+        if queue.fill_primitives:
+            queue.fill_many([(bullet.color, bullet.rect.move(-ox, -oy)) for bullet in bullets], layer)
+        else:
+            queue.blit_many([(bullet.image, (bullet.rect.x - ox, bullet.rect.y - oy)) for bullet in bullets], layer)
+
+    def spent(self):
+        """Checks if the bullet has run out of lifetime or hits."""
+        return self.ttl <= 0 or self.pierce <= 0
+
+    def off_screen(self, width, height, left=0, top=0):
+        """Checks if the bullet is off the screen (left, top is the camera position)."""
         # Return True if the bullet is out of bounds (either x or y is outside the screen)
-        return self.x < 0 or self.x > width or self.y < 0 or self.y > height
+        return self.x < left or self.x > left + width or self.y < top or self.y > top + height
+
+
+class BulletPool:
+    """
+    Recycles Bullet objects so firing doesn't allocate once the pool is warm.
+
+    Bullets are taken with acquire() and must be handed back with release()
+    once they leave play.
+    """
+
+    def __init__(self):
+        self.free = []  # Released bullets waiting to be reused
+        self.live = 0  # Bullets currently handed out
+        self.high_water = 0  # Highest number of bullets live at the same time
+
+    def acquire(self, x, y, vx, vy, size, color=(255, 0, 0), ttl=app.BULLET_LIFETIME, pierce=app.BULLET_PIERCE):
+        """Returns a bullet set up with the given values, reusing a free one if possible."""
+        if self.free:
+            bullet = self.free.pop()
+            bullet.reset(x, y, vx, vy, size, color, ttl, pierce)
+        else:
+            bullet = Bullet(x, y, vx, vy, size, color, ttl, pierce)
+
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return bullet
+
+    def release(self, bullet):
+        """Returns a bullet to the pool so a later acquire() can reuse it."""
+        self.live -= 1
+        self.free.append(bullet)
+
+    def stats(self):
+        """Returns the pool statistics (live, free and high-water mark) as a dictionary."""
+        return {"live": self.live, "free": len(self.free), "high_water": self.high_water}
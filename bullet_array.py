@@ -0,0 +1,249 @@
+from bullet import Bullet, get_bullet_type
+from enemy_pool import _pool_field
+import app
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it the player uses plain Bullet objects
+    np = None
+
+
+class ArrayBullet(Bullet):
+    """
+    A thin view onto one slot of a BulletArray.
+
+    Position, velocity, lifetime and pierce live in the array; this object
+    keeps the image and rect so the collision code and the entity budget can
+    treat it like any other bullet.
+    """
+
+    __slots__ = ("pool", "slot")
+
+    x = _pool_field("x")
+    y = _pool_field("y")
+    prev_x = _pool_field("prev_x")
+    prev_y = _pool_field("prev_y")
+    vx = _pool_field("vx")
+    vy = _pool_field("vy")
+    ttl = _pool_field("ttl")
+    pierce = _pool_field("pierce")
+
+    def __init__(self, pool, slot, x, y, vx, vy, size, color, ttl, pierce):
+        # The slot must be bound before Bullet.__init__ writes the initial state
+        self.pool = pool
+        self.slot = slot
+        super().__init__(x, y, vx, vy, size, color, ttl, pierce)
+
+    def set_type(self, bullet_type):
+        super().set_type(bullet_type)
+        self.pool.half[self.slot] = bullet_type.size // 2  # Drawing reads the size from the array
+
+
+class BulletArray:
+    """
+    Structure-of-arrays storage for the player's bullets.
+
+    Fans of bullets are created with one vectorized cos/sin call, every bullet
+    moves with one array add per axis, and a single mask finds the bullets that
+    left the view or ran out of lifetime or hits. Live bullets always occupy
+    slots [0, count) in firing order; removal compacts the arrays in one pass.
+
+    `views` holds one ArrayBullet per live bullet (in slot order); the player
+    uses it as its list of bullets.
+    """
+
+    FIELDS = {
+        "x": "f8",
+        "y": "f8",
+        "prev_x": "f8",  # Position before the last tick (for interpolated drawing)
+        "prev_y": "f8",
+        "vx": "f8",
+        "vy": "f8",
+        "half": "i4",  # Half the bullet's size, rounded down like Rect's centre offset
+        "ttl": "i4",
+        "pierce": "i4",
+    }
+
+    def __init__(self, capacity=512):
+        if np is None:
+            raise ImportError("BulletArray requires NumPy (pip install numpy)")
+        self.capacity = capacity
+        self.count = 0  # Number of live bullets (they occupy slots 0..count-1)
+        self.views = []  # ArrayBullet objects, indexed by slot
+        self.free_views = []  # Released views, reused by spawn_fan()
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self, needed):
+        """Double the capacity of every array until `needed` bullets fit."""
+        while self.capacity < needed:
+            self.capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def spawn_fan(self, x, y, angles, speed, size, color, ttl=app.BULLET_LIFETIME, pierce=app.BULLET_PIERCE):
+        """
+        Fire one bullet per angle from (x, y).
+
+        Arguments:
+        - angles: Sequence of directions in radians.
+        - speed: Speed of every bullet in the fan.
+        """
+        angles = np.asarray(angles, dtype="f8")
+        k = len(angles)
+        if k == 0:
+            return
+        start, end = self.count, self.count + k
+        if end > self.capacity:
+            self.grow(end)
+
+        # One vectorized trig call for the whole fan
+        self.vx[start:end] = np.cos(angles) * speed
+        self.vy[start:end] = np.sin(angles) * speed
+        self.x[start:end] = x
+        self.y[start:end] = y
+        self.prev_x[start:end] = x
+        self.prev_y[start:end] = y
+        self.half[start:end] = size // 2
+        self.ttl[start:end] = ttl
+        self.pierce[start:end] = pierce
+        self.count = end
+
+        bullet_type = get_bullet_type(size, color)
+        for slot in range(start, end):
+            if self.free_views:
+                view = self.free_views.pop()
+                view.slot = slot
+                if view.kind is not bullet_type:
+                    view.set_type(bullet_type)
+                view.rect.center = (x, y)
+            else:
+                view = ArrayBullet(self, slot, x, y, self.vx[slot], self.vy[slot], size, color, ttl, pierce)
+            self.views.append(view)
+
+    def spawn(self, x, y, vx, vy, size, color=(255, 0, 0), ttl=app.BULLET_LIFETIME, pierce=app.BULLET_PIERCE):
+        """Fire a single bullet with the given velocity."""
+        speed = (vx * vx + vy * vy) ** 0.5
+        self.spawn_fan(x, y, [np.arctan2(vy, vx)], speed, size, color, ttl, pierce)
+
+    def step(self):
+        """Move every bullet and count down its lifetime."""
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.ttl[:n] -= 1
+
+    def dead_mask(self, left, top, width=app.WIDTH, height=app.HEIGHT):
+        """Return a boolean array marking bullets that are out of the view, lifetime or hits."""
+        n = self.count
+        x = self.x[:n]
+        y = self.y[:n]
+        return ((self.ttl[:n] <= 0) | (self.pierce[:n] <= 0) |
+                (x < left) | (x > left + width) | (y < top) | (y > top + height))
+
+    def remove(self, mask):
+        """Remove the bullets marked in a boolean mask, compacting the arrays in one pass."""
+        if not mask.any():
+            return
+        n = self.count
+        keep = ~mask
+        m = int(keep.sum())
+        for name in self.FIELDS:
+            array = getattr(self, name)
+            array[:m] = array[:n][keep]
+
+        kept = []
+        for view, alive in zip(self.views, keep.tolist()):
+            if alive:
+                view.slot = len(kept)
+                kept.append(view)
+            else:
+                view.slot = None  # The view is detached and must not be used any more
+                self.free_views.append(view)
+        self.views[:] = kept  # Keep the same list object (the player holds on to it)
+        self.count = m
+
+    def sweep(self, left, top):
+        """Remove every bullet that left the view or ran out of lifetime or hits."""
+        if self.count:
+            self.remove(self.dead_mask(left, top))
+
+    def discard_oldest(self, count):
+        """Remove the `count` bullets that were fired first."""
+        mask = np.zeros(self.count, dtype=bool)
+        mask[:count] = True
+        self.remove(mask)
+
+    def clear(self):
+        """Remove every bullet."""
+        for view in self.views:
+            view.slot = None
+        self.free_views.extend(self.views)
+        self.views.clear()
+        self.count = 0
+
+    def save_previous(self):
+        """Remember every bullet's position as its position before the next tick."""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def sync_rects(self):
+        """Move every view's rect to its bullet's position (after step())."""
+        n = self.count
+        for view, cx, cy in zip(self.views, self.x[:n].tolist(), self.y[:n].tolist()):
+            view.rect.center = (cx, cy)
+
+    def with_pierce(self):
+        """
+        Return (bullet, pierce) pairs for every live bullet in firing order.
+
+        Reading every pierce count from the array at once saves the collision
+        check a property lookup per bullet.
+        """
+        return list(zip(self.views, self.pierce[:self.count].tolist()))
+
+    def screen_positions(self, offset=(0, 0), alpha=1.0):
+        """
+        Return the lists of every bullet's top-left screen x and y, in slot order.
+
+        Arguments:
+        - alpha: How far to go from the position before the last tick (0) to the current one (1).
+        """
+        n = self.count
+        x, y = self.x[:n], self.y[:n]
+        # Round the centres half away from zero, the way Rect.center does, so the
+        # bullets land on exactly the pixels their rects cover
+        left = np.trunc(x + np.copysign(0.5, x)) - self.half[:n] - offset[0]
+        top = np.trunc(y + np.copysign(0.5, y)) - self.half[:n] - offset[1]
+        if alpha < 1:
+            # Then move back along the last tick rounded the way Game.move_to_render_positions
+            # moves list bullets' rects (np.round and round() both round halves to even)
+            back = 1 - alpha
+            left += np.round((self.prev_x[:n] - x) * back)
+            top += np.round((self.prev_y[:n] - y) * back)
+        return left.astype("i8").tolist(), top.astype("i8").tolist()
+
+    def draw(self, surface, offset=(0, 0), alpha=1.0):
+        """Draw every bullet with a single Surface.blits call."""
+        if self.count == 0:
+            return
+        left, top = self.screen_positions(offset, alpha)
+        surface.blits([(view.image, (lx, ty)) for view, lx, ty in zip(self.views, left, top)], doreturn=False)
+
+    def submit(self, queue, offset=(0, 0), layer=0, alpha=1.0):
+        """Queue every bullet for batched drawing (as rectangles when the queue fills primitives)."""
+        if self.count == 0:
+            return
+        left, top = self.screen_positions(offset, alpha)
+        if queue.fill_primitives:
+            queue.fill_many([(view.color, (lx, ty, view.size, view.size))
+                             for view, lx, ty in zip(self.views, left, top)], layer)
+        else:
+            queue.blit_many([(view.image, (lx, ty)) for view, lx, ty in zip(self.views, left, top)], layer)
@@ -1,21 +1,72 @@
 import app
 
+MAX_COIN_SIZE = 25  # Width/height of the most valuable (merged) coins
+COIN_COLOR = (255, 215, 0)  # Coins are plain gold squares
+
+# Coin surfaces shared by every coin of the same size
+_surface_cache = {}
+
+def get_coin_surface(size):
+    """
+    Returns the (shared) surface for a coin of the given size.
+    Coins must never draw onto their image.
+    """
+    surface = _surface_cache.get(size)
+    if surface is None:
+        # Create a surface with transparency (SRCALPHA) filled with gold
+        surface = app.pygame.Surface((size, size), app.pygame.SRCALPHA)
+        surface.fill(COIN_COLOR)
+        _surface_cache[size] = surface
+    return surface
+
 class Coin:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "value", "image", "rect", "slot", "serial", "cell", "cell_slot")
+
+    def __init__(self, x, y, value=1):
         # Initialise the coin with its position (x, y)
         self.x = x
         self.y = y
-        
-        # Create a surface for the coin with transparency (SRCALPHA)
-        # The coin is represented as a small 15x15 surface
-        self.image = app.pygame.Surface((15, 15), app.pygame.SRCALPHA)
-        
-        # Fill the coin surface with a gold color (RGB value for gold is (255, 215, 0))
-        self.image.fill((255, 215, 0))
-        
+        self.value = value  # XP given when collected (merged coins are worth more)
+
+        # The coin is represented as a small 15x15 surface (bigger for valuable coins)
+        self.image = get_coin_surface(self.size_for(value))
+
         # Get the rectangular area of the coin image for collision detection
         self.rect = self.image.get_rect(center=(self.x, self.y))
 
-    def draw(self, surface):
-        # Draw the coin on the given surface at its current position
-        surface.blit(self.image, self.rect)
\ No newline at end of file
+        # Bookkeeping for the CoinIndex that holds the coin (set by the index)
+        self.slot = None  # Position in the index's list of coins
+        self.serial = None  # Order in which coins were added (lower is older)
+        self.cell = None  # Grid cell the coin is filed under
+        self.cell_slot = None  # Position in that cell's list
+
+    @staticmethod
+    def size_for(value):
+        """Returns the image size for a coin worth value XP (15 pixels, up to MAX_COIN_SIZE for merged coins)."""
+        return min(15 + value - 1, MAX_COIN_SIZE)
+
+    def set_value(self, value):
+        """Changes the coin's value and resizes it to match."""
+        self.value = value
+        self.image = get_coin_surface(self.size_for(value))
+        self.rect.size = self.image.get_size()
+        self.rect.center = (self.x, self.y)
+
+    def move_to(self, x, y):
+        """Moves the coin to a new position."""
+        self.x = x
+        self.y = y
+        self.rect.center = (x, y)
+
+    def draw(self, surface, offset=(0, 0)):
+        # Draw the coin on the given surface at its current position (offset is the camera position)
+        surface.blit(self.image, (self.rect.x - offset[0], self.rect.y - offset[1]))
+
+    @staticmethod
+    def submit_all(queue, coins, offset=(0, 0), layer=0):
+        """Queue every coin in a list for batched drawing (as gold rectangles when the queue fills primitives)."""
+        ox, oy = offset
+        if queue.fill_primitives:
+            queue.fill_many([(COIN_COLOR, coin.rect.move(-ox, -oy)) for coin in coins], layer)
+        else:
+            queue.blit_many([(coin.image, (coin.rect.x - ox, coin.rect.y - oy)) for coin in coins], layer)
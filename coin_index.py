@@ -0,0 +1,151 @@
+from coin import Coin
+import app
+
+class CoinIndex:
+    """
+    Every coin in the game, kept in a flat list plus a uniform grid of cells.
+
+    Coins hardly ever move, so unlike the enemy grid this index is updated
+    incrementally instead of being rebuilt every tick. Each coin remembers
+    its position in the flat list and in its cell's list, so removing a coin
+    is a swap with the last entry and a pop (O(1), the order of the list is
+    not kept). Radius and rect queries only look at the cells they touch,
+    so their cost depends on the number of nearby coins, not all coins.
+
+    The index can be used like a read-only list of coins (len() and iteration).
+    """
+
+    def __init__(self, cell_size=app.COIN_CELL_SIZE, merge_radius=app.COIN_MERGE_RADIUS):
+        self.cell_size = cell_size  # Width and height of a single grid cell in pixels
+        self.merge_radius = merge_radius  # drop() merges into a coin closer than this
+        self.coins = []  # Every coin, in no particular order
+        self.cells = {}  # Maps (cell_x, cell_y) to a list of the coins whose centre is in it
+        self.next_serial = 0  # Stamped on each coin as it is added, so older coins can be found
+
+    def __len__(self):
+        return len(self.coins)
+
+    def __iter__(self):
+        return iter(self.coins)
+
+    def cell_of(self, x, y):
+        """Return the cell containing a point."""
+        size = self.cell_size
+        return int(x // size), int(y // size)
+
+    def add(self, coin):
+        """Add a coin to the index (no merging)."""
+        coin.slot = len(self.coins)
+        coin.serial = self.next_serial
+        self.next_serial += 1
+        self.coins.append(coin)
+        self.insert_cell(coin)
+        return coin
+
+    def drop(self, x, y, value=1):
+        """
+        Drop value XP worth of coin at a position. If a coin already lies within
+        merge_radius the value is added to the nearest one instead of creating
+        a new coin.
+
+        Returns:
+        - The coin holding the value.
+        """
+        nearest = self.nearest(x, y, self.merge_radius)
+        if nearest is None:
+            return self.add(Coin(x, y, value))
+
+        total = nearest.value + value
+        # Keep the merged coin at the value-weighted centre of the two
+        self.move(nearest, (nearest.x * nearest.value + x * value) / total,
+                  (nearest.y * nearest.value + y * value) / total)
+        nearest.set_value(total)
+        return nearest
+
+    def remove(self, coin):
+        """Remove a coin by swapping the last coin into its place."""
+        self.remove_cell(coin)
+        coins = self.coins
+        last = coins.pop()
+        if last is not coin:
+            coins[coin.slot] = last
+            last.slot = coin.slot
+        coin.slot = None
+
+    def move(self, coin, x, y):
+        """Move a coin, changing cells only if it crosses a cell border."""
+        coin.move_to(x, y)
+        if self.cell_of(x, y) != coin.cell:
+            self.remove_cell(coin)
+            self.insert_cell(coin)
+
+    def clear(self):
+        """Remove every coin."""
+        self.coins.clear()
+        self.cells.clear()
+
+    def insert_cell(self, coin):
+        """Add a coin to the list of the cell its centre is in."""
+        coin.cell = self.cell_of(coin.x, coin.y)
+        bucket = self.cells.get(coin.cell)
+        if bucket is None:
+            bucket = self.cells[coin.cell] = []
+        coin.cell_slot = len(bucket)
+        bucket.append(coin)
+
+    def remove_cell(self, coin):
+        """Take a coin out of its cell's list (swap-remove)."""
+        bucket = self.cells[coin.cell]
+        last = bucket.pop()
+        if last is not coin:
+            bucket[coin.cell_slot] = last
+            last.cell_slot = coin.cell_slot
+        elif not bucket:
+            del self.cells[coin.cell]  # Don't keep empty cells around as the player travels
+
+    def query_radius(self, x, y, radius):
+        """Return the coins whose centre is within radius of (x, y)."""
+        x0, y0 = self.cell_of(x - radius, y - radius)
+        x1, y1 = self.cell_of(x + radius, y + radius)
+        radius_sq = radius * radius
+        cells = self.cells
+        found = []
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    for coin in bucket:
+                        dx = coin.x - x
+                        dy = coin.y - y
+                        if dx * dx + dy * dy <= radius_sq:
+                            found.append(coin)
+        return found
+
+    def query_rect(self, rect, margin=0):
+        """
+        Return the coins in the cells overlapping a rect grown by margin on every side.
+        This is a superset of the coins touching the rect: pass half the largest
+        coin size as margin and check coin.rect against the rect afterwards.
+        """
+        x0, y0 = self.cell_of(rect.left - margin, rect.top - margin)
+        x1, y1 = self.cell_of(rect.right + margin, rect.bottom + margin)
+        cells = self.cells
+        found = []
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.extend(bucket)
+        return found
+
+    def nearest(self, x, y, radius):
+        """Return the coin closest to (x, y) within radius, or None."""
+        best = None
+        best_sq = radius * radius
+        for coin in self.query_radius(x, y, radius):
+            dx = coin.x - x
+            dy = coin.y - y
+            dist_sq = dx * dx + dy * dy
+            if dist_sq <= best_sq:
+                best, best_sq = coin, dist_sq
+        return best
@@ -0,0 +1,45 @@
+import pygame
+
+# Movement bits: which direction keys are held during a tick
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+MOVE_UP = 4
+MOVE_DOWN = 8
+
+# Actions: key presses that change the game (see Game.apply_action)
+SHOOT = 1
+TOGGLE_AUTO_FIRE = 2
+UPGRADE_1 = 3
+UPGRADE_2 = 4
+UPGRADE_3 = 5
+RESTART = 6
+QUIT = 7
+
+KEY_ACTIONS = {
+    pygame.K_SPACE: SHOOT,
+    pygame.K_f: TOGGLE_AUTO_FIRE,
+    pygame.K_1: UPGRADE_1,
+    pygame.K_2: UPGRADE_2,
+    pygame.K_3: UPGRADE_3,
+    pygame.K_r: RESTART,
+    pygame.K_ESCAPE: QUIT,
+}
+
+def read_movement():
+    """
+    Read the movement keys (arrow keys or WASD) that are held down right now.
+
+    Returns:
+    - The MOVE_* bits of every held direction, combined with |.
+    """
+    keys = pygame.key.get_pressed()
+    movement = 0
+    if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        movement |= MOVE_LEFT
+    if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        movement |= MOVE_RIGHT
+    if keys[pygame.K_UP] or keys[pygame.K_w]:
+        movement |= MOVE_UP
+    if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        movement |= MOVE_DOWN
+    return movement
@@ -0,0 +1,67 @@
+import pygame
+import app
+
+class DirtyRectRenderer:
+    """
+    Keeps track of which parts of the screen changed so only those are redrawn.
+
+    Each frame:
+    1. begin_frame() paints the background back over everything drawn last frame.
+    2. The game draws its sprites and calls mark()/mark_all() with their rects.
+    3. present() pushes only last frame's and this frame's rects to the display,
+       or does a full flip when they would cover too much of the screen anyway.
+    """
+
+    def __init__(self, screen, background, max_dirty_fraction=app.DIRTY_RECT_MAX_FRACTION):
+        self.screen = screen
+        self.background = background
+        self.screen_rect = screen.get_rect()
+        # Above this fraction of the screen a single full flip is cheaper than many small updates
+        self.max_dirty_area = max_dirty_fraction * self.screen_rect.w * self.screen_rect.h
+        self.previous = []  # Rects drawn last frame (must be erased this frame)
+        self.current = []  # Rects drawn this frame
+        self.full_redraw = True  # The next frame must repaint the whole screen
+        self.overlay_shown = False  # A full-screen menu is on screen and hasn't changed
+
+    def invalidate(self):
+        """Force the next frame to be drawn in full (background change, menus, etc.)."""
+        self.full_redraw = True
+
+    def begin_frame(self):
+        """Restore the background under everything that was drawn last frame."""
+        if self.full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            screen, background = self.screen, self.background
+            for rect in self.previous:
+                screen.blit(background, rect, rect)
+        self.current = []
+
+    def mark(self, rect):
+        """Record that a rect was drawn this frame (parts outside the screen are ignored)."""
+        clipped = rect.clip(self.screen_rect)  # Also takes a copy, since sprites move their rects
+        if clipped.w and clipped.h:
+            self.current.append(clipped)
+
+    def mark_all(self, entities):
+        """Record the rects of every entity in an iterable."""
+        screen_rect = self.screen_rect
+        current = self.current
+        for entity in entities:
+            clipped = entity.rect.clip(screen_rect)
+            if clipped.w and clipped.h:
+                current.append(clipped)
+
+    def present(self):
+        """Send this frame to the display, updating only the dirty rects if that's cheaper."""
+        if self.full_redraw:
+            pygame.display.flip()
+        else:
+            dirty = self.previous + self.current
+            if sum(rect.w * rect.h for rect in dirty) > self.max_dirty_area:
+                pygame.display.flip()
+            elif dirty:
+                pygame.display.update(dirty)
+
+        self.previous = self.current
+        self.full_redraw = False
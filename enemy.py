@@ -1,26 +1,125 @@
 import pygame
 import app
 
+class EnemyType:
+    """
+    Everything enemies of one type share: their animation frames and their
+    movement and knockback tuning. Enemies keep a reference to their type
+    instead of a copy of each value (see get_enemy_type).
+    """
+
+    __slots__ = ("name", "animations", "mirrored_animations", "speed", "animation_speed",
+                 "knockback_speed", "knockback_duration")
+
+    def __init__(self, name, animations, mirrored_animations=None):
+        self.name = name  # Type of the enemy (could be used for different behaviors)
+        self.animations = animations  # List of animation frames for the enemy
+        # Left-facing copies of the animation frames (made once by app.mirror_frames)
+        self.mirrored_animations = mirrored_animations if mirrored_animations is not None else animations
+        self.speed = app.DEFAULT_ENEMY_SPEED  # Default enemy speed from app settings
+        self.animation_speed = 8  # Speed of animation frames
+        self.knockback_speed = app.ENEMY_KNOCKBACK_SPEED  # Speed of knockback from app settings
+        self.knockback_duration = 10  # Duration of knockback (in frames)
+
+# Enemy types made so far, by name and animation lists (the types keep the lists alive, so ids stay unique)
+_type_cache = {}
+
+def get_enemy_type(name, animations, mirrored_animations=None):
+    """Returns the (shared) EnemyType for enemies of this name drawn with these animations."""
+    key = (name, id(animations), id(mirrored_animations))
+    enemy_type = _type_cache.get(key)
+    if enemy_type is None:
+        enemy_type = _type_cache[key] = EnemyType(name, animations, mirrored_animations)
+    return enemy_type
+
+def _type_field(name):
+    """Build a property that reads a tuning value from the enemy's type, unless the enemy has its own."""
+    def get(self):
+        tuning = self.tuning
+        if tuning is not None and name in tuning:
+            return tuning[name]
+        return getattr(self.kind, name)
+
+    def set(self, value):
+        # Only this enemy changes (an upgrade or debugging), the type stays shared
+        if self.tuning is None:
+            self.tuning = {}
+        self.tuning[name] = value
+
+    return property(get, set)
+
 class Enemy:
-    def __init__(self, x, y, enemy_type, animations):
+    # The data every enemy of a type shares lives in its EnemyType (self.kind);
+    # tuning set on one enemy goes into its own tuning dictionary instead
+    __slots__ = ("x", "y", "prev_x", "prev_y", "kind", "tuning", "facing_left", "vx", "vy", "player_distance",
+                 "lod_tier", "lod_phase", "state", "frame_index", "animation_timer", "image", "rect", "knockback",
+                 "knockback_direction", "knockback_timer")
+
+    def __init__(self, x, y, enemy_type, animations, mirrored_animations=None):
         # Initialise the enemy with position (x, y), type, and animations
         self.x = x
         self.y = y
-        self.speed = app.DEFAULT_ENEMY_SPEED  # Default enemy speed from app settings
-        self.enemy_type = enemy_type  # Type of the enemy (could be used for different behaviors)
-        self.animations = animations  # Dictionary of animations for the enemy
+        self.prev_x = x  # Position before the last tick (for interpolated drawing)
+        self.prev_y = y
+        self.kind = get_enemy_type(enemy_type, animations, mirrored_animations)  # Shared type data
+        self.tuning = None  # Speed/knockback values this enemy overrides (None until one is set)
+        self.facing_left = False  # Enemies face the way they are moving
+        self.vx = 0  # Movement during the last update (used to extrapolate between LOD updates)
+        self.vy = 0
+        self.player_distance = 0  # Distance to the player measured by the last update
+        self.lod_tier = 0  # Distance band from the last full update (see lod.py)
+        self.lod_phase = None  # Tick offset of its full updates, handed out by the LODScheduler
         self.state = "idle"  # Enemy starts in the 'idle' state
         self.frame_index = 0  # Frame index for animations
         self.animation_timer = 0  # Timer for controlling animation speed
-        self.animation_speed = 8  # Speed of animation frames
         self.image = self.animations[self.frame_index]  # Initial image of the enemy based on the frame index
         self.rect = self.image.get_rect(center=(self.x, self.y))  # Rectangle for collision detection
         self.knockback = False  # Flag to track if the enemy is being knocked back
-        self.knockback_speed = app.ENEMY_KNOCKBACK_SPEED  # Speed of knockback from app settings
         self.knockback_direction = (0, 0)  # Direction of knockback
-        self.knockback_duration = 10  # Duration of knockback (in frames)
         self.knockback_timer = 0  # Timer to track knockback duration
 
+    def reset(self, x, y, enemy_type, animations, mirrored_animations=None):
+        """Re-initialises a recycled enemy in place (used by EnemyRecycler and EnemyPool)."""
+        self.x = x
+        self.y = y
+        self.prev_x = x
+        self.prev_y = y
+        self.kind = get_enemy_type(enemy_type, animations, mirrored_animations)
+        self.tuning = None
+        self.facing_left = False
+        self.vx = 0
+        self.vy = 0
+        self.player_distance = 0
+        self.lod_tier = 0
+        self.lod_phase = None
+        self.state = "idle"
+        self.frame_index = 0
+        self.animation_timer = 0
+        self.image = self.animations[self.frame_index]
+        self.rect.size = self.image.get_size()  # Keep the rect object, only resize it
+        self.rect.center = (self.x, self.y)
+        self.knockback = False
+        self.knockback_direction = (0, 0)
+        self.knockback_timer = 0
+
+    # The shared type data, read through the enemy as before
+    @property
+    def enemy_type(self):
+        return self.kind.name
+
+    @property
+    def animations(self):
+        return self.kind.animations
+
+    @property
+    def mirrored_animations(self):
+        return self.kind.mirrored_animations
+
+    speed = _type_field("speed")
+    animation_speed = _type_field("animation_speed")
+    knockback_speed = _type_field("knockback_speed")
+    knockback_duration = _type_field("knockback_duration")
+
     def update(self, player):
         # Update the enemy's state and position each frame
         if player.game.paused or player.game.in_level_up_menu:
@@ -28,8 +127,10 @@ class Enemy:
 
         if self.knockback:
             # Apply knockback effect to the enemy
-            self.x += self.knockback_direction[0] * self.knockback_speed
-            self.y += self.knockback_direction[1] * self.knockback_speed
+            move_x = self.knockback_direction[0] * self.knockback_speed
+            move_y = self.knockback_direction[1] * self.knockback_speed
+            self.x += move_x
+            self.y += move_y
             
             # Update the knockback timer
             self.knockback_timer += 1
@@ -38,13 +139,32 @@ class Enemy:
                 self.knockback_timer = 0  # Reset knockback timer
         else:
             # Move towards the player if not knocked back
+            move_x = move_y = 0
             dx = player.x - self.x  # Horizontal distance to player
             dy = player.y - self.y  # Vertical distance to player
             dist = (dx**2 + dy**2) ** 0.5  # Calculate the distance to the player
+            self.player_distance = dist
+            flow = player.game.flow_field
+            target = flow.target(self.x, self.y) if flow is not None else None
+            if target is not None:
+                # Follow the flow field's path (it leads to the player)
+                dx = target[0] - self.x
+                dy = target[1] - self.y
+                dist = (dx**2 + dy**2) ** 0.5
             if dist != 0:
                 # Move the enemy towards the player
-                self.x += (dx / dist) * self.speed
-                self.y += (dy / dist) * self.speed
+                move_x = (dx / dist) * self.speed
+                move_y = (dy / dist) * self.speed
+                self.x += move_x
+                self.y += move_y
+        self.vx = move_x
+        self.vy = move_y
+
+        # Face the direction of horizontal movement (keep the old facing when not moving sideways)
+        if move_x < 0:
+            self.facing_left = True
+        elif move_x > 0:
+            self.facing_left = False
 
         # Update the enemy's rectangle position
         self.rect.center = (self.x, self.y)
@@ -52,6 +172,13 @@ class Enemy:
         # Call the animate function to update the enemy's animation
         self.animate()
 
+    def extrapolate(self):
+        # Cheap update for distant enemies between full updates (see lod.py):
+        # keep moving the way the last update did, without re-aiming or animating
+        self.x += self.vx
+        self.y += self.vy
+        self.rect.center = (self.x, self.y)
+
     def animate(self):
         # Update the enemy's animation based on the timer
         self.animation_timer += 1
@@ -60,9 +187,22 @@ class Enemy:
             self.frame_index = (self.frame_index + 1) % len(self.animations)  # Loop through frames
             self.image = self.animations[self.frame_index]  # Set the new animation frame
 
-    def draw(self, surface):
+    def current_image(self):
+        # The animation frame to draw, facing the enemy's movement direction
+        # (the left-facing frames were flipped once at load time)
+        return self.mirrored_animations[self.frame_index] if self.facing_left else self.image
+
+    def draw(self, surface, offset=(0, 0)):
         # Draw the enemy on the screen at its current position
-        surface.blit(self.image, self.rect)
+        # (offset is the camera position, subtracted to turn world positions into screen positions)
+        surface.blit(self.current_image(), (self.rect.x - offset[0], self.rect.y - offset[1]))
+
+    @staticmethod
+    def submit_all(queue, enemies, offset=(0, 0), layer=0):
+        # Queue every enemy in a list for batched drawing (see render_queue.py)
+        ox, oy = offset
+        queue.blit_many([(enemy.current_image(), (enemy.rect.x - ox, enemy.rect.y - oy)) for enemy in enemies],
+                        layer)
 
     def set_knockback(self, px, py, distance):
         # Set the knockback direction and apply knockback effect
@@ -74,3 +214,39 @@ class Enemy:
             self.knockback_direction = (dx / dist, dy / dist)
             self.knockback = True  # Enable knockback effect
             self.knockback_timer = 0  # Reset knockback timer
+
+
+class EnemyRecycler:
+    """
+    Keeps killed Enemy objects so new spawns can reuse them instead of allocating.
+
+    Enemies are taken with acquire() and must be handed back with release()
+    once they leave play.
+    """
+
+    def __init__(self):
+        self.free = []  # Released enemies waiting to be reused
+        self.live = 0  # Enemies currently handed out
+        self.high_water = 0  # Highest number of enemies live at the same time
+
+    def acquire(self, x, y, enemy_type, animations, mirrored_animations=None):
+        """Returns an enemy set up with the given values, reusing a free one if possible."""
+        if self.free:
+            enemy = self.free.pop()
+            enemy.reset(x, y, enemy_type, animations, mirrored_animations)
+        else:
+            enemy = Enemy(x, y, enemy_type, animations, mirrored_animations)
+
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return enemy
+
+    def release(self, enemy):
+        """Returns an enemy to the recycler so a later acquire() can reuse it."""
+        self.live -= 1
+        self.free.append(enemy)
+
+    def stats(self):
+        """Returns the recycler statistics (live, free and high-water mark) as a dictionary."""
+        return {"live": self.live, "free": len(self.free), "high_water": self.high_water}
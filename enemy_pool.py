@@ -0,0 +1,264 @@
+import app
+from enemy import Enemy
+from steering import separation
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it the game uses plain Enemy objects
+    np = None
+
+
+def _pool_field(name):
+    """Build a property that reads/writes one slot of a pool array."""
+    def get(self):
+        return getattr(self.pool, name)[self.slot].item()
+
+    def set(self, value):
+        getattr(self.pool, name)[self.slot] = value
+
+    return property(get, set)
+
+
+class PooledEnemy(Enemy):
+    """
+    A thin view onto one slot of an EnemyPool.
+
+    The per-frame state lives in the pool's arrays; this object only keeps the
+    rect and image so drawing and the collision code work exactly as they do
+    for a plain Enemy.
+    """
+
+    __slots__ = ("pool", "slot")
+
+    x = _pool_field("x")
+    y = _pool_field("y")
+    speed = _pool_field("speed")
+    knockback = _pool_field("knockback")
+    knockback_speed = _pool_field("knockback_speed")
+    knockback_duration = _pool_field("knockback_duration")
+    knockback_timer = _pool_field("knockback_timer")
+    animation_timer = _pool_field("animation_timer")
+    animation_speed = _pool_field("animation_speed")
+    frame_index = _pool_field("frame_index")
+    facing_left = _pool_field("facing_left")
+
+    def __init__(self, pool, slot, x, y, enemy_type, animations, mirrored_animations=None):
+        # The slot must be bound before Enemy.__init__ writes the initial state
+        self.pool = pool
+        self.slot = slot
+        super().__init__(x, y, enemy_type, animations, mirrored_animations)
+        self.load_type()
+
+    def reset(self, x, y, enemy_type, animations, mirrored_animations=None):
+        super().reset(x, y, enemy_type, animations, mirrored_animations)
+        self.load_type()
+
+    def load_type(self):
+        """Copy the tuning of the enemy's type into its slot (step() reads it from the arrays)."""
+        pool, slot, kind = self.pool, self.slot, self.kind
+        pool.speed[slot] = kind.speed
+        pool.animation_speed[slot] = kind.animation_speed
+        pool.knockback_speed[slot] = kind.knockback_speed
+        pool.knockback_duration[slot] = kind.knockback_duration
+        pool.frame_count[slot] = len(kind.animations)
+
+    @property
+    def knockback_direction(self):
+        return (self.pool.knockback_dx[self.slot].item(), self.pool.knockback_dy[self.slot].item())
+
+    @knockback_direction.setter
+    def knockback_direction(self, value):
+        self.pool.knockback_dx[self.slot] = value[0]
+        self.pool.knockback_dy[self.slot] = value[1]
+
+
+class EnemyPool:
+    """
+    Structure-of-arrays storage for enemies.
+
+    Positions, knockback state and animation timers are kept in contiguous
+    NumPy arrays so that step() can update every enemy with a handful of
+    vectorized operations instead of one Python call per enemy. Live enemies
+    always occupy slots [0, count), removal swaps the last enemy into the hole.
+
+    Steering is batched too (see steering.py): enemies look up the game's
+    flow field for all their cells at once, and a separation push keeps
+    crowded enemies from stacking.
+    """
+
+    FIELDS = {
+        "x": "f8",
+        "y": "f8",
+        "speed": "f8",
+        "knockback": "?",
+        "knockback_dx": "f8",
+        "knockback_dy": "f8",
+        "knockback_speed": "f8",
+        "knockback_duration": "i4",
+        "knockback_timer": "i4",
+        "animation_timer": "i4",
+        "animation_speed": "i4",
+        "frame_index": "i4",
+        "frame_count": "i4",
+        "facing_left": "?",
+        "serial": "i8",
+    }
+
+    def __init__(self, capacity=256, separation=app.ENEMY_SEPARATION):
+        """
+        Arguments:
+        - capacity: Number of slots to start with (the arrays grow as needed).
+        - separation: Push crowded enemies apart.
+        """
+        if np is None:
+            raise ImportError("EnemyPool requires NumPy (pip install numpy)")
+        self.separation = separation
+        self.capacity = capacity
+        self.count = 0  # Number of live enemies (they occupy slots 0..count-1)
+        self.next_serial = 0  # Spawn number of the next enemy (stays with it while its slot changes)
+        self.views = []  # PooledEnemy objects, indexed by slot
+        self.free_views = []  # Detached PooledEnemy objects, reused by spawn()
+        for name, dtype in self.FIELDS.items():
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+
+    def __len__(self):
+        return self.count
+
+    def grow(self):
+        """Double the capacity of every array."""
+        self.capacity *= 2
+        for name in self.FIELDS:
+            old = getattr(self, name)
+            new = np.zeros(self.capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def spawn(self, x, y, enemy_type, animations, mirrored_animations=None):
+        """
+        Create a new enemy in the next free slot.
+
+        Returns:
+        - The PooledEnemy view for the new enemy.
+        """
+        if self.count == self.capacity:
+            self.grow()
+        slot = self.count
+        self.count += 1
+        self.serial[slot] = self.next_serial
+        self.next_serial += 1
+        if self.free_views:
+            # Reuse a released view rather than building a new object and rect
+            enemy = self.free_views.pop()
+            enemy.slot = slot
+            enemy.reset(x, y, enemy_type, animations, mirrored_animations)
+        else:
+            enemy = PooledEnemy(self, slot, x, y, enemy_type, animations, mirrored_animations)
+        self.views.append(enemy)
+        return enemy
+
+    def release(self, enemy):
+        """Free an enemy's slot by moving the last live enemy into it."""
+        slot = enemy.slot
+        last = self.count - 1
+        if slot != last:
+            for name in self.FIELDS:
+                array = getattr(self, name)
+                array[slot] = array[last]
+            moved = self.views[last]
+            moved.slot = slot
+            self.views[slot] = moved
+        self.views.pop()
+        self.count -= 1
+        enemy.slot = None  # The view is detached and must not be used any more
+        self.free_views.append(enemy)
+
+    def clear(self):
+        """Remove every enemy from the pool."""
+        for enemy in self.views:
+            enemy.slot = None
+        self.free_views.extend(self.views)
+        self.views = []
+        self.count = 0
+        self.next_serial = 0
+
+    def step(self, player):
+        """
+        Update every enemy in one batch: seek the player, decay knockback,
+        turn to face the movement direction, advance animation timers and
+        sync rects/images.
+        """
+        if player.game.paused or player.game.in_level_up_menu:
+            return  # Same rule as Enemy.update
+        n = self.count
+        if n == 0:
+            return
+
+        x = self.x[:n]
+        y = self.y[:n]
+        knocked = self.knockback[:n].copy()  # Knockback state at the start of the tick
+
+        # Seek velocity towards the player for enemies that aren't knocked back
+        dx = player.x - x
+        dy = player.y - y
+        flow = player.game.flow_field
+        if flow is not None:
+            # Enemies in the flow field's cells head along its paths instead
+            steer, target_x, target_y = flow.sample(x, y)
+            dx = np.where(steer, target_x - x, dx)
+            dy = np.where(steer, target_y - y, dy)
+        dist = np.sqrt(dx * dx + dy * dy)
+        seeking = ~knocked & (dist != 0)
+        speed = self.speed[:n]
+        dir_x = np.divide(dx, dist, out=np.zeros(n), where=seeking)
+        dir_y = np.divide(dy, dist, out=np.zeros(n), where=seeking)
+        vx = dir_x * speed
+        vy = dir_y * speed
+        heading_x = vx.copy()  # Where the enemy means to go (decides which way it faces)
+        if self.separation:
+            # Push crowded enemies apart, but never faster than they can move
+            push_x, push_y = separation(x, y, self.serial[:n], player.x, player.y)
+            strength = app.SEPARATION_STRENGTH * speed * seeking
+            vx += push_x * strength
+            vy += push_y * strength
+            moved = np.hypot(vx, vy)
+            too_fast = moved > speed
+            scale = np.divide(speed, moved, out=np.ones(n), where=too_fast)
+            vx *= scale
+            vy *= scale
+
+        # Knocked back enemies move along their knockback direction instead
+        kb_speed = self.knockback_speed[:n]
+        vx[knocked] = self.knockback_dx[:n][knocked] * kb_speed[knocked]
+        vy[knocked] = self.knockback_dy[:n][knocked] * kb_speed[knocked]
+        heading_x[knocked] = vx[knocked]
+        x += vx
+        y += vy
+
+        # Face the direction of horizontal movement (keep the old facing when not moving sideways).
+        # Separation pushes don't turn enemies around, so a jostled crowd doesn't flicker.
+        facing_left = self.facing_left[:n]
+        facing_left[heading_x < 0] = True
+        facing_left[heading_x > 0] = False
+
+        # Knockback timers: end the effect once it has lasted long enough
+        kb_timer = self.knockback_timer[:n]
+        kb_timer[knocked] += 1
+        finished = knocked & (kb_timer >= self.knockback_duration[:n])
+        self.knockback[:n][finished] = False
+        kb_timer[finished] = 0
+
+        # Animation timers: advance the frame of every enemy whose timer wrapped
+        anim_timer = self.animation_timer[:n]
+        anim_timer += 1
+        wrapped = anim_timer >= self.animation_speed[:n]
+        anim_timer[wrapped] = 0
+        frame_index = self.frame_index[:n]
+        frame_index[wrapped] = (frame_index[wrapped] + 1) % self.frame_count[:n][wrapped]
+
+        # Sync the pygame rects (and images for enemies that changed frame)
+        views = self.views
+        for enemy, cx, cy in zip(views, x.tolist(), y.tolist()):
+            enemy.rect.center = (cx, cy)
+        for slot in np.flatnonzero(wrapped).tolist():
+            enemy = views[slot]
+            enemy.image = enemy.animations[int(frame_index[slot])]
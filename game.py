@@ -1,32 +1,150 @@
 import random
 import os
 import math
+import time
 import pygame  # Ensure pygame is imported for audio
+import controls
 from player import Player
-from enemy import Enemy
-from coin import Coin
+from enemy import Enemy, EnemyRecycler
+from budget import EntityBudget
+from coin import MAX_COIN_SIZE, Coin
+from coin_index import CoinIndex
+from dirty_rects import DirtyRectRenderer
+from enemy_pool import EnemyPool
+from loader import StagedLoader
+from lod import LODScheduler
+from profiler import IDLE_PHASE, NULL_PROFILER, FrameProfiler, ProfilerOverlay
+from render_queue import LAYER_COINS, LAYER_ENEMIES, RenderQueue
+from replay import ReplayWriter
+from spawner import SpawnScheduler
+from spatial_grid import SpatialGrid
+from steering import FlowField
+from surface_cache import SurfaceCache
+from timestep import FixedTimestep
+from world import Camera, ChunkedWorld
 import app
 
 class Game:
-    def __init__(self):
-        pygame.init()  # Initialize Pygame
+    def __init__(self, use_enemy_pool=app.USE_ENEMY_POOL, headless=False, seed=None, rng=None,
+                 profile=False, dirty_rects=app.DIRTY_RECT_RENDERING, staged_loading=app.STAGED_LOADING,
+                 chunked_world=app.CHUNKED_WORLD, lod=app.ENEMY_LOD, entity_caps=app.ENTITY_CAPS,
+                 use_bullet_array=app.USE_BULLET_ARRAY, batched_rendering=app.BATCHED_RENDERING,
+                 fixed_timestep=app.FIXED_TIMESTEP, replay_path=app.REPLAY_PATH, balance=None,
+                 flow_field=app.ENEMY_FLOW_FIELD):
+        """
+        Arguments:
+        - use_enemy_pool: Store enemies in the NumPy-backed EnemyPool.
+        - headless: Run without a window, audio or fonts (for CI and simulations).
+          Use step() to advance the game as fast as possible.
+        - seed: Seed for the game's random number generator.
+        - rng: A random.Random instance to use instead of creating one from seed.
+        - profile: Start with the frame profiler and its overlay switched on (F3 toggles it).
+        - dirty_rects: Redraw and update only the parts of the screen that changed.
+        - staged_loading: Show a loading screen straight away and load assets and
+          music in the background (ignored by headless games).
+        - chunked_world: Play in an endless scrolling world with a camera that follows
+          the player, instead of a single screen (dirty_rects is ignored, since the
+          whole screen scrolls).
+        - lod: Give enemies far from the player full updates less often (see app.LOD_BANDS;
+          not used with use_enemy_pool, which updates every enemy in one batch).
+        - entity_caps: Per-type entity limits and overflow policies (see budget.py);
+          None removes every limit.
+        - use_bullet_array: Store the player's bullets in the NumPy-backed BulletArray.
+        - batched_rendering: Queue the sprites by layer and draw them in batches
+          (see render_queue.py) instead of drawing each one on its own.
+        - fixed_timestep: Let run() advance the game in fixed ticks however fast frames
+          are drawn, interpolating positions in between (see timestep.py). Otherwise
+          run() does one tick per frame at app.FPS.
+        - replay_path: Record every tick's input to this file (see replay.py), or None.
+        - balance: Values to use instead of the ones in app.BALANCE (wave sizes, upgrade
+          amounts), as a dictionary with some of the same keys.
+        - flow_field: Steer enemies along the paths of a FlowField (see steering.py)
+          instead of straight at the player.
+        """
+        self.start_time = time.perf_counter()
+        # Seconds from Game() to the loading screen and to the first playable frame
+        self.startup_metrics = {"time_to_first_frame": None, "time_to_interactive": None}
+        self.headless = headless
+        # Every random decision in the game goes through this generator
+        # (a seed is picked if none is given, so the run can be recorded and replayed)
+        if rng is None and seed is None:
+            seed = random.randrange(2**63)
+        self.seed = seed
+        self.rng = rng if rng is not None else random.Random(seed)
+
+        if headless:
+            # SDL's dummy drivers give us a display surface without opening a window
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+            pygame.display.init()  # Only the display is needed (for convert_alpha)
+        else:
+            pygame.init()  # Initialize Pygame
         self.screen = pygame.display.set_mode((app.WIDTH, app.HEIGHT))  # Set up game window size
         pygame.display.set_caption("Shooter")  # Set window title
         self.clock = pygame.time.Clock()  # Create clock object to control the frame rate
 
-        # Load game assets (images, animations, etc.)
-        self.assets = app.load_assets()
-        self.load_audio()  # Load audio for the game
-
-        # Set font paths for rendering text
-        font_path = os.path.join("assets", "PressStart2P.ttf")
-        self.font_small = pygame.font.Font(font_path, 18)
-        self.font_large = pygame.font.Font(font_path, 32)
+        self.font_small = None
+        self.font_large = None
+        self.surface_cache = SurfaceCache()  # Rendered text, overlays and menu layouts
+        if not headless:
+            self.load_fonts()
 
-        # Create a random background from floor tiles
-        self.background = self.create_random_background(
-            app.WIDTH, app.HEIGHT, self.assets["floor_tiles"]
-        )
+        # Load game assets (images, animations, etc.)
+        self.loader = None  # StagedLoader while assets/music are still arriving
+        if staged_loading and not headless:
+            self.assets = self.load_assets_staged()
+        else:
+            self.assets = app.load_assets()
+            if not headless:
+                self.load_audio()  # Load audio for the game
+
+        # Headless games pick upgrades automatically, since nobody can press a key
+        self.auto_upgrade = headless
+        self.tick_count = 0  # Number of simulation ticks run so far
+        self.ticks_per_second = 0.0  # Speed of the last step() call
+
+        # Per-phase timing (a FrameProfiler when enabled, a no-op stand-in otherwise)
+        self.profiler = NULL_PROFILER
+        self.profiler_overlay = None
+        if profile:
+            self.toggle_profiler()
+
+        # The camera stays at (0, 0) unless the world scrolls
+        self.camera = Camera()
+        if chunked_world:
+            # Floor chunks are generated on demand as the camera reaches them
+            self.world = ChunkedWorld(self.assets["floor_tiles"], self.rng.getrandbits(32))
+            self.background = None
+            dirty_rects = False
+        else:
+            self.world = None
+            # Create a random background from floor tiles
+            self.background = self.create_random_background(
+                app.WIDTH, app.HEIGHT, self.assets["floor_tiles"]
+            )
+
+        # Optional dirty-rectangle renderer (None means full redraw + flip every frame)
+        self.dirty_renderer = DirtyRectRenderer(self.screen, self.background) if dirty_rects else None
+        # Optional render queue (None means every sprite draws itself)
+        self.render_queue = RenderQueue() if batched_rendering else None
+
+        # Fixed-timestep loop for run() (None means one tick per frame)
+        self.timestep = FixedTimestep() if fixed_timestep else None
+        self.render_alpha = 1.0  # How far the frame being drawn is between the last two ticks
+        self.camera_prev = (self.camera.x, self.camera.y)  # Camera position before the last tick
+
+        # Input for the current tick: the movement keys held (controls.MOVE_* bits). It comes
+        # from the keyboard, or from input_source (a replay being played back, or a bot) if set.
+        self.movement = 0
+        self.input_source = None
+
+        # Wave sizes and upgrade amounts (app.BALANCE with any overrides)
+        self.balance = dict(app.BALANCE)
+        if balance:
+            unknown = set(balance) - set(self.balance)
+            if unknown:
+                raise ValueError(f"Unknown balance settings: {', '.join(sorted(unknown))}")
+            self.balance.update(balance)
 
         # Initialize game state variables
         self.running = True
@@ -36,24 +154,107 @@ class Game:
         # Enemies and coins setup
         self.enemies = []
         self.enemy_spawn_timer = 0
-        self.enemy_spawn_interval = 60
-        self.enemies_per_spawn = 1
+        self.enemy_spawn_interval = self.balance["enemy_spawn_interval"]
+        self.enemies_per_spawn = self.balance["enemies_per_spawn"]
+        self.spawner = SpawnScheduler(self.rng)  # Rolls waves in batches and releases them a few per tick
+        self.enemy_recycler = EnemyRecycler()  # Reuses killed Enemy objects (when not using the pool)
+
+        # Optional array-backed enemy storage with a vectorized update
+        self.enemy_pool = EnemyPool() if use_enemy_pool else None
+        self.use_bullet_array = use_bullet_array  # Read by Player when it is created
+
+        # Optional paths to the player for every cell of the arena (None means enemies head straight for the player)
+        self.flow_field = FlowField() if flow_field else None
+
+        # Optional level of detail for distant enemies (None means every enemy updates every tick)
+        self.lod = LODScheduler() if lod and self.enemy_pool is None else None
+
+        self.coins = CoinIndex()  # Every coin, indexed by position for pickups and merging
+
+        # Caps on live entities, plus the adaptive spawn rate (fed with frame times by run())
+        self.entity_budget = EntityBudget(entity_caps)
+
+        # Collision broadphase grid for enemies, rebuilt once per tick in update()
+        # (coins keep their own incrementally updated index). It also answers the
+        # nearest-enemy queries used for aiming; enemy_index() rebuilds it first if
+        # enemies were added or removed since.
+        self.enemy_grid = SpatialGrid()
+        self.enemy_grid_stale = True
+        self.auto_fire = app.AUTO_FIRE  # Shoot at the nearest enemy every tick (F toggles it)
 
-        self.coins = []
         self.reset_game()  # Reset game to initial state
 
+        # Records every tick's input when replay_path is given (see replay.py)
+        self.recorder = ReplayWriter(replay_path, self) if replay_path else None
+
     def load_audio(self):
         """Load background music for the game."""
         pygame.mixer.music.load("assets/intense-black-metal-instrumental-304729.mp3")  # Load music file
         pygame.mixer.music.play(-1)  # Play music in a loop
 
+    def load_assets_staged(self):
+        """
+        Show the loading screen while the essential assets load on background threads.
+        The rest (other enemy types, health frames, music) keeps loading during the game.
+        
+        Returns:
+        - The assets dictionary (filled in further as the remaining assets arrive).
+        """
+        self.loader = StagedLoader()
+        self.loader.start()
+        self.draw_loading_screen()
+        self.startup_metrics["time_to_first_frame"] = time.perf_counter() - self.start_time
+
+        while not self.loader.poll():
+            pygame.event.pump()  # Keep the window responsive while waiting
+            self.loader.wait(1 / app.FPS)
+            self.draw_loading_screen()
+        return self.loader.assets
+
+    def poll_loader(self):
+        """Add any assets that finished loading in the background (called every frame)."""
+        self.loader.poll()
+        if self.loader.done():
+            self.loader.shutdown()
+            self.loader = None
+
+    def draw_loading_screen(self):
+        """Draw a loading message and progress bar."""
+        self.screen.fill((0, 0, 0))
+        text = self.surface_cache.text(self.font_small, "Loading...", (255, 255, 255))
+        self.screen.blit(text, text.get_rect(center=(app.WIDTH // 2, app.HEIGHT // 2 - 30)))
+
+        bar = pygame.Rect(0, 0, 300, 16)
+        bar.center = (app.WIDTH // 2, app.HEIGHT // 2 + 10)
+        pygame.draw.rect(self.screen, (255, 255, 255), bar, 1)
+        progress = self.loader.progress() if self.loader else 1.0
+        self.screen.fill((255, 215, 0), (bar.x + 2, bar.y + 2, int((bar.w - 4) * progress), bar.h - 4))
+        pygame.display.flip()
+
+    def load_fonts(self):
+        """Load the fonts used for the HUD and menus (headless games skip this)."""
+        pygame.font.init()
+        # Set font paths for rendering text
+        font_path = os.path.join("assets", "PressStart2P.ttf")
+        self.font_small = pygame.font.Font(font_path, 18)
+        self.font_large = pygame.font.Font(font_path, 32)
+
     def reset_game(self):
         """Reset the game state to the initial conditions."""
         self.player = Player(app.WIDTH // 2, app.HEIGHT // 2, self.assets, self)  # Initialize player at center
+        if self.world is not None:
+            self.camera.follow(self.player.x, self.player.y)
+        if self.enemy_pool is not None:
+            self.enemy_pool.clear()
+        else:
+            for enemy in self.enemies:
+                self.enemy_recycler.release(enemy)
         self.enemies = []
+        self.enemy_grid_stale = True
+        self.spawner.clear()
         self.enemy_spawn_timer = 0
-        self.enemies_per_spawn = 1
-        self.coins = []
+        self.enemies_per_spawn = self.balance["enemies_per_spawn"]
+        self.coins.clear()
         self.game_over = False
         self.in_level_up_menu = False  # Track whether the player is in the upgrade menu
         self.upgrade_options = []  # Placeholder for upgrade options
@@ -76,7 +277,7 @@ class Game:
         # Tile the background by blitting floor tiles in a grid pattern
         for y in range(0, height, tile_h):
             for x in range(0, width, tile_w):
-                tile = random.choice(floor_tiles)  # Randomly choose a tile for each position
+                tile = self.rng.choice(floor_tiles)  # Randomly choose a tile for each position
                 bg.blit(tile, (x, y))
 
         return bg
@@ -85,48 +286,249 @@ class Game:
         """
         Main game loop: handles events, updates game state, and draws everything.
         """
+        timestep = self.timestep
+        render_fps = self.render_frame_rate() if timestep is not None else app.FPS
+        last_frame = time.perf_counter()
         while self.running:
-            self.clock.tick(app.FPS)  # Ensure the game runs at a consistent frame rate
-            self.handle_events()  # Handle any user input or system events
-
-            # If the game is not over and we're not in the level-up menu, update the game state
-            if not self.game_over and not self.in_level_up_menu:
-                self.update()
-            
-            self.draw()  # Draw everything to the screen
+            profiler = self.profiler  # Toggling mid-frame takes effect on the next frame
+            profiler.begin_frame()
+            with profiler.phase(IDLE_PHASE):
+                self.clock.tick(render_fps)  # Ensure the game runs at a consistent frame rate
+            if self.loader is not None:
+                self.poll_loader()  # Pick up assets still loading in the background
+            work_start = time.perf_counter()
+            if timestep is None:
+                self.tick()  # Handle events and update the game state
+                self.draw()  # Draw everything to the screen
+            else:
+                # Run as many fixed ticks as the time since the last frame calls for
+                # (often none on a fast display), then draw between the last two
+                ticks = timestep.advance(work_start - last_frame)
+                last_frame = work_start
+                for i in range(ticks):
+                    if i == ticks - 1:
+                        self.save_previous_positions()  # Interpolation starts from here
+                    self.tick()
+                self.draw(timestep.alpha())
+            self.entity_budget.record_frame(time.perf_counter() - work_start)
+            profiler.end_frame(self.entity_counts())
+
+            if self.startup_metrics["time_to_interactive"] is None:
+                self.startup_metrics["time_to_interactive"] = time.perf_counter() - self.start_time
+                if self.loader is not None:
+                    self.loader.request_music()  # Music isn't needed until the game is playable
         
+        if self.loader is not None:
+            self.loader.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
         pygame.mixer.music.stop()  # Stop the background music when quitting
         pygame.quit()  # Quit Pygame
 
+    def render_frame_rate(self):
+        """Return the frame rate run() draws at with a fixed timestep (app.MAX_RENDER_FPS, or the display's)."""
+        if app.MAX_RENDER_FPS:
+            return app.MAX_RENDER_FPS
+        # Older pygame versions can't tell, and some displays report 0
+        get_rates = getattr(pygame.display, "get_desktop_refresh_rates", None)
+        rates = get_rates() if get_rates is not None else []
+        return max(rates, default=0) or app.FPS
+
+    def save_previous_positions(self):
+        """Remember where everything that moves is before the next tick (drawing interpolates from here)."""
+        player = self.player
+        player.prev_x, player.prev_y = player.x, player.y
+        for enemy in self.enemies:
+            enemy.prev_x, enemy.prev_y = enemy.x, enemy.y
+        if player.bullet_array is not None:
+            player.bullet_array.save_previous()
+        else:
+            for bullet in player.bullets:
+                bullet.prev_x, bullet.prev_y = bullet.x, bullet.y
+        self.camera_prev = (self.camera.x, self.camera.y)
+
+    def move_to_render_positions(self, alpha):
+        """
+        Move the sprites' rects (and the camera) back along their last tick's movement,
+        to where they were alpha of the way through it.
+
+        Returns:
+        - What restore_positions() needs to put everything back.
+        """
+        back = 1 - alpha
+        moved = []
+        player = self.player
+        movers = [player] + self.enemies
+        if player.bullet_array is None:
+            movers += player.bullets
+        for entity in movers:
+            dx = round((entity.prev_x - entity.x) * back)
+            dy = round((entity.prev_y - entity.y) * back)
+            if dx or dy:
+                rect = entity.rect
+                moved.append((rect, rect.x, rect.y))
+                rect.move_ip(dx, dy)
+        if player.bullet_array is not None:
+            # Array bullets are drawn from the array, at exactly these positions
+            left, top = player.bullet_array.screen_positions((0, 0), alpha)
+            for bullet, x, y in zip(player.bullets, left, top):
+                rect = bullet.rect
+                moved.append((rect, rect.x, rect.y))
+                rect.topleft = (x, y)
+
+        camera = self.camera
+        camera_pos = (camera.x, camera.y)
+        px, py = self.camera_prev
+        camera.x = round(px + (camera.x - px) * alpha)
+        camera.y = round(py + (camera.y - py) * alpha)
+        return moved, camera_pos
+
+    def restore_positions(self, saved):
+        """Undo move_to_render_positions()."""
+        moved, (self.camera.x, self.camera.y) = saved
+        for rect, x, y in moved:
+            rect.topleft = (x, y)
+
+    def entity_counts(self):
+        """Return the number of live enemies, bullets and coins (and enemies per LOD band)."""
+        counts = {
+            "enemies": len(self.enemies),
+            "bullets": len(self.player.bullets),
+            "coins": len(self.coins),
+        }
+        if self.lod is not None:
+            counts.update(self.lod.counts())
+        return counts
+
+    def startup_info(self):
+        """Return the startup metrics formatted for the profiler overlay."""
+        info = {}
+        for name, label in (("time_to_first_frame", "first frame"), ("time_to_interactive", "interactive")):
+            seconds = self.startup_metrics[name]
+            if seconds is not None:
+                info[label] = f"{seconds * 1000:.0f} ms"
+        return info
+
+    def toggle_profiler(self):
+        """Switch the frame profiler and its on-screen overlay on or off."""
+        if self.profiler.enabled:
+            self.profiler = NULL_PROFILER
+        else:
+            self.profiler = FrameProfiler()
+            if self.profiler_overlay is None and not self.headless:
+                self.profiler_overlay = ProfilerOverlay()
+
+    def write_profile_trace(self, path=app.PROFILER_TRACE_PATH):
+        """Write the profiler's recorded frames to a Chrome trace file (if profiling)."""
+        if self.profiler.enabled:
+            self.profiler.write_chrome_trace(path)
+
+    def tick(self):
+        """
+        Advance the game by one fixed simulation tick: handle events, then update.
+        """
+        with self.profiler.phase("input"):
+            self.handle_events()  # Handle any user input or system events
+
+        if self.in_level_up_menu and self.auto_upgrade and self.upgrade_options:
+            self.select_upgrade(self.rng.randrange(len(self.upgrade_options)))
+
+        # If the game is not over and we're not in the level-up menu, update the game state
+        if not self.game_over and not self.in_level_up_menu:
+            self.update()
+
+        self.tick_count += 1
+
+    def step(self, n=1):
+        """
+        Run n simulation ticks back to back, without drawing or frame capping.
+        
+        Arguments:
+        - n: Number of ticks to run.
+        
+        Returns:
+        - The number of ticks per second achieved (also kept in self.ticks_per_second).
+        """
+        start = time.perf_counter()
+        for _ in range(n):
+            self.tick()
+        elapsed = time.perf_counter() - start
+
+        self.ticks_per_second = n / elapsed if elapsed > 0 else float("inf")
+        return self.ticks_per_second
+
     def handle_events(self):
         """
         Handle user input (keyboard, mouse, etc.) during the game loop.
+        The tick's input comes from the keyboard, or from the input source (a replay
+        being played back, or a bot), and is recorded if a replay is being written.
+        """
+        if self.input_source is not None:
+            movement, actions = self.input_source.next_tick(self)
+        else:
+            movement, actions = self.read_input()
+        if self.recorder is not None:
+            self.recorder.record(self, movement, actions)
+
+        self.movement = movement
+        for action in actions:
+            self.apply_action(action)
+
+    def read_input(self):
         """
+        Read this tick's input from pygame. Window and profiler events are handled
+        straight away, since they don't change the game.
+
+        Returns:
+        - A tuple (movement bits, list of actions) (see controls.py).
+        """
+        actions = []
         for event in pygame.event.get():
             if event.type == pygame.QUIT:  # If the window is closed, stop the game
                 self.running = False
-            elif event.type == pygame.KEYDOWN:
-                if self.game_over:  # If the game is over, handle restart or quit
-                    if event.key == pygame.K_r:
-                        self.reset_game()  # Restart the game
-                    elif event.key == pygame.K_ESCAPE:
-                        self.running = False  # Quit the game
-                else:
-                    # Normal gameplay controls
-                    if not self.in_level_up_menu:
-                        if event.key == pygame.K_SPACE:
-                            # Shoot towards the nearest enemy when space is pressed
-                            nearest_enemy = self.find_nearest_enemy()
-                            if nearest_enemy:
-                                self.player.shoot_toward_enemy(nearest_enemy)
-                    else:
-                        # In upgrade menu, handle number key presses to select upgrades
-                        if event.key in [pygame.K_1, pygame.K_2, pygame.K_3]:
-                            index = event.key - pygame.K_1  # Map key press to index
-                            if 0 <= index < len(self.upgrade_options):
-                                upgrade = self.upgrade_options[index]
-                                self.apply_upgrade(self.player, upgrade)
-                                self.in_level_up_menu = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.toggle_profiler()  # Show/hide the frame profiler overlay
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                self.write_profile_trace()  # Dump the recorded frames as a Chrome trace
+            elif event.type == pygame.KEYDOWN and event.key in controls.KEY_ACTIONS:
+                actions.append(controls.KEY_ACTIONS[event.key])
+        return controls.read_movement(), actions
+
+    def apply_action(self, action):
+        """
+        Carry out one player action (a controls constant) in the current game state.
+        """
+        if self.game_over:  # If the game is over, handle restart or quit
+            if action == controls.RESTART:
+                self.reset_game()  # Restart the game
+            elif action == controls.QUIT:
+                self.running = False  # Quit the game
+        else:
+            # Normal gameplay controls
+            if not self.in_level_up_menu:
+                if action == controls.SHOOT:
+                    # Shoot towards the nearest enemy when space is pressed
+                    nearest_enemy = self.find_nearest_enemy()
+                    if nearest_enemy:
+                        self.player.shoot_toward_enemy(nearest_enemy)
+                elif action == controls.TOGGLE_AUTO_FIRE:
+                    self.auto_fire = not self.auto_fire  # Toggle auto-fire
+            else:
+                # In upgrade menu, handle number key presses to select upgrades
+                if controls.UPGRADE_1 <= action <= controls.UPGRADE_3:
+                    self.select_upgrade(action - controls.UPGRADE_1)  # Map key press to index
+
+    def select_upgrade(self, index):
+        """
+        Apply the upgrade at the given index of the level-up menu and close the menu.
+        
+        Arguments:
+        - index: Position of the chosen upgrade in self.upgrade_options.
+        """
+        if 0 <= index < len(self.upgrade_options):
+            upgrade = self.upgrade_options[index]
+            self.apply_upgrade(self.player, upgrade)
+            self.in_level_up_menu = False
 
     def apply_upgrade(self, player, upgrade):
         """
@@ -137,78 +539,192 @@ class Game:
         - upgrade: The upgrade object containing the upgrade details.
         """
         name = upgrade["name"]
+        balance = self.balance
         if name == "Bigger Bullet":
-            player.bullet_size += 5
+            player.bullet_size += balance["bullet_size_step"]
         elif name == "Extra Side Bullets":
-            player.homing_side_bullet_count += 1
+            player.homing_side_bullet_count += balance["side_bullet_step"]
         elif name == "Spray Bullet":
-            player.spray_bullet_count += 2
+            player.spray_bullet_count += balance["spray_bullet_step"]
         elif name == "Shorter Cooldown":
-            player.shoot_cooldown = max(1, int(player.shoot_cooldown * 0.8))
+            player.shoot_cooldown = max(1, int(player.shoot_cooldown * balance["cooldown_factor"]))
+        elif name == "Coin Magnet":
+            player.pickup_radius += balance["magnet_radius_step"]
 
     def update(self):
         """
         Update the game state: handle player input, update player and enemies, check collisions, etc.
         """
-        self.player.handle_input()  # Update player based on input
-        self.player.update()  # Update player state (movement, actions, etc.)
+        profiler = self.profiler
+        with profiler.phase("input"):
+            self.player.handle_input()  # Update player based on input
+        with profiler.phase("player"):
+            if self.world is not None:
+                self.camera.follow(self.player.x, self.player.y)  # Keep the player in the middle of the screen
+            self.player.update()  # Update player state (movement, actions, etc.)
 
         # Update enemies and handle their logic
-        for enemy in self.enemies:
-            enemy.update(self.player)
+        with profiler.phase("enemies"):
+            self.update_enemies()
+
+            # Rebuild the enemy broadphase now that everything has moved this tick
+            self.enemy_grid.rebuild(self.enemies)
+            self.enemy_grid_stale = False
+
+        if self.auto_fire:
+            with profiler.phase("auto_fire"):
+                # Retarget every tick (the grid was just rebuilt, so this doesn't scan every enemy)
+                target = self.find_nearest_enemy()
+                if target is not None:
+                    self.player.shoot_toward_enemy(target)
 
         # Check for collisions between player, enemies, bullets, and coins
-        self.check_player_enemy_collisions()
-        self.check_bullet_enemy_collisions()
-        self.check_player_coin_collisions()
+        with profiler.phase("check_player_enemy_collisions"):
+            self.check_player_enemy_collisions()
+        with profiler.phase("check_bullet_enemy_collisions"):
+            self.check_bullet_enemy_collisions()
+        with profiler.phase("check_player_coin_collisions"):
+            self.check_player_coin_collisions()
 
         if self.player.health <= 0:
             self.game_over = True  # End the game if player health reaches 0
             return
         
-        self.spawn_enemies()  # Spawn enemies periodically
-        self.check_for_level_up()  # Check if the player has enough XP for a level-up
+        with profiler.phase("spawn"):
+            self.spawn_enemies()  # Spawn enemies periodically
+            self.check_for_level_up()  # Check if the player has enough XP for a level-up
+            self.entity_budget.enforce(self)  # Merge/despawn anything over its cap
 
-    def draw(self):
+    def update_enemies(self):
         """
-        Draw everything to the screen: background, player, enemies, health bar, etc.
+        Move every enemy for this tick. With LOD enabled, distant enemies only get
+        a full update every few ticks and are extrapolated in between.
         """
-        self.screen.blit(self.background, (0, 0))  # Draw background
-
-        # Draw coins on the screen
-        for coin in self.coins:
-            coin.draw(self.screen)
+        if self.flow_field is not None:
+            # Only searches again when the player changed cell (or the view moved the grid)
+            self.flow_field.update(self.player.x, self.player.y, self.camera.view_rect())
+        if self.enemy_pool is not None:
+            self.enemy_pool.step(self.player)  # One vectorized update for every enemy
+        elif self.lod is not None:
+            self.lod.update(self.enemies, self.player, self.tick_count)
+        else:
+            for enemy in self.enemies:
+                enemy.update(self.player)
 
-        # If game is not over, draw the player and enemies
-        if not self.game_over:
-            self.player.draw(self.screen)
+    def draw(self, alpha=1.0):
+        """
+        Draw everything to the screen: background, player, enemies, health bar, etc.
 
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
+        Arguments:
+        - alpha: How far (0 to 1) the frame is between the previous tick and the
+          latest one; below 1, moving sprites are drawn part of the way along
+          their last tick's movement.
+        """
+        if alpha >= 1:
+            self.draw_frame()
+            return
+        with self.profiler.phase("interpolate"):
+            saved = self.move_to_render_positions(alpha)
+        self.render_alpha = alpha
+        try:
+            self.draw_frame()
+        finally:
+            self.render_alpha = 1.0
+            self.restore_positions(saved)
+
+    def draw_frame(self):
+        """Draw everything at the sprites' current rect positions."""
+        with self.profiler.phase("draw"):
+            if self.font_small is None:
+                return  # Headless game without fonts: call load_fonts() first to render
+
+            renderer = self.dirty_renderer
+            if renderer is not None:
+                # Full-screen menus are drawn once and then left alone until they close
+                overlay_visible = self.in_level_up_menu or self.game_over
+                if overlay_visible:
+                    if renderer.overlay_shown and not self.profiler.enabled:
+                        return  # Nothing can change under the menu, keep the last frame
+                    renderer.overlay_shown = True
+                    renderer.invalidate()
+                elif renderer.overlay_shown:
+                    renderer.overlay_shown = False
+                    renderer.invalidate()
+                renderer.begin_frame()  # Restore the background only where sprites were
+            elif self.world is not None:
+                self.world.draw(self.screen, self.camera)  # Draw the floor chunks in view
+            else:
+                self.screen.blit(self.background, (0, 0))  # Draw background
+
+            offset = self.camera.offset()  # World positions minus this are screen positions
+            view = self.camera.view_rect()  # Sprites outside this aren't drawn at all
+
+            # Draw coins on the screen (only the index cells in view are looked at)
+            visible_coins = [coin for coin in self.coins.query_rect(view, MAX_COIN_SIZE // 2 + 1)
+                             if view.colliderect(coin.rect)]
+            queue = self.render_queue
+            if queue is not None:
+                # Queue every sprite by layer and draw them all in a few batched calls
+                Coin.submit_all(queue, visible_coins, offset, LAYER_COINS)
+                if not self.game_over:
+                    self.player.submit(queue, offset)
+                Enemy.submit_all(queue, [enemy for enemy in self.enemies if view.colliderect(enemy.rect)],
+                                 offset, LAYER_ENEMIES)
+                queue.flush(self.screen)
+            else:
+                for coin in visible_coins:
+                    coin.draw(self.screen, offset)
+
+                # If game is not over, draw the player and enemies
+                if not self.game_over:
+                    self.player.draw(self.screen, offset)
+
+                for enemy in self.enemies:
+                    if view.colliderect(enemy.rect):
+                        enemy.draw(self.screen, offset)
+
+            if renderer is not None:
+                renderer.mark_all(visible_coins)
+                renderer.mark_all(self.enemies)
+                if not self.game_over:
+                    renderer.mark(self.player.rect)
+                    renderer.mark_all(self.player.bullets)
             
-        # Draw upgrade menu if in level-up phase
-        if self.in_level_up_menu:
-            self.draw_upgrade_menu()
+            # Draw upgrade menu if in level-up phase
+            if self.in_level_up_menu:
+                self.draw_upgrade_menu()
         
-        # Draw the player's health bar
-        hp = max(0, min(self.player.health, 5))  # Ensure health is between 0 and 5
-        health_img = self.assets["health"][hp]
-        self.screen.blit(health_img, (10, 10))
-
-        # Draw XP and XP to next level
-        xp_text_surf = self.font_small.render(f"XP: {self.player.xp}", True, (255, 255, 255))
-        self.screen.blit(xp_text_surf, (10, 70))
-
-        next_level_xp = self.player.level * self.player.level * 5
-        xp_to_next = max(0, next_level_xp - self.player.xp)
-        xp_next_surf = self.font_small.render(f"Next Lvl XP: {xp_to_next}", True, (255, 255, 255))
-        self.screen.blit(xp_next_surf, (10, 100))
-
-        # Draw the game over screen if the game is over
-        if self.game_over:
-            self.draw_game_over_screen()
-        
-        pygame.display.flip()  # Update the screen with all the drawn elements
+            # Draw the player's health bar
+            hp = max(0, min(self.player.health, 5))  # Ensure health is between 0 and 5
+            if "health" not in self.assets:
+                self.loader.require("health")  # Loaded on demand the first time it's drawn
+            health_img = self.assets["health"][hp]
+            hud_rects = [self.screen.blit(health_img, (10, 10))]
+
+            # Draw XP and XP to next level
+            # (text is only rendered again when its value changes)
+            xp_text_surf = self.surface_cache.text(self.font_small, f"XP: {self.player.xp}", (255, 255, 255))
+            hud_rects.append(self.screen.blit(xp_text_surf, (10, 70)))
+
+            next_level_xp = self.player.level * self.player.level * 5
+            xp_to_next = max(0, next_level_xp - self.player.xp)
+            xp_next_surf = self.surface_cache.text(self.font_small, f"Next Lvl XP: {xp_to_next}", (255, 255, 255))
+            hud_rects.append(self.screen.blit(xp_next_surf, (10, 100)))
+
+            # Draw the game over screen if the game is over
+            if self.game_over:
+                self.draw_game_over_screen()
+
+            # Draw the profiler overlay on top of everything else
+            if self.profiler.enabled and self.profiler_overlay is not None:
+                hud_rects.append(self.profiler_overlay.draw(self.screen, self.profiler, self.startup_info()))
+
+            if renderer is not None:
+                for rect in hud_rects:
+                    renderer.mark(rect)
+                renderer.present()  # Update only the parts of the screen that changed
+            else:
+                pygame.display.flip()  # Update the screen with all the drawn elements
 
     def pick_random_upgrades(self, num):
         """
@@ -225,36 +741,68 @@ class Game:
             {"name": "Extra Side Bullets", "desc": "+2 side bullets"},
             {"name": "Spray Bullet",   "desc": "+2 spray bullets"},
             {"name": "Shorter Cooldown", "desc": "Shoot more frequently"},
+            {"name": "Coin Magnet", "desc": "Pull in coins from afar"},
         ]
-        return random.sample(possible_upgrades, k=num)
+        return self.rng.sample(possible_upgrades, k=num)
 
     def spawn_enemies(self):
         """
-        Spawn enemies at random positions on the screen.
+        Spawn enemies at random positions on the screen edges.
+        Each wave is planned in one go and released a few enemies per tick.
         """
         self.enemy_spawn_timer += 3
         if self.enemy_spawn_timer >= self.enemy_spawn_interval:
             self.enemy_spawn_timer = 0
+            room = self.entity_budget.room("enemies", len(self.enemies) + len(self.spawner))
+            if room == 0:
+                self.entity_budget.stats["throttled"] += 1  # At the enemy cap: skip this wave
+            else:
+                # Waves shrink while frames are over budget (adaptive mode)
+                count = self.entity_budget.wave_size(self.enemies_per_spawn)
+                if room is not None:
+                    count = min(count, room)
+                self.spawner.queue_wave(count, tuple(self.assets["enemies"]))
+
+        if self.spawner.pending:
+            left, top = self.camera.offset()  # Spawn around the part of the world that is in view
+            room = self.entity_budget.room("enemies", len(self.enemies))
+            self.enemies.extend(self.spawner.spawn(self.create_enemy, left, top, room))
+
+    def create_enemy(self, x, y, enemy_type):
+        """
+        Create an enemy, backed by the enemy pool if it is enabled
+        (otherwise a recycled Enemy object is reused when one is free).
+
+        Returns:
+        - The new Enemy (or PooledEnemy view).
+        """
+        animations = self.assets["enemies"][enemy_type]
+        mirrored = self.assets["enemies_mirrored"][enemy_type]
+        self.enemy_grid_stale = True
+        if self.enemy_pool is not None:
+            return self.enemy_pool.spawn(x, y, enemy_type, animations, mirrored)
+        return self.enemy_recycler.acquire(x, y, enemy_type, animations, mirrored)
+
+    def remove_enemies(self, dead):
+        """
+        Remove a set of enemies from the game in a single pass.
 
-            for _ in range(self.enemies_per_spawn):
-                # Spawn enemies at one of the screen edges (top, bottom, left, right)
-                side = random.choice(["top", "bottom", "left", "right"])
-                if side == "top":
-                    x = random.randint(0, app.WIDTH)
-                    y = -app.SPAWN_MARGIN
-                elif side == "bottom":
-                    x = random.randint(0, app.WIDTH)
-                    y = app.HEIGHT + app.SPAWN_MARGIN
-                elif side == "left":
-                    x = -app.SPAWN_MARGIN
-                    y = random.randint(0, app.HEIGHT)
-                else:
-                    x = app.WIDTH + app.SPAWN_MARGIN
-                    y = random.randint(0, app.HEIGHT)
-
-                enemy_type = random.choice(list(self.assets["enemies"].keys()))  # Random enemy type
-                enemy = Enemy(x, y, enemy_type, self.assets["enemies"][enemy_type])
-                self.enemies.append(enemy)
+        Arguments:
+        - dead: A set of enemies to remove.
+        """
+        release = self.enemy_pool.release if self.enemy_pool is not None else self.enemy_recycler.release
+        if not dead:
+            return
+        self.enemy_grid_stale = True
+        survivors = []
+        # Release in list order, not set order: the pool's slot order (and so a replay) must not
+        # depend on object ids
+        for enemy in self.enemies:
+            if enemy in dead:
+                release(enemy)
+            else:
+                survivors.append(enemy)
+        self.enemies[:] = survivors
 
     def increase_enemy_spawn_rate(self):
         """Increase the rate at which enemies spawn."""
@@ -272,9 +820,10 @@ class Game:
         """
         Check if the player collides with any enemies and apply damage.
         """
+        player_rect = self.player.rect
         collided = False
-        for enemy in self.enemies:
-            if enemy.rect.colliderect(self.player.rect):
+        for enemy in self.enemy_grid.query(player_rect):  # Only enemies near the player
+            if enemy.rect.colliderect(player_rect):
                 collided = True
                 break
 
@@ -288,13 +837,21 @@ class Game:
         """
         Draw the level-up menu where the player chooses an upgrade.
         """
-        overlay = pygame.Surface((app.WIDTH, app.HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Darken the screen with a transparent overlay
-        self.screen.blit(overlay, (0, 0))
+        # The menu only changes when the options do, so its layout is built once and cached
+        key = ("upgrade_menu",) + tuple((u["name"], u["desc"]) for u in self.upgrade_options)
+        layers = self.surface_cache.get(key, self.compose_upgrade_menu)
+        self.screen.blits(layers, doreturn=False)
+
+    def compose_upgrade_menu(self):
+        """
+        Build the level-up menu as a list of (surface, position) pairs ready for Surface.blits.
+        """
+        # Darken the screen with a transparent overlay
+        layers = [(self.surface_cache.overlay((app.WIDTH, app.HEIGHT), (0, 0, 0, 180)), (0, 0))]
 
         title_surf = self.font_large.render("Choose an Upgrade!", True, (255, 255, 0))
         title_rect = title_surf.get_rect(center=(app.WIDTH // 2, app.HEIGHT // 3 - 50))
-        self.screen.blit(title_surf, title_rect)
+        layers.append((title_surf, title_rect))
 
         # Draw upgrade options
         for i, upgrade in enumerate(self.upgrade_options):
@@ -302,53 +859,115 @@ class Game:
             option_surf = self.font_small.render(text_str, True, (255, 255, 255))
             line_y = app.HEIGHT // 3 + i * 40
             option_rect = option_surf.get_rect(center=(app.WIDTH // 2, line_y))
-            self.screen.blit(option_surf, option_rect)
+            layers.append((option_surf, option_rect))
+        return layers
+
+    def enemy_index(self):
+        """
+        Return the enemy grid, rebuilt first if enemies were added or removed since update() built it.
+
+        Between ticks enemies don't move, so the grid only goes out of date when
+        enemies spawn or die.
+        """
+        if self.enemy_grid_stale:
+            self.enemy_grid.rebuild(self.enemies)
+            self.enemy_grid_stale = False
+        return self.enemy_grid
 
     def find_nearest_enemy(self):
         """
         Find and return the nearest enemy to the player.
+        Only the grid cells around the player are searched.
         
         Returns:
         - The nearest enemy object or None if no enemies exist.
         """
         if not self.enemies:
             return None
-        nearest = None
-        min_dist = float('inf')
-        px, py = self.player.x, self.player.y
-        for enemy in self.enemies:
-            dist = math.sqrt((enemy.x - px)**2 + (enemy.y - py)**2)
-            if dist < min_dist:
-                min_dist = dist
-                nearest = enemy
-        return nearest
+        return self.enemy_index().nearest(self.player.x, self.player.y)
+
+    def find_nearest_enemies(self, k, max_distance=None):
+        """
+        Find the k enemies nearest to the player.
+        
+        Returns:
+        - A list of up to k enemies, nearest first.
+        """
+        if not self.enemies:
+            return []
+        return self.enemy_index().k_nearest(self.player.x, self.player.y, k, max_distance)
+
+    def find_bullet_enemy_hits(self):
+        """
+        Find which bullets hit which enemies this tick using the enemy grid.
+
+        Each enemy can only be hit once: the first bullet (in firing order)
+        that overlaps it claims it, exactly like a full nested scan would.
+        A bullet stops looking for enemies once it has used up its pierce count.
+
+        Returns:
+        - A list of (bullet, enemy) pairs in the order they were hit.
+        """
+        hits = []
+        hit_enemies = set()
+        grid = self.enemy_grid
+        if self.player.bullet_array is not None:
+            candidates = self.player.bullet_array.with_pierce()
+        else:
+            candidates = [(bullet, bullet.pierce) for bullet in self.player.bullets]
+        for bullet, remaining in candidates:
+            bullet_rect = bullet.rect
+            for enemy in grid.query(bullet_rect):  # Only enemies sharing a cell with the bullet
+                if enemy not in hit_enemies and bullet_rect.colliderect(enemy.rect):
+                    hit_enemies.add(enemy)
+                    hits.append((bullet, enemy))
+                    remaining -= 1
+                    if remaining <= 0:
+                        break
+        return hits
 
     def check_bullet_enemy_collisions(self):
         """
         Check if any player's bullets collide with enemies.
-        If so, destroy the enemy and drop a coin.
+        If so, destroy the enemy, drop a coin and use up one of the bullet's pierces
+        (bullets with none left are removed).
         """
-        for bullet in self.player.bullets[:]:  # Iterate over a copy of the list
-            for enemy in self.enemies[:]:  # Iterate over a copy of the list
-                if bullet.rect.colliderect(enemy.rect):
-                    new_coin = Coin(enemy.x, enemy.y)
-                    self.coins.append(new_coin)
-                    if enemy in self.enemies:
-                        self.enemies.remove(enemy)
+        hits = self.find_bullet_enemy_hits()
+        if not hits:
+            return
+
+        dead = set()
+        for bullet, enemy in hits:
+            self.coins.drop(enemy.x, enemy.y)  # Joins a coin already lying close by, if any
+            dead.add(enemy)
+            bullet.pierce -= 1
+
+        # Remove all destroyed enemies and spent bullets in a single pass each
+        self.remove_enemies(dead)
+        self.player.sweep_bullets()
 
     def check_player_coin_collisions(self):
         """
-        Check if the player collects any coins.
+        Pull coins towards the player if they have the Coin Magnet, then check if
+        the player collects any coins. Only coins near the player are looked at.
         """
-        coins_collected = []
-        for coin in self.coins:
-            if coin.rect.colliderect(self.player.rect):
-                coins_collected.append(coin)
-                self.player.add_xp(1)  # Increase XP for collecting coins
-
-        for c in coins_collected:
-            if c in self.coins:
-                self.coins.remove(c)
+        player = self.player
+        coins = self.coins
+        if player.pickup_radius > 0:
+            px, py = player.x, player.y
+            for coin in coins.query_radius(px, py, player.pickup_radius):
+                dx = px - coin.x
+                dy = py - coin.y
+                dist = math.sqrt(dx * dx + dy * dy)
+                if dist > 0:
+                    step = min(app.MAGNET_SPEED, dist) / dist
+                    coins.move(coin, coin.x + dx * step, coin.y + dy * step)
+
+        player_rect = player.rect
+        for coin in coins.query_rect(player_rect, MAX_COIN_SIZE // 2 + 1):
+            if coin.rect.colliderect(player_rect):
+                coins.remove(coin)  # Swap-remove, no list rebuild
+                player.add_xp(coin.value)  # Increase XP for collecting coins (merged coins are worth more)
 
     def check_for_level_up(self):
         """
@@ -356,27 +975,38 @@ class Game:
         """
         xp_needed = self.player.level * self.player.level * 5
         if self.player.xp >= xp_needed:
-            self.player.level += 1
+            self.raise_level()
             self.in_level_up_menu = True
             self.upgrade_options = self.pick_random_upgrades(3)
-            self.enemies_per_spawn += 5  # Increase enemy spawns per level
+
+    def raise_level(self):
+        """Move the player up a level and make the enemy waves grow with it."""
+        self.player.level += 1
+        self.enemies_per_spawn += self.balance["enemies_per_level"]  # Increase enemy spawns per level
 
     def draw_game_over_screen(self):
         """
         Draw the game over screen when the player loses.
         """
-        overlay = pygame.Surface((app.WIDTH, app.HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Darken the screen
-        self.screen.blit(overlay, (0, 0))
+        layers = self.surface_cache.get(("game_over_screen",), self.compose_game_over_screen)
+        self.screen.blits(layers, doreturn=False)
+
+    def compose_game_over_screen(self):
+        """
+        Build the game over screen as a list of (surface, position) pairs ready for Surface.blits.
+        """
+        # Darken the screen
+        layers = [(self.surface_cache.overlay((app.WIDTH, app.HEIGHT), (0, 0, 0, 180)), (0, 0))]
 
         game_over_surf = self.font_large.render("GAME OVER", True, (255, 0, 0))
         game_over_rect = game_over_surf.get_rect(center=(app.WIDTH // 2, app.HEIGHT // 2 - 50))
-        self.screen.blit(game_over_surf, game_over_rect)
+        layers.append((game_over_surf, game_over_rect))
 
         restart_surf = self.font_small.render("Press R to Restart", True, (255, 255, 255))
         restart_rect = restart_surf.get_rect(center=(app.WIDTH // 2, app.HEIGHT // 2 + 20))
-        self.screen.blit(restart_surf, restart_rect)
+        layers.append((restart_surf, restart_rect))
 
         quit_surf = self.font_small.render("Press ESC to Quit", True, (255, 255, 255))
         quit_rect = quit_surf.get_rect(center=(app.WIDTH // 2, app.HEIGHT // 2 + 60))
-        self.screen.blit(quit_surf, quit_rect)
+        layers.append((quit_surf, quit_rect))
+        return layers
@@ -0,0 +1,146 @@
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import pygame
+
+import app
+import atlas
+
+# Animations the game can't start without; everything else arrives while it runs
+ESSENTIAL_GROUPS = ("player_idle", "player_run", "floor", "orc")
+
+MUSIC_PATH = os.path.join("assets", "intense-black-metal-instrumental-304729.mp3")
+
+
+def read_file(path):
+    """Return the contents of a file as bytes."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+class StagedLoader:
+    """
+    Loads the game's images and music in stages so a loading screen can be shown right away.
+
+    Reading and decoding files happens on a thread pool. Converting images for the
+    display has to happen on the main thread, so the game calls poll() every
+    frame and finished animations are added to the assets dictionary as they
+    arrive. The music is only read once request_music() is called.
+    """
+
+    def __init__(self, folder="assets", use_atlas=app.USE_ASSET_ATLAS, workers=app.LOADER_THREADS):
+        self.folder = folder
+        self.use_atlas = use_atlas
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="loader")
+        self.assets = app.new_assets()  # Filled in as animations finish loading
+        self.pending = {}  # Animation name -> Future with its decoded data
+        self.total = 0  # Number of animations being loaded
+        self.atlas_index = None
+        self.atlas_frames = None  # Sliced atlas (all animations arrive together)
+        self.music = None  # Future with the music file's bytes, once requested
+
+    def start(self):
+        """Queue every image on the thread pool (returns immediately)."""
+        manifest = app.asset_manifest()
+        self.total = len(manifest)
+        if self.use_atlas:
+            # One job reads (and if needed rebuilds) the whole atlas
+            job = self.executor.submit(self.read_atlas)
+            for name in manifest:
+                self.pending[name] = job
+        else:
+            for name in manifest:
+                self.pending[name] = self.executor.submit(self.decode_group, name)
+
+    def decode_group(self, name):
+        """Worker thread: decode and scale every frame of one animation."""
+        prefix, count, scale_factor = app.asset_manifest()[name]
+        paths = [os.path.join(self.folder, f"{prefix}_{i}.png") for i in range(count)]
+        return [atlas.decode_image(path, scale_factor) for path in paths]
+
+    def read_atlas(self):
+        """
+        Worker thread: return the atlas pixels, building the atlas first if it is stale.
+        If the atlas can't be written, decode the PNGs instead and return them by animation name.
+        """
+        try:
+            index = atlas.read_index(self.folder)
+            if index is None:
+                atlas.build_atlas(self.folder)
+                index = atlas.read_index(self.folder)
+            if index is not None:
+                self.atlas_index = index
+                return atlas.read_pixels(self.folder)
+        except OSError:
+            pass
+        return {name: self.decode_group(name) for name in app.asset_manifest()}
+
+    def convert_group(self, name, images):
+        """Main thread: convert decoded frames to the display's pixel format."""
+        if name == "floor":
+            return [tile.convert() for tile in images]  # Floor tiles are opaque
+        return [img.convert_alpha() for img in images]
+
+    def finish(self, name, result):
+        """Main thread: convert a decoded animation and add it to the assets."""
+        if self.use_atlas:
+            if self.atlas_frames is None:
+                if isinstance(result, dict):  # The atlas couldn't be built, these are plain PNGs
+                    self.atlas_frames = {n: self.convert_group(n, imgs) for n, imgs in result.items()}
+                else:
+                    self.atlas_frames = atlas.slice_atlas(self.atlas_index, result)
+            frames = self.atlas_frames[name]
+        else:
+            frames = self.convert_group(name, result)
+        app.add_frames(self.assets, name, frames)
+        del self.pending[name]
+
+    def poll(self):
+        """
+        Finish everything whose background work is done (call once per frame).
+
+        Returns:
+        - True once the essential animations are loaded.
+        """
+        for name, future in list(self.pending.items()):
+            if future.done():
+                self.finish(name, future.result())
+
+        if self.music is not None and self.music.done():
+            data = self.music.result()
+            self.music = None
+            pygame.mixer.music.load(io.BytesIO(data), "mp3")
+            pygame.mixer.music.play(-1)  # Play music in a loop
+        return self.ready()
+
+    def wait(self, timeout):
+        """Block until some pending job finishes or the timeout (in seconds) passes."""
+        if self.pending:
+            wait(set(self.pending.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+
+    def require(self, name):
+        """Load an animation right now if it hasn't arrived yet (blocks until it has)."""
+        if name in self.pending:
+            self.finish(name, self.pending[name].result())
+
+    def request_music(self):
+        """Start reading the music file in the background; it plays as soon as it's ready."""
+        if self.music is None and pygame.mixer.get_init():
+            self.music = self.executor.submit(read_file, MUSIC_PATH)
+
+    def ready(self, names=ESSENTIAL_GROUPS):
+        """Return True if all the named animations are loaded."""
+        return not any(name in self.pending for name in names)
+
+    def done(self):
+        """Return True once every image and the music have been loaded."""
+        return not self.pending and self.music is None
+
+    def progress(self):
+        """Return the fraction of animations loaded so far (0.0 to 1.0)."""
+        return 1.0 - len(self.pending) / self.total if self.total else 1.0
+
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.executor.shutdown(wait=False)
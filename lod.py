@@ -0,0 +1,63 @@
+from bisect import bisect_left
+
+import app
+
+
+class LODScheduler:
+    """
+    Level of detail for enemy updates.
+
+    Enemies are sorted into distance bands around the player. Each band has an
+    update interval: an enemy in a band with interval n gets a full update
+    (re-aim at the player, knockback and animation) once every n ticks and is
+    only moved along its last velocity on the ticks in between. Full updates
+    are staggered by a phase each enemy is given the first time it is
+    scheduled, so a far-away crowd doesn't all update on the same tick (and
+    enemies dying doesn't shift anyone else's turn). Knocked back enemies always get a
+    full update so their knockback ends on time.
+
+    The EnemyPool doesn't use this: its vectorized step() updates every enemy
+    for less than it would cost to work out which ones to skip.
+    """
+
+    def __init__(self, bands=app.LOD_BANDS):
+        """
+        Arguments:
+        - bands: (max distance, update interval) pairs. The last band catches
+          every enemy beyond the others, whatever its distance says.
+        """
+        bands = sorted(bands)
+        self.limits = [limit for limit, _ in bands[:-1]] + [float("inf")]
+        self.intervals = [interval for _, interval in bands]
+        self.tier_counts = [0] * len(bands)  # Enemies in each band on the last scheduled tick
+        self.next_phase = 0  # Phase for the next enemy seen without one
+
+    def update(self, enemies, player, tick):
+        """
+        Update a list of Enemy objects for this tick, giving each one a full update
+        or an extrapolated one depending on its band.
+
+        An enemy's band is worked out from the distance its last full update
+        measured (enemy.player_distance) and kept on the enemy (enemy.lod_tier),
+        so skipped ticks don't measure anything.
+        """
+        limits = self.limits
+        intervals = self.intervals
+        counts = [0] * len(intervals)
+        for enemy in enemies:
+            phase = enemy.lod_phase
+            if phase is None:
+                phase = enemy.lod_phase = self.next_phase
+                self.next_phase += 1
+            tier = enemy.lod_tier
+            if enemy.knockback or (tick + phase) % intervals[tier] == 0:
+                enemy.update(player)
+                tier = enemy.lod_tier = bisect_left(limits, enemy.player_distance)
+            else:
+                enemy.extrapolate()
+            counts[tier] += 1
+        self.tier_counts = counts
+
+    def counts(self):
+        """Return the number of enemies per band, keyed "lod0", "lod1", ... for the profiler."""
+        return {f"lod{i}": count for i, count in enumerate(self.tier_counts)}
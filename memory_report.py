@@ -0,0 +1,137 @@
+"""
+Memory report: how many bytes each kind of entity costs.
+
+For every entity type, a headless game creates --count of them while
+tracemalloc is running, and the difference between a snapshot taken before
+and one taken after is split over the entities. The lines that allocated the
+most are listed too, which shows where the bytes go (instance dictionaries,
+rects, per-object copies of shared data).
+
+This is why Enemy, Bullet, Coin and Player declare __slots__ rather than
+carrying a per-object __dict__ (there can be thousands of them), and why the
+data every entity of a type shares lives in a type table (EnemyType,
+BulletType) that the entity only points to.
+
+Usage:
+    python memory_report.py                     # 5000 of each entity type
+    python memory_report.py --count 20000 --top 5 --output memory.json
+    python memory_report.py --baseline old.json # compare with an earlier run (before/after)
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+from bullet import Bullet
+from bullet_array import BulletArray
+from coin import Coin
+from enemy import Enemy
+from enemy_pool import EnemyPool
+from game import Game
+from player import Player
+
+
+def measure(create, count, top=3):
+    """
+    Create count objects with create(i) and measure the memory they hold.
+
+    Returns:
+    - A dictionary with the bytes per object and the source lines that allocated
+      the most, as (file:line, bytes per object) pairs.
+    """
+    kept = [None] * count  # Allocated up front so the list itself isn't counted
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for i in range(count):
+        kept[i] = create(i)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    total = sum(stat.size_diff for stat in stats)
+    lines = [
+        (f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}", stat.size_diff / count)
+        for stat in sorted(stats, key=lambda stat: stat.size_diff, reverse=True)[:top]
+        if stat.size_diff > 0
+    ]
+    del kept
+    return {"bytes_per_object": total / count, "top_lines": lines}
+
+
+def entity_factories(game):
+    """Return functions that each create one entity of a type, by type name."""
+    enemy_type = next(iter(game.assets["enemies"]))
+    animations = game.assets["enemies"][enemy_type]
+    mirrored = game.assets["enemies_mirrored"][enemy_type]
+    factories = {
+        "Enemy": lambda i: Enemy(i, i, enemy_type, animations, mirrored),
+        "Bullet": lambda i: Bullet(i, i, 1.0, 1.0, 10, (0, 0, 255)),
+        "Coin": lambda i: Coin(i, i),
+        "Player": lambda i: Player(i, i, game.assets, game),
+    }
+    try:
+        pool = EnemyPool(capacity=1)
+        bullet_array = BulletArray(capacity=1)
+    except ImportError:  # No NumPy: only the plain objects can be measured
+        return factories
+
+    def array_bullet(i):
+        bullet_array.spawn(i, i, 1.0, 1.0, 10, (0, 0, 255))
+        return bullet_array.views[-1]
+
+    factories["PooledEnemy"] = lambda i: pool.spawn(i, i, enemy_type, animations, mirrored)
+    factories["ArrayBullet"] = array_bullet
+    return factories
+
+
+def report(count=5000, top=3):
+    """
+    Measure every entity type.
+
+    Returns:
+    - A dictionary mapping each type name to its measure() result.
+    """
+    game = Game(headless=True, seed=1, replay_path=None)
+    results = {}
+    for name, create in entity_factories(game).items():
+        # Players are heavyweight and there is only ever one, so fewer of them are enough
+        results[name] = measure(create, count if name != "Player" else max(1, count // 50), top)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report the memory used per entity, with tracemalloc.")
+    parser.add_argument("--count", type=int, default=5000, help="Entities of each type to create.")
+    parser.add_argument("--top", type=int, default=3, help="Allocating source lines to list per type.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Results file of an earlier run to compare against.")
+    args = parser.parse_args(argv)
+
+    results = report(args.count, args.top)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"{'':12s} {'before':>8s} {'after':>8s} {'change':>8s}  (bytes per entity)")
+    for name, result in results.items():
+        after = result["bytes_per_object"]
+        if name in baseline:
+            before = baseline[name]["bytes_per_object"]
+            print(f"{name:12s} {before:8.0f} {after:8.0f} {(after - before) / before:+8.0%}")
+        else:
+            print(f"{name:12s} {after:8.0f} bytes each")
+        for line, size in result["top_lines"]:
+            print(f"    {line:28s} {size:8.0f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
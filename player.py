@@ -1,22 +1,35 @@
-import pygame
 import math
-from bullet import Bullet
+from bullet import Bullet, BulletPool
+from bullet_array import BulletArray
+from render_queue import LAYER_PLAYER, LAYER_BULLETS
+from controls import MOVE_LEFT, MOVE_RIGHT, MOVE_UP, MOVE_DOWN
 import app
 
 class Player:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "speed", "xp", "level", "health", "pickup_radius",
+                 "animations", "mirrored_animations", "state", "frame_index", "animation_timer",
+                 "animation_speed", "image", "mirrored_image", "rect", "facing_left", "bullet_speed",
+                 "bullet_size", "homing_bullet_count", "homing_side_bullet_count", "spray_bullet_count",
+                 "shoot_cooldown", "shoot_timer", "spray_timer", "spray_interval", "bullet_pierce",
+                 "bullet_pool", "bullet_array", "bullets", "selecting_power_up", "game")
+
     def __init__(self, x, y, assets, game):
         # Initialise the player with starting position (x, y) and necessary assets
         self.x = x
         self.y = y
+        self.prev_x = x  # Position before the last tick (for interpolated drawing)
+        self.prev_y = y
         self.speed = app.PLAYER_SPEED  # Speed of the player
 
         # Player's experience points, level, and health
         self.xp = 0
         self.level = 1
         self.health = 5
+        self.pickup_radius = 0  # Coins within this distance fly to the player (Coin Magnet upgrade)
         
-        # Load player animations (idle and running)
+        # Load player animations (idle and running) and their left-facing copies
         self.animations = assets["player"]
+        self.mirrored_animations = assets["player_mirrored"]
         self.state = "idle"  # Initial state of the player is 'idle'
         self.frame_index = 0  # Frame index for animation
         self.animation_timer = 0  # Timer to control animation speed
@@ -24,6 +37,7 @@ class Player:
 
         # Set up the player's initial image and rectangle for collision detection
         self.image = self.animations[self.state][self.frame_index]
+        self.mirrored_image = self.mirrored_animations[self.state][self.frame_index]  # Drawn when facing left
         self.rect = self.image.get_rect(center=(self.x, self.y))
         self.facing_left = False  # To track the player's facing direction
 
@@ -37,7 +51,12 @@ class Player:
         self.shoot_timer = 0
         self.spray_timer = 1
         self.spray_interval = 60  # 3 seconds at 60 FPS
-        self.bullets = []  # List to hold all bullets shot by the player
+        self.bullet_pierce = app.BULLET_PIERCE  # Enemies each bullet can hit before it disappears
+        self.bullet_pool = BulletPool()  # Recycles bullets once they leave the screen
+        # Optional NumPy storage that moves, culls and draws every bullet in a few array operations
+        self.bullet_array = BulletArray() if game.use_bullet_array else None
+        # List to hold all bullets shot by the player (the array's views when it is used)
+        self.bullets = self.bullet_array.views if self.bullet_array is not None else []
 
         # Flag to track if the player is selecting a power-up
         self.selecting_power_up = False
@@ -48,19 +67,20 @@ class Player:
         if self.game.paused or self.game.in_level_up_menu:
             return  # If the game is paused or in level-up menu, don't process inputs
 
-        keys = pygame.key.get_pressed()  # Get the currently pressed keys
+        # Movement keys held this tick (read by Game.handle_events, or from a replay)
+        movement = self.game.movement
 
         # Initialize velocity
         vel_x, vel_y = 0, 0
 
         # Check for movement inputs (arrow keys or WASD)
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+        if movement & MOVE_LEFT:
             vel_x -= self.speed  # Move left
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+        if movement & MOVE_RIGHT:
             vel_x += self.speed  # Move right
-        if keys[pygame.K_UP] or keys[pygame.K_w]:
+        if movement & MOVE_UP:
             vel_y -= self.speed  # Move up
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        if movement & MOVE_DOWN:
             vel_y += self.speed  # Move down
 
         # Update player's position
@@ -68,8 +88,10 @@ class Player:
         self.y += vel_y
 
         # Ensure the player doesn't move outside the screen boundaries
-        self.x = max(0, min(self.x, app.WIDTH))
-        self.y = max(0, min(self.y, app.HEIGHT))
+        # (a chunked world has no edges, so the player can walk anywhere)
+        if self.game.world is None:
+            self.x = max(0, min(self.x, app.WIDTH))
+            self.y = max(0, min(self.y, app.HEIGHT))
         self.rect.center = (self.x, self.y)
 
         # Change player state to "run" if moving, otherwise "idle"
@@ -90,12 +112,12 @@ class Player:
             return  # If game is paused or in level-up menu, skip updates
 
         # Update all bullets
-        for bullet in self.bullets:
-            bullet.update()
-
-            # Remove bullets that are off the screen
-            if bullet.off_screen(app.WIDTH, app.HEIGHT):
-                self.bullets.remove(bullet)
+        if self.bullet_array is not None:
+            self.bullet_array.step()  # One array add per axis for every bullet
+        else:
+            for bullet in self.bullets:
+                bullet.update()
+        self.sweep_bullets()  # Remove bullets that are off the screen or spent
 
         # Animate the player (change the frame based on the animation speed)
         self.animation_timer += 1
@@ -104,6 +126,7 @@ class Player:
             frames = self.animations[self.state]
             self.frame_index = (self.frame_index + 1) % len(frames)
             self.image = frames[self.frame_index]
+            self.mirrored_image = self.mirrored_animations[self.state][self.frame_index]
             center = self.rect.center
             self.rect = self.image.get_rect()
             self.rect.center = center
@@ -117,17 +140,63 @@ class Player:
             self.shoot_spray_bullets()
             self.spray_timer = 0
 
-    def draw(self, surface):
-        # Draw the player image on the screen
-        if self.facing_left:
-            flipped_img = pygame.transform.flip(self.image, True, False)
-            surface.blit(flipped_img, self.rect)
-        else:
-            surface.blit(self.image, self.rect)
+    def sweep_bullets(self):
+        # Remove every bullet that is off the screen, out of lifetime or out of hits
+        # in one compacting pass (removing from a list while looping over it skips bullets)
+        left, top = self.game.camera.offset()
+        if self.bullet_array is not None:
+            self.bullet_array.sweep(left, top)  # One mask over every bullet
+            self.bullet_array.sync_rects()
+            return
+        release = self.bullet_pool.release
+        live = []
+        for bullet in self.bullets:
+            if bullet.spent() or bullet.off_screen(app.WIDTH, app.HEIGHT, left, top):
+                release(bullet)
+            else:
+                live.append(bullet)
+        if len(live) != len(self.bullets):
+            self.bullets[:] = live  # Keep the same list object (other code holds on to it)
+
+    def current_image(self):
+        # The animation frame to draw, facing the way the player last moved
+        # (the left-facing image was flipped once at load time)
+        return self.mirrored_image if self.facing_left else self.image
+
+    def draw(self, surface, offset=(0, 0)):
+        # Draw the player image on the screen (offset is the camera position)
+        surface.blit(self.current_image(), (self.rect.x - offset[0], self.rect.y - offset[1]))
 
         # Draw all bullets
-        for bullet in self.bullets:
-            bullet.draw(surface)
+        if self.bullet_array is not None:
+            self.bullet_array.draw(surface, offset, self.game.render_alpha)  # A single Surface.blits call
+        else:
+            for bullet in self.bullets:
+                bullet.draw(surface, offset)
+
+    def submit(self, queue, offset=(0, 0)):
+        # Queue the player and all bullets for batched drawing (see render_queue.py)
+        queue.blit(self.current_image(), (self.rect.x - offset[0], self.rect.y - offset[1]), LAYER_PLAYER)
+        if self.bullet_array is not None:
+            self.bullet_array.submit(queue, offset, LAYER_BULLETS, self.game.render_alpha)
+        else:
+            Bullet.submit_all(queue, self.bullets, offset, LAYER_BULLETS)
+
+    def add_bullet(self, x, y, vx, vy, color=(255, 0, 0)):
+        # Add a single bullet with the player's current bullet size and pierce
+        if self.bullet_array is not None:
+            self.bullet_array.spawn(x, y, vx, vy, self.bullet_size, color, pierce=self.bullet_pierce)
+        else:
+            self.bullets.append(self.bullet_pool.acquire(x, y, vx, vy, self.bullet_size, color, pierce=self.bullet_pierce))
+
+    def discard_oldest_bullets(self, count):
+        # Remove the count bullets that were fired first (used by the entity budget)
+        if self.bullet_array is not None:
+            self.bullet_array.discard_oldest(count)
+        else:
+            for bullet in self.bullets[:count]:
+                self.bullet_pool.release(bullet)
+            del self.bullets[:count]
 
     def take_damage(self, amount):
         # Reduce player's health when taking damage
@@ -148,45 +217,75 @@ class Player:
         vx = (dx / dist) * self.bullet_speed
         vy = (dy / dist) * self.bullet_speed
 
+        base = math.atan2(vy, vx)
+        side_angles = self.side_bullet_angles(base)
+        if self.bullet_array is not None:
+            # The homing bullets and every pair of side bullets as one fan
+            angles = [base] * self.homing_bullet_count + side_angles
+            self.bullet_array.spawn_fan(self.x, self.y, angles, self.bullet_speed, self.bullet_size,
+                                        (0, 0, 255), pierce=self.bullet_pierce)
+            self.shoot_timer = 0
+            return
+
         # Shoot homing bullets
         for _ in range(self.homing_bullet_count):
-            bullet = Bullet(self.x, self.y, vx, vy, self.bullet_size, color=(0, 0, 255))  # Blue bullets for homing
+            bullet = self.bullet_pool.acquire(self.x, self.y, vx, vy, self.bullet_size, color=(0, 0, 255), pierce=self.bullet_pierce)  # Blue bullets for homing
             self.bullets.append(bullet)
 
         # Shoot side bullets
-        angle_offset = math.radians(15)
-        for i in range(1, self.homing_side_bullet_count + 1):
-            # Create side bullets at an angle to the main bullet's trajectory
-            angle_left = math.atan2(vy, vx) - i * angle_offset
-            angle_right = math.atan2(vy, vx) + i * angle_offset
+        for angle_left, angle_right in zip(side_angles[::2], side_angles[1::2]):
             vx_left = math.cos(angle_left) * self.bullet_speed
             vy_left = math.sin(angle_left) * self.bullet_speed
             vx_right = math.cos(angle_right) * self.bullet_speed
             vy_right = math.sin(angle_right) * self.bullet_speed
-            bullet_left = Bullet(self.x, self.y, vx_left, vy_left, self.bullet_size, color=(0, 0, 255))  # Blue for side bullets
-            bullet_right = Bullet(self.x, self.y, vx_right, vy_right, self.bullet_size, color=(0, 0, 255))  # Blue for side bullets
+            bullet_left = self.bullet_pool.acquire(self.x, self.y, vx_left, vy_left, self.bullet_size, color=(0, 0, 255), pierce=self.bullet_pierce)  # Blue for side bullets
+            bullet_right = self.bullet_pool.acquire(self.x, self.y, vx_right, vy_right, self.bullet_size, color=(0, 0, 255), pierce=self.bullet_pierce)  # Blue for side bullets
             self.bullets.append(bullet_left)
             self.bullets.append(bullet_right)
 
         # Reset shoot timer
         self.shoot_timer = 0
 
+    def side_bullet_angles(self, base):
+        # Directions (radians) of the side bullets for a shot fired at angle base, as
+        # [left 1, right 1, left 2, right 2, ...]. Side bullets fan out 15 degrees apart;
+        # with app.SIDE_BULLET_AIM each one turns towards the nearest enemy inside its
+        # own 15 degree cone instead (found with the enemy grid, not a full scan)
+        angle_offset = math.radians(15)
+        angles = []
+        for i in range(1, self.homing_side_bullet_count + 1):
+            angles += [base - i * angle_offset, base + i * angle_offset]
+        if app.SIDE_BULLET_AIM and angles and self.game.enemies:
+            grid = self.game.enemy_index()
+            for n, angle in enumerate(angles):
+                target = grid.nearest_in_cone(self.x, self.y, angle, angle_offset / 2, app.SIDE_BULLET_AIM_RANGE)
+                if target is not None:
+                    angles[n] = math.atan2(target.y - self.y, target.x - self.x)
+        return angles
+
     def shoot_spray_bullets(self):
         # Shoot bullets in a spray pattern
         angle_offset = math.radians(360 / self.spray_bullet_count)
         base_angle = 0
 
+        if self.bullet_array is not None:
+            angles = [base_angle + i * angle_offset for i in range(self.spray_bullet_count)]
+            self.bullet_array.spawn_fan(self.x, self.y, angles, self.bullet_speed, self.bullet_size,
+                                        (255, 0, 0), pierce=self.bullet_pierce)
+            return
+
         for i in range(self.spray_bullet_count):
             angle = base_angle + i * angle_offset
             final_vx = math.cos(angle) * self.bullet_speed
             final_vy = math.sin(angle) * self.bullet_speed
-            bullet = Bullet(self.x, self.y, final_vx, final_vy, self.bullet_size, color=(255, 0, 0))  # Red bullets for spray
+            bullet = self.bullet_pool.acquire(self.x, self.y, final_vx, final_vy, self.bullet_size, color=(255, 0, 0), pierce=self.bullet_pierce)  # Red bullets for spray
             self.bullets.append(bullet)
 
     def shoot_toward_mouse(self, pos):
-        # Shoot toward the mouse position
+        # Shoot toward the mouse position (converted from screen to world coordinates)
         mx, my = pos
-        self.shoot_toward_position(mx, my)
+        ox, oy = self.game.camera.offset()
+        self.shoot_toward_position(mx + ox, my + oy)
 
     def shoot_toward_enemy(self, enemy):
         # Shoot toward an enemy's position
@@ -0,0 +1,280 @@
+import json
+import math
+import os
+import time
+from collections import deque
+
+import pygame
+
+import app
+
+# Phase timing the wait for the next frame (clock.tick) rather than any work
+IDLE_PHASE = "idle"
+
+
+def work_time(frame):
+    """Return the seconds a recorded frame spent working (its total without the idle wait)."""
+    return frame["total"] - frame["phases"].get(IDLE_PHASE, 0.0)
+
+
+class _Phase:
+    """Context manager that times one phase and reports it to its profiler."""
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class _NullPhase:
+    """Context manager that does nothing (used while profiling is off)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfiler:
+    """
+    Stand-in profiler used when profiling is disabled.
+    Every method is a no-op so instrumented code costs next to nothing.
+    """
+
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self, counts=None):
+        pass
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def record(self, name, start, duration):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class FrameProfiler:
+    """
+    Records how long each named phase of a frame takes.
+
+    Wrap work in `with profiler.phase("name"):` between begin_frame() and
+    end_frame(). The last `history` frames are kept, each as a dictionary with:
+    - "start": perf_counter() time the frame began.
+    - "total": Length of the whole frame in seconds.
+    - "phases": Seconds spent per phase name (repeated phases are summed).
+    - "spans": (name, start, duration) for every phase, in order.
+    - "counts": Optional entity counts passed to end_frame().
+    """
+
+    enabled = True
+
+    def __init__(self, history=app.PROFILER_HISTORY):
+        self.frames = deque(maxlen=history)
+        self.frame_start = None
+        self.phases = {}
+        self.spans = []
+
+    def begin_frame(self):
+        """Start timing a new frame."""
+        self.frame_start = time.perf_counter()
+        self.phases = {}
+        self.spans = []
+
+    def end_frame(self, counts=None):
+        """
+        Finish the current frame and add it to the history.
+
+        Arguments:
+        - counts: Optional dictionary of entity counts to store with the frame.
+        """
+        if self.frame_start is None:
+            return
+        self.frames.append({
+            "start": self.frame_start,
+            "total": time.perf_counter() - self.frame_start,
+            "phases": self.phases,
+            "spans": self.spans,
+            "counts": counts or {},
+        })
+        self.frame_start = None
+
+    def phase(self, name):
+        """Return a context manager that times the named phase."""
+        return _Phase(self, name)
+
+    def record(self, name, start, duration):
+        """Add a timed phase to the current frame."""
+        self.phases[name] = self.phases.get(name, 0.0) + duration
+        self.spans.append((name, start, duration))
+
+    def samples(self, name):
+        """
+        Return the recorded durations (in seconds) of a phase, one per frame.
+        Use the name "frame" for whole-frame times.
+        """
+        if name == "frame":
+            return [frame["total"] for frame in self.frames]
+        return [frame["phases"].get(name, 0.0) for frame in self.frames]
+
+    def phase_names(self):
+        """Return every phase name seen in the history, in first-seen order."""
+        names = {}
+        for frame in self.frames:
+            for name in frame["phases"]:
+                names.setdefault(name, None)
+        return list(names)
+
+    def write_chrome_trace(self, path, last_n=None):
+        """
+        Write the recorded frames as a Chrome trace (open it in chrome://tracing
+        or https://ui.perfetto.dev).
+
+        Arguments:
+        - path: File to write the JSON trace to.
+        - last_n: Only export the most recent last_n frames (default: all kept frames).
+        """
+        frames = list(self.frames)
+        if last_n is not None:
+            frames = frames[-last_n:]
+        origin = frames[0]["start"] if frames else 0.0
+
+        def micros(seconds):
+            return round((seconds - origin) * 1_000_000, 3)
+
+        events = []
+        for number, frame in enumerate(frames):
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": micros(frame["start"]), "dur": round(frame["total"] * 1_000_000, 3),
+                           "args": {"frame": number}})
+            for name, start, duration in frame["spans"]:
+                events.append({"name": name, "ph": "X", "pid": 1, "tid": 1,
+                               "ts": micros(start), "dur": round(duration * 1_000_000, 3)})
+            if frame["counts"]:
+                events.append({"name": "entities", "ph": "C", "pid": 1,
+                               "ts": micros(frame["start"]), "args": frame["counts"]})
+
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+class ProfilerOverlay:
+    """
+    On-screen panel showing what the profiler recorded: a rolling graph of each
+    frame's work time (without the idle wait for the next frame) against the
+    frame budget, the average time of each phase (idle included), and the
+    entity counts of the last frame.
+    """
+
+    WIDTH = 280
+    GRAPH_HEIGHT = 60
+    GRAPH_FRAMES = 120  # Frames shown in the rolling graph
+    AVERAGE_FRAMES = 30  # Frames averaged for the phase bars
+    LINE_HEIGHT = 12
+    COLORS = [(255, 99, 71), (135, 206, 250), (144, 238, 144), (255, 215, 0),
+              (221, 160, 221), (255, 165, 0), (64, 224, 208), (240, 128, 128),
+              (176, 196, 222), (189, 183, 107)]
+
+    def __init__(self):
+        font_path = os.path.join("assets", "PressStart2P.ttf")
+        self.font = pygame.font.Font(font_path, 8)
+        self.budget = 1.0 / app.FPS  # Seconds available per frame
+        self.panel = None  # Translucent background, created once per panel height
+        self.colors = {}  # Phase name -> bar color (stable between frames)
+
+    def text(self, surface, string, pos, color=(255, 255, 255)):
+        surface.blit(self.font.render(string, False, color), pos)
+
+    def draw(self, surface, profiler, info=None, pos=(app.WIDTH - 290, 10)):
+        """
+        Draw the overlay onto a surface.
+
+        Arguments:
+        - surface: Surface to draw on.
+        - profiler: The FrameProfiler whose frames are shown.
+        - info: Optional dictionary of extra label -> text lines (e.g. startup times).
+
+        Returns:
+        - The rect covered by the overlay.
+        """
+        frames = list(profiler.frames)
+        names = profiler.phase_names()
+        counts = frames[-1]["counts"] if frames else {}  # Entity counts from the last finished frame
+        info = info or {}
+        # Title and graph, a line per phase, count and info line, and the gaps around them
+        lines = len(names) + len(counts) + len(info)
+        height = 36 + self.GRAPH_HEIGHT + lines * self.LINE_HEIGHT
+        if self.panel is None or self.panel.get_height() != height:
+            self.panel = pygame.Surface((self.WIDTH, height), pygame.SRCALPHA)
+            self.panel.fill((0, 0, 0, 190))
+        x, y = pos
+        surface.blit(self.panel, pos)
+
+        # Rolling frame time graph, scaled so the budget line sits halfway up
+        recent = frames[-self.GRAPH_FRAMES:]
+        # Work time, not the whole frame: waiting for vsync isn't an overrun (it has its own line below)
+        work = [work_time(frame) for frame in recent]
+        latest = work[-1] * 1000 if work else 0.0
+        self.text(surface, f"work {latest:5.2f} ms  budget {self.budget * 1000:.1f} ms", (x + 6, y + 6))
+        graph_top = y + 20
+        graph_bottom = graph_top + self.GRAPH_HEIGHT
+        bar_w = (self.WIDTH - 12) / self.GRAPH_FRAMES
+        for i, seconds in enumerate(work):
+            h = min(self.GRAPH_HEIGHT, int(seconds / (2 * self.budget) * self.GRAPH_HEIGHT))
+            color = (90, 200, 90) if seconds <= self.budget else (220, 60, 60)
+            surface.fill(color, (x + 6 + int(i * bar_w), graph_bottom - h, max(1, int(bar_w)), h))
+        budget_y = graph_bottom - self.GRAPH_HEIGHT // 2
+        pygame.draw.line(surface, (255, 255, 0), (x + 6, budget_y), (x + self.WIDTH - 6, budget_y))
+
+        # Average time per phase over the last few frames, as bars of the budget
+        line_y = graph_bottom + 8
+        window = frames[-self.AVERAGE_FRAMES:]
+        bar_x = x + 192  # Bars start after the label and the millisecond column
+        bar_max = self.WIDTH - 198
+        for name in names:
+            average = sum(frame["phases"].get(name, 0.0) for frame in window) / max(1, len(window))
+            color = self.colors.setdefault(name, self.COLORS[len(self.colors) % len(self.COLORS)])
+            label = name.replace("check_", "").replace("_collisions", "")[:16]
+            self.text(surface, f"{label:16s}{average * 1000:6.2f}", (x + 6, line_y), color)
+            w = min(bar_max, int(average / self.budget * bar_max))
+            surface.fill(color, (bar_x, line_y, max(1, w), 8))
+            line_y += self.LINE_HEIGHT
+
+        # Entity counts and extra info
+        line_y += 4
+        for name, count in counts.items():
+            self.text(surface, f"{name}: {count}", (x + 6, line_y))
+            line_y += self.LINE_HEIGHT
+        for label, value in info.items():
+            self.text(surface, f"{label}: {value}", (x + 6, line_y))
+            line_y += self.LINE_HEIGHT
+
+        return pygame.Rect(x, y, self.WIDTH, height)
+
+
+def percentile(values, pct):
+    """
+    Return the pct-th percentile (0-100) of a list of numbers using the
+    nearest-rank method, or 0.0 for an empty list.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
@@ -0,0 +1,90 @@
+import app
+
+# Draw order of the game's sprites (lower layers are drawn first)
+LAYER_COINS = 0
+LAYER_PLAYER = 1
+LAYER_BULLETS = 2
+LAYER_ENEMIES = 3
+
+
+class RenderQueue:
+    """
+    Collects everything that has to be drawn this frame and draws it in batches.
+
+    Entities submit sprites (an image and a screen position) or solid-colour
+    rectangles to a layer instead of drawing themselves. flush() then goes
+    through the layers from lowest to highest and hands each run of sprites
+    to a single Surface.blits call; rectangles are drawn with Surface.fill,
+    so solid sprites (bullets, coins) don't need a surface at all.
+
+    Within a layer, entries are drawn in the order they were submitted.
+    """
+
+    BLIT = 0
+    FILL = 1
+
+    def __init__(self, fill_primitives=app.RENDER_FILL_PRIMITIVES):
+        self.fill_primitives = fill_primitives  # Draw solid sprites with fill() instead of blitting
+        self.layers = {}  # Layer -> list of [kind, entries] runs
+        self.submitted = 0  # Entries queued since the last flush
+
+    def __len__(self):
+        return self.submitted
+
+    def _run(self, layer, kind):
+        """Return the entry list that new entries of this kind go into."""
+        runs = self.layers.get(layer)
+        if runs is None:
+            runs = self.layers[layer] = []
+        if not runs or runs[-1][0] != kind:
+            runs.append([kind, []])
+        return runs[-1][1]
+
+    def blit(self, image, pos, layer=0):
+        """Queue an image to be drawn with its top-left corner at pos (screen coordinates)."""
+        self._run(layer, self.BLIT).append((image, pos))
+        self.submitted += 1
+
+    def blit_many(self, entries, layer=0):
+        """Queue a list of (image, pos) pairs."""
+        self._run(layer, self.BLIT).extend(entries)
+        self.submitted += len(entries)
+
+    def fill(self, color, rect, layer=0):
+        """Queue a solid rectangle, given as a Rect or an (x, y, w, h) tuple in screen coordinates."""
+        self._run(layer, self.FILL).append((color, rect))
+        self.submitted += 1
+
+    def fill_many(self, entries, layer=0):
+        """Queue a list of (color, rect) pairs."""
+        self._run(layer, self.FILL).extend(entries)
+        self.submitted += len(entries)
+
+    def clear(self):
+        """Drop everything queued without drawing it."""
+        self.layers.clear()
+        self.submitted = 0
+
+    def flush(self, surface):
+        """
+        Draw everything queued onto surface, lowest layer first, and empty the queue.
+
+        Returns:
+        - The number of draw calls made (one per sprite run plus one per rectangle).
+        """
+        calls = 0
+        for layer in sorted(self.layers):
+            for kind, entries in self.layers[layer]:
+                if kind == self.BLIT:
+                    surface.blits(entries, doreturn=False)
+                    calls += 1
+                else:
+                    # Surface.fill doesn't shrink rects that hang off the top or left
+                    # edge (it just moves them onto the surface), so clip them first
+                    fill = surface.fill
+                    clip = surface.get_rect().clip
+                    for color, rect in entries:
+                        fill(color, clip(rect))
+                    calls += len(entries)
+        self.clear()
+        return calls
@@ -0,0 +1,341 @@
+"""
+Recording and playback of a run's input, for reproducing reported slowdowns.
+
+A recording holds the game's seed and settings, then every tick's input: the
+movement keys held and the actions pressed (see controls.py). It also holds the
+few things that depend on the machine rather than the player: the adaptive
+spawn scale and which enemy types had finished loading. Given those, a
+headless Game driven by the recording repeats the run exactly, as fast as it
+can go.
+
+File layout (little-endian):
+    header:  b"SHRP", version (u8), seed (u64), settings length (u16), settings (JSON)
+    chunks:  first tick (u32), tick count (u16), data length (u32), zlib-compressed ticks
+
+Each tick is one byte of flags (movement bits, EVENTS, STATE_HASH), then an
+8-byte state hash if STATE_HASH is set, then a count and the events if EVENTS
+is set. Chunks are appended as they fill up, so a recording can be streamed,
+and if the game crashes only the last few seconds are lost.
+
+Usage:
+    python replay.py run.rpl            # play back at full speed, checking state hashes
+    python replay.py run.rpl --profile  # also report per-phase timings
+"""
+import argparse
+import hashlib
+import json
+import struct
+import sys
+import time
+import zlib
+from array import array
+
+import app
+
+MAGIC = b"SHRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQH")
+CHUNK_HEADER = struct.Struct("<IHI")
+
+# Tick flags (the low four bits are the controls.MOVE_* bits)
+EVENTS = 0x10
+STATE_HASH = 0x20
+
+# Events besides the controls actions (which use codes 1-7)
+SPAWN_SCALE = 16  # The adaptive spawn scale changed (payload: f64)
+ENEMY_TYPES = 17  # The enemy types that can spawn changed (payload: count, then length-prefixed names)
+
+
+def state_hash(game):
+    """Return a 64-bit hash of the parts of the game state a divergence would show up in."""
+    h = hashlib.blake2b(digest_size=8)
+    player = game.player
+    h.update(struct.pack("<qdddqq", game.tick_count, player.x, player.y, player.health, player.xp, player.level))
+    h.update(array("d", [v for enemy in game.enemies for v in (enemy.x, enemy.y)]).tobytes())
+    h.update(struct.pack("<qq", len(player.bullets), len(game.coins)))
+    h.update(array("q", game.rng.getstate()[1]).tobytes())
+    return int.from_bytes(h.digest(), "little")
+
+
+def game_settings(game):
+    """Return the Game settings that change how the simulation runs (stored in the header)."""
+    return {
+        "use_enemy_pool": game.enemy_pool is not None,
+        "chunked_world": game.world is not None,
+        "lod": game.lod is not None,
+        "flow_field": game.flow_field is not None,
+        "entity_caps": {kind: list(cap) for kind, cap in game.entity_budget.caps.items()},
+        "use_bullet_array": game.use_bullet_array,
+        "auto_upgrade": game.auto_upgrade,
+        "balance": game.balance,
+    }
+
+
+class ReplayWriter:
+    """
+    Appends a game's per-tick input to a recording (Game.handle_events calls record()).
+    """
+
+    def __init__(self, path, game, chunk_ticks=app.REPLAY_CHUNK_TICKS, hash_interval=app.REPLAY_HASH_INTERVAL):
+        if game.seed is None:
+            raise ValueError("Recording a replay needs the game's seed (don't pass rng=)")
+        self.file = open(path, "wb")
+        settings = json.dumps(game_settings(game)).encode()
+        self.file.write(HEADER.pack(MAGIC, VERSION, game.seed, len(settings)) + settings)
+        self.chunk_ticks = chunk_ticks
+        self.hash_interval = hash_interval
+        self.buffer = bytearray()  # Ticks of the chunk being filled
+        self.chunk_start = None  # First tick of that chunk
+        self.chunk_count = 0
+        self.spawn_scale = 1.0  # Last recorded values of the machine-dependent state
+        self.enemy_types = None
+        self.ticks = 0  # Ticks recorded so far
+
+    def record(self, game, movement, actions):
+        """Record the input for the tick the game is about to run."""
+        if self.chunk_start is None:
+            self.chunk_start = game.tick_count
+
+        events = bytearray()
+        count = len(actions)
+        scale = game.entity_budget.spawn_scale
+        if scale != self.spawn_scale:
+            self.spawn_scale = scale
+            events += struct.pack("<Bd", SPAWN_SCALE, scale)
+            count += 1
+        enemy_types = tuple(game.assets["enemies"])
+        if enemy_types != self.enemy_types:
+            self.enemy_types = enemy_types
+            events += bytes((ENEMY_TYPES, len(enemy_types)))
+            for name in enemy_types:
+                encoded = name.encode()
+                events.append(len(encoded))
+                events += encoded
+            count += 1
+        events += bytes(actions)
+
+        flags = movement
+        buffer = self.buffer
+        checkpoint = game.tick_count % self.hash_interval == 0
+        if checkpoint:
+            flags |= STATE_HASH
+        if events:
+            flags |= EVENTS
+        buffer.append(flags)
+        if checkpoint:
+            buffer += state_hash(game).to_bytes(8, "little")
+        if events:
+            buffer.append(count)
+            buffer += events
+
+        self.chunk_count += 1
+        self.ticks += 1
+        if self.chunk_count >= self.chunk_ticks:
+            self.flush()
+
+    def flush(self):
+        """Write the ticks recorded so far as a chunk."""
+        if not self.chunk_count:
+            return
+        data = zlib.compress(bytes(self.buffer))
+        self.file.write(CHUNK_HEADER.pack(self.chunk_start, self.chunk_count, len(data)) + data)
+        self.file.flush()
+        self.buffer.clear()
+        self.chunk_start = None
+        self.chunk_count = 0
+
+    def close(self):
+        """Write the last chunk and close the file."""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class ReplayReader:
+    """
+    Reads a recording one chunk at a time.
+
+    A chunk cut short (the game crashed while writing it) ends the recording.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        magic, version, self.seed, settings_length = HEADER.unpack(self.file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay")
+        self.settings = json.loads(self.file.read(settings_length))
+
+    def ticks(self):
+        """
+        Yield every recorded tick in order.
+
+        Yields:
+        - A tuple (movement bits, state hash or None, list of events). Actions are
+          plain codes; SPAWN_SCALE and ENEMY_TYPES events are (code, value) tuples.
+        """
+        read = self.file.read
+        while True:
+            header = read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                return
+            _, count, length = CHUNK_HEADER.unpack(header)
+            data = read(length)
+            if len(data) < length:
+                return
+            data = zlib.decompress(data)
+            pos = 0
+            for _ in range(count):
+                flags = data[pos]
+                pos += 1
+                expected = None
+                if flags & STATE_HASH:
+                    expected = int.from_bytes(data[pos:pos + 8], "little")
+                    pos += 8
+                events = []
+                if flags & EVENTS:
+                    n = data[pos]
+                    pos += 1
+                    for _ in range(n):
+                        code = data[pos]
+                        pos += 1
+                        if code == SPAWN_SCALE:
+                            events.append((code, struct.unpack_from("<d", data, pos)[0]))
+                            pos += 8
+                        elif code == ENEMY_TYPES:
+                            names = []
+                            n_names = data[pos]
+                            pos += 1
+                            for _ in range(n_names):
+                                size = data[pos]
+                                names.append(data[pos + 1:pos + 1 + size].decode())
+                                pos += 1 + size
+                            events.append((code, names))
+                        else:
+                            events.append(code)
+                yield flags & 0x0F, expected, events
+
+    def close(self):
+        self.file.close()
+
+
+class ReplayInput:
+    """
+    Feeds a recording to a game in place of the keyboard (set as game.input_source).
+
+    Each tick it restores the recorded machine-dependent state, compares the
+    game's state hash with the recorded one, and hands back the tick's input.
+    """
+
+    def __init__(self, reader, game):
+        self.records = reader.ticks()
+        self.next_record = next(self.records, None)
+        self.all_enemy_types = dict(game.assets["enemies"])  # Every type, so the recorded set can be picked from it
+        self.hashes_checked = 0
+        self.divergences = []  # (tick, recorded hash, replayed hash) for every mismatch
+
+    @property
+    def finished(self):
+        return self.next_record is None
+
+    def next_tick(self, game):
+        """
+        Return the recorded input for the tick the game is about to run.
+
+        Returns:
+        - A tuple (movement bits, list of actions), like Game.read_input().
+        """
+        if self.next_record is None:
+            return 0, []  # Past the end of the recording: no input
+        movement, expected, events = self.next_record
+        self.next_record = next(self.records, None)
+
+        if expected is not None:
+            self.hashes_checked += 1
+            actual = state_hash(game)
+            if actual != expected:
+                self.divergences.append((game.tick_count, expected, actual))
+
+        actions = []
+        for event in events:
+            if isinstance(event, tuple):
+                code, value = event
+                if code == SPAWN_SCALE:
+                    game.entity_budget.spawn_scale = value
+                else:
+                    game.assets["enemies"] = {name: self.all_enemy_types[name] for name in value}
+            else:
+                actions.append(event)
+        return movement, actions
+
+
+def play(path, stop_on_divergence=True, profile=False):
+    """
+    Play a recording back in a headless game as fast as possible.
+
+    Arguments:
+    - stop_on_divergence: Stop at the first state hash that doesn't match.
+    - profile: Time every phase of every tick with a FrameProfiler.
+
+    Returns:
+    - A dictionary with the ticks played, the time taken, the hashes checked,
+      the first divergence (or None) and, when profiling, the FrameProfiler.
+    """
+    from game import Game  # Imported here because game.py imports this module
+    from profiler import FrameProfiler
+
+    reader = ReplayReader(path)
+    settings = dict(reader.settings)
+    auto_upgrade = settings.pop("auto_upgrade", False)
+    settings["entity_caps"] = {kind: tuple(cap) for kind, cap in settings.get("entity_caps", {}).items()}
+    game = Game(headless=True, seed=reader.seed, replay_path=None, **settings)
+    game.auto_upgrade = auto_upgrade
+    replay = game.input_source = ReplayInput(reader, game)
+    if profile:
+        game.profiler = FrameProfiler(history=10**6)
+
+    start = time.perf_counter()
+    ticks = 0
+    while not replay.finished and game.running:
+        game.profiler.begin_frame()
+        game.tick()
+        game.profiler.end_frame()
+        ticks += 1
+        if replay.divergences and stop_on_divergence:
+            break
+    seconds = time.perf_counter() - start
+    reader.close()
+    return {
+        "ticks": ticks,
+        "seconds": seconds,
+        "ticks_per_second": ticks / seconds if seconds > 0 else 0.0,
+        "hashes_checked": replay.hashes_checked,
+        "divergence": replay.divergences[0] if replay.divergences else None,
+        "profiler": game.profiler if profile else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded run as fast as possible.")
+    parser.add_argument("path", help="Recording to play (written with app.REPLAY_PATH).")
+    parser.add_argument("--keep-going", action="store_true", help="Don't stop at the first divergence.")
+    parser.add_argument("--profile", action="store_true", help="Report per-phase tick timings.")
+    args = parser.parse_args(argv)
+
+    result = play(args.path, stop_on_divergence=not args.keep_going, profile=args.profile)
+    print(f"{result['ticks']} ticks in {result['seconds']:.2f} s ({result['ticks_per_second']:.0f} ticks/s), "
+          f"{result['hashes_checked']} state hashes checked")
+    if result["profiler"] is not None:
+        from profiler import percentile
+        profiler = result["profiler"]
+        for name in ["frame"] + profiler.phase_names():
+            samples = profiler.samples(name)
+            print(f"  {name:32s} " + "  ".join(f"p{p}={percentile(samples, p) * 1000:8.3f}ms" for p in (50, 95, 99)))
+    if result["divergence"] is not None:
+        tick, expected, actual = result["divergence"]
+        print(f"Diverged at tick {tick}: recorded state {expected:016x}, replayed {actual:016x}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import math
+
+import app
+
+class SpatialGrid:
+    """
+    Uniform grid broadphase used by the collision passes.
+
+    Every item is bucketed into each grid cell its rect overlaps, so a query
+    only has to look at the few items sharing cells with the query rect
+    instead of every item in the game.
+
+    It also answers nearest-neighbour queries (by the items' x, y centres),
+    searching outwards ring by ring so only the cells near the query point
+    are looked at.
+    """
+
+    def __init__(self, cell_size=app.COLLISION_CELL_SIZE):
+        self.cell_size = cell_size  # Width and height of a single grid cell in pixels
+        self.cells = {}  # Maps (cell_x, cell_y) to a list of item indices
+        self.items = []  # Items in insertion order (index is used for stable ordering)
+        self.bounds = None  # Range of occupied cells (worked out when a nearest query needs it)
+
+    def clear(self):
+        """Remove every item from the grid."""
+        self.cells.clear()
+        self.items.clear()
+        self.bounds = None
+
+    def cell_range(self, rect):
+        """
+        Return the inclusive range of cells covered by a rect.
+
+        Returns:
+        - A tuple (x0, y0, x1, y1) of cell coordinates.
+        """
+        size = self.cell_size
+        # Rect.right/bottom are exclusive, so the last covered pixel is one less
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, item, rect=None):
+        """
+        Add an item to the grid.
+
+        Arguments:
+        - item: The object to store (usually an entity with a rect).
+        - rect: The rect to bucket by (defaults to item.rect).
+        """
+        if rect is None:
+            rect = item.rect
+        index = len(self.items)
+        self.items.append(item)
+        self.bounds = None
+
+        x0, y0, x1, y1 = self.cell_range(rect)
+        cells = self.cells
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [index]
+                else:
+                    bucket.append(index)
+
+    def rebuild(self, items):
+        """Clear the grid and insert every item by its rect (done once per tick)."""
+        self.clear()
+        for item in items:
+            self.insert(item)
+
+    def query(self, rect):
+        """
+        Return the candidate items whose cells overlap a rect.
+
+        Candidates are de-duplicated and returned in insertion order, so callers
+        see the same ordering as a plain scan over the original list.
+        """
+        x0, y0, x1, y1 = self.cell_range(rect)
+        cells = self.cells
+
+        # Fast path: the query rect sits inside a single cell
+        if x0 == x1 and y0 == y1:
+            bucket = cells.get((x0, y0))
+            if not bucket:
+                return []
+            return [self.items[i] for i in bucket]
+
+        found = set()
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return [self.items[i] for i in sorted(found)]
+
+    def cell_bounds(self):
+        """Return the inclusive range (x0, y0, x1, y1) of cells holding at least one item."""
+        if self.bounds is None:
+            xs = [cx for cx, cy in self.cells]
+            ys = [cy for cx, cy in self.cells]
+            self.bounds = (min(xs), min(ys), max(xs), max(ys))
+        return self.bounds
+
+    def iter_nearest(self, x, y, max_distance=None):
+        """
+        Yield items in order of distance from (x, y), nearest first, without a full scan.
+
+        The search grows one ring of cells at a time. An item is only yielded
+        once no unvisited cell can hold anything closer, so asking for the
+        first few items only visits the cells around (x, y). Items at the same
+        distance come out in insertion order. The grid must not be rebuilt
+        while the generator is in use.
+
+        Arguments:
+        - x, y: The query point (world coordinates).
+        - max_distance: Ignore items further away than this (None searches everything).
+        """
+        if not self.items:
+            return
+        size = self.cell_size
+        cells = self.cells
+        items = self.items
+        limit_sq = math.inf if max_distance is None else max_distance * max_distance
+        bx0, by0, bx1, by1 = self.cell_bounds()
+        qx, qy = int(x // size), int(y // size)
+        # Rings before the first one that reaches an occupied cell are empty, and
+        # rings after the last one that does are never needed
+        ring = max(bx0 - qx, qx - bx1, by0 - qy, qy - by1, 0)
+        last_ring = max(qx - bx0, bx1 - qx, qy - by0, by1 - qy, 0)
+
+        heap = []  # (squared distance, insertion index) of items found but not yet yielded
+        seen = set()
+        while True:
+            # Visit the cells on this ring (the square of cells ring steps away)
+            if ring == 0:
+                ring_cells = [(qx, qy)]
+            else:
+                top, bottom = qy - ring, qy + ring
+                ring_cells = [(cx, top) for cx in range(qx - ring, qx + ring + 1)]
+                ring_cells += [(cx, bottom) for cx in range(qx - ring, qx + ring + 1)]
+                ring_cells += [(qx - ring, cy) for cy in range(top + 1, bottom)]
+                ring_cells += [(qx + ring, cy) for cy in range(top + 1, bottom)]
+            for cell in ring_cells:
+                bucket = cells.get(cell)
+                if not bucket:
+                    continue
+                for i in bucket:
+                    if i in seen:
+                        continue
+                    seen.add(i)
+                    item = items[i]
+                    dx = item.x - x
+                    dy = item.y - y
+                    dist_sq = dx * dx + dy * dy
+                    if dist_sq <= limit_sq:
+                        heapq.heappush(heap, (dist_sq, i))
+
+            if ring >= last_ring:
+                break  # Every occupied cell has been visited
+
+            # Nothing outside the visited square is closer than its nearest edge
+            # (less a pixel, since items are bucketed by their rounded rects)
+            clearance = min(x - (qx - ring) * size, (qx + ring + 1) * size - x,
+                            y - (qy - ring) * size, (qy + ring + 1) * size - y) - 1
+            if clearance > 0:
+                clear_sq = clearance * clearance
+                while heap and heap[0][0] <= clear_sq:
+                    yield items[heapq.heappop(heap)[1]]
+                if clear_sq >= limit_sq:
+                    break  # The rest of the grid is out of range
+            ring += 1
+
+        while heap:
+            yield items[heapq.heappop(heap)[1]]
+
+    def nearest(self, x, y, max_distance=None):
+        """Return the item closest to (x, y), or None if there isn't one (within max_distance)."""
+        return next(self.iter_nearest(x, y, max_distance), None)
+
+    def k_nearest(self, x, y, k, max_distance=None):
+        """Return up to k items closest to (x, y), nearest first."""
+        return list(itertools.islice(self.iter_nearest(x, y, max_distance), k))
+
+    def nearest_in_cone(self, x, y, angle, half_angle, max_distance=None):
+        """
+        Return the item closest to (x, y) inside a cone, or None.
+
+        Arguments:
+        - angle: Direction the cone points in (radians).
+        - half_angle: How far either side of that direction the cone reaches (radians).
+        """
+        ux, uy = math.cos(angle), math.sin(angle)
+        min_cos = math.cos(half_angle)
+        for item in self.iter_nearest(x, y, max_distance):
+            dx = item.x - x
+            dy = item.y - y
+            dist = math.sqrt(dx * dx + dy * dy)
+            if dist == 0 or dx * ux + dy * uy >= min_cos * dist:
+                return item
+        return None
@@ -0,0 +1,78 @@
+from collections import deque
+
+import app
+
+class SpawnScheduler:
+    """
+    Plans enemy waves ahead of time and releases them a few at a time.
+
+    queue_wave() rolls every position and enemy type for a wave in one batch
+    (using the game's RNG in the same order the old one-at-a-time spawner did).
+    spawn() then creates at most `budget` enemies per tick, so a big wave is
+    spread over several frames instead of landing in one.
+
+    Positions are stored relative to the top-left of the view, so enemies still
+    appear around the screen if the camera moves before they are released.
+    """
+
+    SIDES = ("top", "bottom", "left", "right")
+
+    def __init__(self, rng, budget=app.SPAWN_BUDGET):
+        self.rng = rng
+        self.budget = budget  # Maximum enemies created per tick
+        self.pending = deque()  # (x, y, enemy type) of enemies waiting to be spawned
+
+    def __len__(self):
+        return len(self.pending)
+
+    def queue_wave(self, count, enemy_types):
+        """
+        Roll the positions and types of a wave of enemies at the screen edges.
+
+        Arguments:
+        - count: Number of enemies in the wave.
+        - enemy_types: Sequence of enemy type names to pick from.
+        """
+        randrange = self.rng.randrange
+        sides = len(self.SIDES)
+        type_count = len(enemy_types)
+        width, height, margin = app.WIDTH, app.HEIGHT, app.SPAWN_MARGIN
+        wave = []
+        for _ in range(count):
+            side = randrange(sides)
+            if side == 0:  # Top
+                x, y = randrange(width + 1), -margin
+            elif side == 1:  # Bottom
+                x, y = randrange(width + 1), height + margin
+            elif side == 2:  # Left
+                x, y = -margin, randrange(height + 1)
+            else:  # Right
+                x, y = width + margin, randrange(height + 1)
+            wave.append((x, y, enemy_types[randrange(type_count)]))
+        self.pending.extend(wave)
+
+    def spawn(self, create, left=0, top=0, limit=None):
+        """
+        Create up to `budget` of the pending enemies.
+
+        Arguments:
+        - create: Function (x, y, enemy_type) -> enemy, e.g. Game.create_enemy.
+        - left, top: World position of the view's top-left corner.
+        - limit: Optional lower limit than the budget for this tick (e.g. room left under a cap).
+
+        Returns:
+        - A list of the enemies created this tick.
+        """
+        pending = self.pending
+        spawned = []
+        count = min(self.budget, len(pending))
+        if limit is not None:
+            count = min(count, limit)
+        for _ in range(count):
+            x, y, enemy_type = pending.popleft()
+            spawned.append(create(left + x, top + y, enemy_type))
+        return spawned
+
+    def clear(self):
+        """Drop every enemy that hasn't been spawned yet."""
+        self.pending.clear()
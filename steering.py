@@ -0,0 +1,244 @@
+"""
+Enemy steering: a flow field that gives every cell of the arena a path to the
+player, and a grid-based separation force that keeps crowds from stacking on
+top of each other.
+
+The flow field is worked out once per player cell, and enemies look their cell
+up in it, so steering costs the same per enemy however many there are. The
+separation force works on whole arrays of enemy positions at once (for the
+EnemyPool) and never looks at pairs of enemies.
+"""
+import math
+from collections import deque
+
+import app
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: the flow field works without it, separation needs it
+    np = None
+
+# Golden angle, used to spread enemies that sit exactly on top of each other
+GOLDEN_ANGLE = math.pi * (3 - math.sqrt(5))
+
+
+class FlowField:
+    """
+    Shortest 8-way paths to the player over the arena grid: the cells covering
+    the view plus a margin of cells around it (where enemies spawn).
+
+    A breadth-first search from the player's cell gives every cell the
+    neighbour its path continues to. Among equally short paths it keeps the one
+    closest to the straight line to the player, so in the open enemies still
+    come straight at the player rather than along the grid's diagonals. Each
+    cell then stores the point an enemy in it heads for: the centre of the cell
+    lookahead steps further along its path (which smooths out the steps
+    between cells). Enemies no more than lookahead steps from the player, or
+    outside the grid, head straight for the player.
+
+    The search only runs again when the player moves into another cell or the
+    grid moves with the camera.
+    """
+
+    def __init__(self, cell_size=app.FLOW_CELL_SIZE, margin=app.FLOW_FIELD_MARGIN, lookahead=app.FLOW_LOOKAHEAD):
+        """
+        Arguments:
+        - cell_size: Width and height of a cell in pixels.
+        - margin: Cells of grid beyond each edge of the view.
+        - lookahead: Steps along the path to the point an enemy heads for.
+        """
+        self.cell_size = cell_size
+        self.margin = margin
+        self.lookahead = lookahead
+        self.key = None  # (grid origin, columns, rows, player cell) the field was worked out for
+        self.origin = (0, 0)  # World cell of the grid's top-left cell
+        self.cols = 0
+        self.rows = 0
+        self.targets = []  # Per cell (row by row): the (x, y) to head for, or None for "the player"
+        self.target_x = self.target_y = None  # The same as NumPy arrays (NaN for None), for sample()
+        self.neighbours = []  # Per cell: the indices of the cells around it (for the grid size in use)
+        self.recomputes = 0  # Number of times the search has run
+
+    def cell(self, x, y):
+        """Return the (column, row) world cell containing a point."""
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def update(self, x, y, view):
+        """
+        Work the field out again for the player at (x, y) if they changed cell
+        or the view (a world-space rect) moved the grid.
+
+        Returns:
+        - True if the search ran.
+        """
+        size, margin = self.cell_size, self.margin
+        left, top = view.left // size - margin, view.top // size - margin
+        cols = (view.right - 1) // size + margin + 1 - left
+        rows = (view.bottom - 1) // size + margin + 1 - top
+        key = ((left, top), cols, rows, self.cell(x, y))
+        if key == self.key:
+            return False
+        self.key = key
+        self.recompute(*key)
+        return True
+
+    def grid_neighbours(self, cols, rows):
+        """Return the neighbour indices of every cell of a cols x rows grid."""
+        neighbours = []
+        for row in range(rows):
+            for col in range(cols):
+                neighbours.append([r * cols + c
+                                   for r in range(max(0, row - 1), min(rows, row + 2))
+                                   for c in range(max(0, col - 1), min(cols, col + 2))
+                                   if r != row or c != col])
+        return neighbours
+
+    def recompute(self, origin, cols, rows, player_cell):
+        """Run the search from the player's cell and store where each cell heads for."""
+        self.recomputes += 1
+        if (cols, rows) != (self.cols, self.rows):
+            self.neighbours = self.grid_neighbours(cols, rows)
+        self.origin, self.cols, self.rows = origin, cols, rows
+        count = cols * rows
+        pc, pr = player_cell[0] - origin[0], player_cell[1] - origin[1]
+        if not (0 <= pc < cols and 0 <= pr < rows):
+            # The player is off the grid: everything heads straight for them
+            self.targets = [None] * count
+            self.target_x = self.target_y = None
+            return
+
+        # Offsets from the player's cell, for keeping paths near the straight line
+        off_x = [i % cols - pc for i in range(count)]
+        off_y = [i // cols - pr for i in range(count)]
+        start = pr * cols + pc
+        distance = [-1] * count
+        parent = [start] * count
+        distance[start] = 0
+        queue = deque([start])
+        neighbours = self.neighbours
+        while queue:
+            cell = queue.popleft()
+            step = distance[cell] + 1
+            cx, cy = off_x[cell], off_y[cell]
+            for other in neighbours[cell]:
+                if distance[other] < 0:
+                    distance[other] = step
+                    parent[other] = cell
+                    queue.append(other)
+                elif distance[other] == step:
+                    # Another way just as short: keep the one nearer the line from this cell to the player
+                    ox, oy = off_x[other], off_y[other]
+                    best = parent[other]
+                    if abs(cx * oy - cy * ox) < abs(off_x[best] * oy - off_y[best] * ox):
+                        parent[other] = cell
+
+        ahead = parent
+        for _ in range(self.lookahead - 1):
+            ahead = [parent[cell] for cell in ahead]
+        size = self.cell_size
+        left, top = origin
+        lookahead = self.lookahead
+        self.targets = [
+            None if distance[cell] <= lookahead else
+            ((left + ahead[cell] % cols + 0.5) * size, (top + ahead[cell] // cols + 0.5) * size)
+            for cell in range(count)
+        ]
+        if np is not None:
+            self.target_x = np.array([t[0] if t else np.nan for t in self.targets])
+            self.target_y = np.array([t[1] if t else np.nan for t in self.targets])
+
+    def target(self, x, y):
+        """Return the (x, y) an enemy at a position should head for, or None to head for the player."""
+        size = self.cell_size
+        col = int(x // size) - self.origin[0]
+        row = int(y // size) - self.origin[1]
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return self.targets[row * self.cols + col]
+        return None
+
+    def sample(self, x, y):
+        """
+        Look up the points to head for for arrays of positions (needs NumPy).
+
+        Returns:
+        - A tuple (steer, target_x, target_y) of arrays: which positions follow
+          the field, and the point to head for for those.
+        """
+        n = len(x)
+        if self.target_x is None:
+            return np.zeros(n, dtype=bool), np.zeros(n), np.zeros(n)
+        col = np.floor(x / self.cell_size).astype(np.int64) - self.origin[0]
+        row = np.floor(y / self.cell_size).astype(np.int64) - self.origin[1]
+        inside = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)
+        index = np.where(inside, row * self.cols + col, 0)
+        target_x = self.target_x[index]
+        target_y = self.target_y[index]
+        return inside & ~np.isnan(target_x), target_x, target_y
+
+
+def separation(x, y, ids, center_x, center_y, cell_size=app.SEPARATION_CELL_SIZE, reach=app.SEPARATION_RANGE):
+    """
+    Work out a push for every enemy that moves crowded enemies apart.
+
+    Enemies are counted into grid cells. Each one that shares its cell is
+    pushed away from the average position of the others in it, and every
+    one is pushed away from the side where the neighbouring cells are more
+    crowded. That takes a few passes over the enemy arrays and the grid, and
+    never visits pairs of enemies.
+
+    Arguments:
+    - x, y: Arrays of enemy positions.
+    - ids: Array of a stable number per enemy (its spawn number), which decides the
+      direction enemies exactly on top of each other are pushed in.
+    - center_x, center_y: The player's position; enemies further than reach from
+      it (off-screen, where stacking can't be seen) get no push.
+    - cell_size: Grid cell size in pixels (about the size of an enemy).
+
+    Returns:
+    - A tuple (push_x, push_y) of arrays. A push of length 1 means "move away at
+      full speed"; the caller scales it and limits the resulting speed.
+    """
+    n = len(x)
+    push_x = np.zeros(n)
+    push_y = np.zeros(n)
+    near = (np.abs(x - center_x) < reach) & (np.abs(y - center_y) < reach)
+    if np.count_nonzero(near) < 2:
+        return push_x, push_y
+    slots = np.flatnonzero(near)
+    ex = x[near]
+    ey = y[near]
+
+    # Cell of every enemy on a grid just big enough for them (plus a border for the neighbour lookups)
+    col = np.floor(ex / cell_size).astype(np.int64)
+    row = np.floor(ey / cell_size).astype(np.int64)
+    col -= col.min() - 1
+    row -= row.min() - 1
+    cols = int(col.max()) + 2
+    rows = int(row.max()) + 2
+    index = row * cols + col
+    counts = np.bincount(index, minlength=rows * cols)
+    sum_x = np.bincount(index, weights=ex, minlength=rows * cols)
+    sum_y = np.bincount(index, weights=ey, minlength=rows * cols)
+
+    # A full push away from the average position of the others in the same cell
+    count = counts[index]
+    others = np.maximum(count - 1, 1)
+    away_x = ex - (sum_x[index] - ex) / others
+    away_y = ey - (sum_y[index] - ey) / others
+    length = np.hypot(away_x, away_y)
+    crowded = count > 1
+    away_x = np.divide(away_x, length, out=np.zeros_like(away_x), where=crowded & (length > 0))
+    away_y = np.divide(away_y, length, out=np.zeros_like(away_y), where=crowded & (length > 0))
+    # Enemies exactly on top of each other get a fixed, different direction each
+    stacked = crowded & (length == 0)
+    if stacked.any():
+        angle = ids[near][stacked] * GOLDEN_ANGLE
+        away_x[stacked] = np.cos(angle)
+        away_y[stacked] = np.sin(angle)
+
+    # Plus a push away from the side where the neighbouring cells are more crowded,
+    # growing with the difference in enemy count (the "pressure" that keeps a crowd
+    # converging on the player from packing ever tighter). The border keeps the lookups on the grid.
+    push_x[slots] = away_x + (counts[index - 1] - counts[index + 1])
+    push_y[slots] = away_y + (counts[index - cols] - counts[index + cols])
+    return push_x, push_y
@@ -0,0 +1,58 @@
+from collections import OrderedDict
+
+import pygame
+import app
+
+class SurfaceCache:
+    """
+    Least-recently-used cache for surfaces that are expensive to make every frame,
+    such as rendered text and translucent full-screen overlays.
+
+    A surface is only created the first time its key is asked for; when the cache
+    is full the surface that hasn't been used for the longest time is dropped.
+    """
+
+    def __init__(self, max_entries=app.SURFACE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, create):
+        """
+        Return the cached value for key, calling create() to make it on a miss.
+
+        Arguments:
+        - key: Any hashable value describing what is being cached.
+        - create: A function with no arguments that builds the value.
+        """
+        entries = self.entries
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)  # Mark as most recently used
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = create()
+        entries[key] = value
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)  # Evict the least recently used entry
+        return value
+
+    def text(self, font, text, color, antialias=True):
+        """Return the rendered surface for a string, rendering it only if it isn't cached."""
+        return self.get(("text", font, text, color, antialias),
+                        lambda: font.render(text, antialias, color))
+
+    def overlay(self, size, color):
+        """Return a translucent surface of the given size filled with an RGBA color."""
+        def create():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(color)
+            return surface
+        return self.get(("overlay", size, color), create)
+
+    def clear(self):
+        """Drop every cached surface."""
+        self.entries.clear()
@@ -0,0 +1,393 @@
+"""
+Batch runner for balance and load sweeps.
+
+Plays thousands of headless games, each driven by a bot (see bots.py), across a
+pool of worker processes (one per core by default). Every combination of the
+balance values given with --set (see app.BALANCE) is played by every bot
+--repeats times, each run with its own seed, for at most --max-ticks ticks.
+
+Results are streamed to a column store as runs finish: a directory with a
+columns.json describing the sweep and one append-only file of packed values
+per column (see ColumnStore), readable with load_columns() or numpy.fromfile.
+Running the same command again resumes an interrupted sweep, skipping the
+runs that already have a result.
+
+Usage:
+    python sweep.py --set enemies_per_spawn=1,2,4 --set cooldown_factor=0.7,0.8,0.9 --repeats 50
+    python sweep.py --bot kite --bot random --max-ticks 36000 --output sweeps/waves
+    python sweep.py --output sweeps/waves --summary   # print the results of a sweep so far
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import sys
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: without it load_columns returns array.array columns
+    np = None
+
+import app
+from bots import BOTS
+from game import Game
+from profiler import percentile
+
+# Columns written for every run, besides one per swept balance value: (name, array typecode)
+RESULT_COLUMNS = [
+    ("run_id", "q"),
+    ("seed", "q"),
+    ("bot", "B"),  # Index into the sweep's list of bots
+    ("ticks", "q"),  # Ticks survived (max_ticks if the player was still alive)
+    ("died", "B"),
+    ("level", "q"),
+    ("xp", "q"),
+    ("peak_enemies", "q"),
+    ("peak_bullets", "q"),
+    ("peak_coins", "q"),
+    ("tick_ms_mean", "d"),  # Time per tick (including drawing with --draw)
+    ("tick_ms_p95", "d"),
+    ("tick_ms_max", "d"),
+    ("seconds", "d"),  # Wall time of the whole run
+]
+
+
+class ColumnStore:
+    """
+    An append-only table kept as one file of packed values per column.
+
+    Every appended row is written to each column file and flushed, so rows can
+    be read while the sweep is still going and survive it being killed. A row
+    cut short by a crash (written to some columns but not all) is dropped when
+    the store is opened again.
+    """
+
+    def __init__(self, path, columns, meta):
+        """
+        Open the store at path, creating it if it doesn't exist.
+
+        Arguments:
+        - columns: List of (name, array typecode) pairs.
+        - meta: JSON-serializable description of what is stored; opening an
+          existing store with a different description raises ValueError.
+        """
+        self.path = path
+        self.columns = columns
+        meta = json.loads(json.dumps(meta))  # Tuples become lists, as they would when read back
+        schema_path = os.path.join(path, "columns.json")
+        if os.path.exists(schema_path):
+            with open(schema_path) as f:
+                schema = json.load(f)
+            if schema["meta"] != meta or [tuple(column) for column in schema["columns"]] != list(columns):
+                raise ValueError(f"{path} holds a different sweep; use another output directory")
+        else:
+            os.makedirs(path, exist_ok=True)
+            with open(schema_path, "w") as f:
+                json.dump({"meta": meta, "columns": columns}, f, indent=2)
+
+        # Drop any partly written last row so every column has the same length
+        self.rows = min(column_length(path, name, typecode) for name, typecode in columns)
+        for name, typecode in columns:
+            with open(column_path(path, name), "ab") as f:
+                f.truncate(self.rows * array(typecode).itemsize)
+        self.files = {name: open(column_path(path, name), "ab") for name, _ in columns}
+
+    def __len__(self):
+        return self.rows
+
+    def read(self, name):
+        """Return every value written to one column so far, as an array.array."""
+        typecode = dict(self.columns)[name]
+        values = array(typecode)
+        with open(column_path(self.path, name), "rb") as f:
+            values.frombytes(f.read(self.rows * values.itemsize))
+        return values
+
+    def append(self, row):
+        """Write one row (a dictionary with a value for every column)."""
+        for name, typecode in self.columns:
+            array(typecode, [row[name]]).tofile(self.files[name])
+        for f in self.files.values():
+            f.flush()
+        self.rows += 1
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+
+
+def column_path(path, name):
+    return os.path.join(path, name + ".col")
+
+
+def column_length(path, name, typecode):
+    """Return the number of values in a column file (0 if it doesn't exist yet)."""
+    try:
+        return os.path.getsize(column_path(path, name)) // array(typecode).itemsize
+    except FileNotFoundError:
+        return 0
+
+
+def load_columns(path):
+    """
+    Read a column store written by a sweep.
+
+    Returns:
+    - A tuple (meta, columns): the sweep description and a dictionary mapping each
+      column name to its values (NumPy arrays if NumPy is installed, else array.array).
+    """
+    with open(os.path.join(path, "columns.json")) as f:
+        schema = json.load(f)
+    rows = min(column_length(path, name, typecode) for name, typecode in schema["columns"])
+    columns = {}
+    for name, typecode in schema["columns"]:
+        if np is not None:
+            columns[name] = np.fromfile(column_path(path, name), dtype=np.dtype(typecode), count=rows)
+        else:
+            values = array(typecode)
+            with open(column_path(path, name), "rb") as f:
+                values.frombytes(f.read(rows * values.itemsize))
+            columns[name] = values
+    return schema["meta"], columns
+
+
+def run_seed(base_seed, run_id, purpose):
+    """Return a 63-bit seed for one run, different for every base seed, run and purpose."""
+    digest = hashlib.blake2b(f"{base_seed}:{run_id}:{purpose}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") >> 1
+
+
+def plan_runs(meta):
+    """
+    List every run of a sweep, in run_id order.
+
+    Returns:
+    - A list of run dictionaries, as taken by simulate().
+    """
+    names = list(meta["grid"])
+    runs = []
+    for values in itertools.product(*meta["grid"].values()):
+        balance = dict(zip(names, values))
+        for bot in meta["bots"]:
+            for _ in range(meta["repeats"]):
+                run_id = len(runs)
+                runs.append({
+                    "run_id": run_id,
+                    "seed": run_seed(meta["seed"], run_id, "game"),
+                    "bot_seed": run_seed(meta["seed"], run_id, "bot"),
+                    "bot": bot,
+                    "bot_index": meta["bots"].index(bot),
+                    "balance": balance,
+                    "max_ticks": meta["max_ticks"],
+                    "draw": meta["draw"],
+                    "settings": meta["settings"],
+                })
+    return runs
+
+
+def simulate(run):
+    """
+    Play one run in a headless game (called in the worker processes).
+
+    Returns:
+    - The run's result row (a dictionary with a value for every column).
+    """
+    started = time.perf_counter()
+    game = Game(headless=True, seed=run["seed"], replay_path=None, balance=run["balance"], **run["settings"])
+    game.auto_upgrade = False  # The bot picks the upgrades
+    game.input_source = BOTS[run["bot"]](run["bot_seed"])
+    draw = run["draw"]
+    if draw:
+        game.load_fonts()  # Fonts are needed to draw the HUD
+
+    tick_times = []
+    peak_enemies = peak_bullets = peak_coins = 0
+    perf_counter = time.perf_counter
+    while game.tick_count < run["max_ticks"] and not game.game_over:
+        start = perf_counter()
+        game.tick()
+        if draw:
+            game.draw()
+        tick_times.append(perf_counter() - start)
+
+        peak_enemies = max(peak_enemies, len(game.enemies))
+        peak_bullets = max(peak_bullets, len(game.player.bullets))
+        peak_coins = max(peak_coins, len(game.coins))
+
+    row = {
+        "run_id": run["run_id"],
+        "seed": run["seed"],
+        "bot": run["bot_index"],
+        "ticks": game.tick_count,
+        "died": int(game.game_over),
+        "level": game.player.level,
+        "xp": game.player.xp,
+        "peak_enemies": peak_enemies,
+        "peak_bullets": peak_bullets,
+        "peak_coins": peak_coins,
+        "tick_ms_mean": sum(tick_times) / len(tick_times) * 1000 if tick_times else 0.0,
+        "tick_ms_p95": percentile(tick_times, 95) * 1000,
+        "tick_ms_max": max(tick_times, default=0.0) * 1000,
+        "seconds": time.perf_counter() - started,
+    }
+    row.update(run["balance"])
+    return row
+
+
+def run_sweep(runs, store, workers=None, report_interval=5.0):
+    """
+    Play every run that doesn't have a result in the store yet, appending results as they come in.
+
+    Arguments:
+    - workers: Number of worker processes (None: one per core, 0: play the runs in this process).
+    - report_interval: Seconds between progress lines.
+
+    Returns:
+    - The number of runs played.
+    """
+    done = set(store.read("run_id"))
+    pending = [run for run in runs if run["run_id"] not in done]
+    print(f"{len(runs)} runs, {len(done)} already done, {len(pending)} to play")
+
+    played = 0
+    start = last_report = time.perf_counter()
+
+    def finished(row):
+        nonlocal played, last_report
+        store.append(row)
+        played += 1
+        now = time.perf_counter()
+        if now - last_report >= report_interval or played == len(pending):
+            last_report = now
+            print(f"  {len(done) + played}/{len(runs)} runs ({played / (now - start):.1f} runs/s)")
+
+    if workers == 0:
+        for run in pending:
+            finished(simulate(run))
+        return played
+
+    workers = workers or os.cpu_count() or 1
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        # Keep a few runs queued per worker rather than submitting the whole sweep up front
+        queue = iter(pending)
+        in_flight = {executor.submit(simulate, run) for run in itertools.islice(queue, workers * 2)}
+        while in_flight:
+            completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                finished(future.result())
+            in_flight |= {executor.submit(simulate, run) for run in itertools.islice(queue, len(completed))}
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return played
+
+
+def summarize(meta, columns):
+    """
+    Group the results by bot and balance values.
+
+    Returns:
+    - A list of dictionaries (one per group, longest mean survival first) with the
+      group's values, number of runs, death rate, mean survival in seconds and
+      worst p95 tick time.
+    """
+    names = list(meta["grid"])
+    groups = {}
+    for i in range(len(columns["run_id"])):
+        key = (meta["bots"][columns["bot"][i]],) + tuple(float(columns[name][i]) for name in names)
+        groups.setdefault(key, []).append(i)
+
+    summary = []
+    for key, rows in groups.items():
+        summary.append({
+            "bot": key[0],
+            **dict(zip(names, key[1:])),
+            "runs": len(rows),
+            "death_rate": sum(columns["died"][i] for i in rows) / len(rows),
+            "mean_survival_s": sum(columns["ticks"][i] for i in rows) / len(rows) / app.FPS,
+            "worst_tick_ms_p95": max(float(columns["tick_ms_p95"][i]) for i in rows),
+        })
+    summary.sort(key=lambda group: group["mean_survival_s"], reverse=True)
+    return summary
+
+
+def parse_values(text):
+    """Parse a comma-separated list of numbers (ints where possible)."""
+    values = []
+    for item in text.split(","):
+        try:
+            values.append(int(item))
+        except ValueError:
+            values.append(float(item))
+    return values
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many headless games with bots and record the results.")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help=f"Balance values to sweep (repeatable). Names: {', '.join(app.BALANCE)}.")
+    parser.add_argument("--bot", action="append", choices=sorted(BOTS),
+                        help="Bot to play each parameter set with (repeatable, default: kite).")
+    parser.add_argument("--repeats", type=int, default=10, help="Runs per bot and parameter set.")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed the run seeds are derived from.")
+    parser.add_argument("--max-ticks", type=int, default=5 * 60 * app.FPS, help="Longest a run can last.")
+    parser.add_argument("--draw", action="store_true", help="Also draw every tick (counted in the tick times).")
+    parser.add_argument("--enemy-pool", action="store_true", help="Use the NumPy enemy pool.")
+    parser.add_argument("--bullet-array", action="store_true", help="Use the NumPy bullet array.")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per core, 0: no pool).")
+    parser.add_argument("--output", default="sweep_results", help="Column store directory (resumed if it exists).")
+    parser.add_argument("--summary", action="store_true", help="Only print the results stored in --output.")
+    parser.add_argument("--top", type=int, default=20, help="Parameter sets to list in the summary.")
+    args = parser.parse_args(argv)
+
+    if not args.summary:
+        grid = {}
+        for item in args.set:
+            name, _, values = item.partition("=")
+            if name not in app.BALANCE:
+                parser.error(f"unknown balance value {name!r}")
+            try:
+                grid[name] = parse_values(values)
+            except ValueError:
+                parser.error(f"bad values for {name}: {values!r}")
+        meta = {
+            "grid": grid,
+            "bots": args.bot or ["kite"],
+            "repeats": args.repeats,
+            "seed": args.seed,
+            "max_ticks": args.max_ticks,
+            "draw": args.draw,
+            "settings": {"use_enemy_pool": args.enemy_pool, "use_bullet_array": args.bullet_array},
+        }
+        columns = RESULT_COLUMNS + [(name, "d") for name in grid]
+        try:
+            store = ColumnStore(args.output, columns, meta)
+        except ValueError as error:
+            parser.error(str(error))
+        try:
+            run_sweep(plan_runs(meta), store, args.workers)
+        except KeyboardInterrupt:
+            print(f"Interrupted after {len(store)} runs; run the same command again to resume.")
+            return 130
+        finally:
+            store.close()
+
+    meta, columns = load_columns(args.output)
+    names = list(meta["grid"])
+    print(f"{'bot':8s} " + " ".join(f"{name:>20s}" for name in names)
+          + f" {'runs':>6s} {'died':>6s} {'survival':>9s} {'p95 tick':>9s}")
+    for group in summarize(meta, columns)[:args.top]:
+        print(f"{group['bot']:8s} " + " ".join(f"{group[name]:20g}" for name in names)
+              + f" {group['runs']:6d} {group['death_rate']:6.0%} {group['mean_survival_s']:8.1f}s"
+              f" {group['worst_tick_ms_p95']:7.2f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
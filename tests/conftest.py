@@ -0,0 +1,20 @@
+"""
+Shared setup for the tests: run pygame without a window or sound, and import
+the game's modules (and load its assets) from the repository root.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    """Assets are loaded relative to the working directory."""
+    monkeypatch.chdir(ROOT)
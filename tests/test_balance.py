@@ -0,0 +1,9 @@
+from game import Game
+
+
+def test_raise_level_grows_waves_by_the_balance_settings():
+    game = Game(headless=True, seed=1, balance={"enemies_per_spawn": 2, "enemies_per_level": 3})
+    for _ in range(7):
+        game.raise_level()
+    assert game.player.level == 8
+    assert game.enemies_per_spawn == 2 + 3 * 7
@@ -0,0 +1,34 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from budget import EntityBudget, merge_coins
+from coin import Coin
+from coin_index import CoinIndex
+
+
+def scattered_coins(count, seed=1):
+    """A CoinIndex of coins spread around the origin (in every quadrant)."""
+    rng = random.Random(seed)
+    coins = CoinIndex()
+    for _ in range(count):
+        coins.add(Coin(rng.uniform(-500, 500), rng.uniform(-500, 500), rng.randint(1, 3)))
+    return coins
+
+
+@pytest.mark.parametrize("limit", [0, 1, 2, 3, 50])
+def test_merge_coins_ends_and_keeps_value(limit):
+    coins = scattered_coins(200)
+    total = sum(coin.value for coin in coins)
+    merge_coins(coins, limit)
+    assert len(coins) == max(limit, 1)
+    assert sum(coin.value for coin in coins) == total
+
+
+@pytest.mark.parametrize("limit", [0, 1])
+def test_merge_policy_reaches_tiny_caps(limit):
+    game = SimpleNamespace(enemies=[], coins=scattered_coins(40), player=SimpleNamespace(bullets=[]))
+    budget = EntityBudget(caps={"coins": (limit, "merge")}, adaptive=False)
+    budget.enforce(game)
+    assert len(game.coins) == limit
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from game import Game
+
+
+@pytest.mark.parametrize("use_bullet_array", [False, True])
+def test_sweep_moves_every_survivor_exactly_once(use_bullet_array):
+    if use_bullet_array:
+        pytest.importorskip("numpy")
+    game = Game(headless=True, seed=1, use_bullet_array=use_bullet_array)
+    player = game.player
+    rng = random.Random(1)
+    for _ in range(200):
+        player.add_bullet(rng.uniform(100, 700), rng.uniform(100, 500), rng.uniform(-3, 3), rng.uniform(-3, 3))
+
+    for _ in range(3):
+        # Kill bullets scattered through the list: out of hits, out of lifetime, or about to leave the screen
+        dying = set()
+        for bullet in player.bullets:
+            roll = rng.random()
+            if roll < 0.15:
+                bullet.pierce = 0
+            elif roll < 0.3:
+                bullet.ttl = 1
+            elif roll < 0.4:
+                bullet.x = -10
+            else:
+                continue
+            dying.add(bullet)
+        before = {bullet: (bullet.x, bullet.y, bullet.vx, bullet.vy) for bullet in player.bullets}
+        survivors = [bullet for bullet in player.bullets if bullet not in dying]
+
+        player.update()
+
+        assert list(player.bullets) == survivors  # Firing order is kept
+        for bullet in survivors:
+            x, y, vx, vy = before[bullet]
+            assert (bullet.x, bullet.y) == (x + vx, y + vy)
+            expected = bullet.rect.copy()
+            expected.center = (bullet.x, bullet.y)
+            assert bullet.rect == expected
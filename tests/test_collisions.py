@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from game import Game
+
+# (use_enemy_pool, use_bullet_array): plain objects and every NumPy-backed combination
+BACKENDS = [(False, False), (True, False), (False, True), (True, True)]
+
+
+def brute_force_hits(game):
+    """The O(bullets x enemies) scan the grid broadphase replaces, with the same rules."""
+    hits = []
+    hit_enemies = set()
+    for bullet in game.player.bullets:
+        remaining = bullet.pierce
+        for enemy in game.enemies:
+            if enemy not in hit_enemies and bullet.rect.colliderect(enemy.rect):
+                hit_enemies.add(enemy)
+                hits.append((bullet, enemy))
+                remaining -= 1
+                if remaining <= 0:
+                    break
+    return hits
+
+
+@pytest.mark.parametrize("use_enemy_pool, use_bullet_array", BACKENDS)
+@pytest.mark.parametrize("seed", range(5))
+def test_grid_hits_match_brute_force(use_enemy_pool, use_bullet_array, seed):
+    if use_enemy_pool or use_bullet_array:
+        pytest.importorskip("numpy")
+    game = Game(headless=True, seed=seed, use_enemy_pool=use_enemy_pool, use_bullet_array=use_bullet_array)
+    rng = random.Random(seed)
+    enemy_types = list(game.assets["enemies"])
+    for _ in range(150):
+        x, y = rng.uniform(-50, 850), rng.uniform(-50, 650)
+        game.enemies.append(game.create_enemy(x, y, rng.choice(enemy_types)))
+    player = game.player
+    for _ in range(300):
+        player.bullet_size = rng.choice([5, 10, 30])  # Big bullets span several grid cells
+        player.bullet_pierce = rng.randint(1, 3)
+        player.add_bullet(rng.uniform(0, 800), rng.uniform(0, 600), 1.0, 0.0)
+
+    game.enemy_index()  # Rebuild the grid for the enemies just added
+    expected = brute_force_hits(game)
+    assert expected  # The layout is dense enough to have hits to compare
+    assert game.find_bullet_enemy_hits() == expected
@@ -0,0 +1,44 @@
+import pygame
+
+import app
+from bullet import Bullet
+from enemy import Enemy
+
+
+def make_enemies(count):
+    frames = [pygame.Surface((20, 20)) for _ in range(4)]
+    return [Enemy(0, 0, "orc", frames) for _ in range(count)]
+
+
+def test_enemy_tuning_can_be_set_per_enemy():
+    tuned, other = make_enemies(2)
+    assert tuned.kind is other.kind  # Both read the shared type
+    tuned.speed = 5
+    tuned.knockback_duration = 20
+    assert (tuned.speed, tuned.knockback_duration) == (5, 20)
+    assert (other.speed, other.knockback_duration) == (app.DEFAULT_ENEMY_SPEED, 10)
+    assert tuned.kind.speed == app.DEFAULT_ENEMY_SPEED
+
+    # A recycled enemy starts over with its type's tuning
+    tuned.reset(0, 0, "orc", tuned.animations)
+    assert tuned.speed == app.DEFAULT_ENEMY_SPEED
+
+
+def test_bullet_size_and_color_can_be_changed():
+    bullet = Bullet(100, 100, 1, 0, 10)
+    bullet.size = 20
+    bullet.color = (0, 0, 255)
+    assert (bullet.size, bullet.color) == (20, (0, 0, 255))
+    assert bullet.image.get_size() == (20, 20)
+    assert bullet.rect.size == (20, 20) and bullet.rect.center == (100, 100)
+
+
+def test_enemy_draws_the_frame_for_its_facing():
+    frames = [pygame.Surface((20, 20)) for _ in range(4)]
+    mirrored = [pygame.Surface((20, 20)) for _ in range(4)]
+    enemy = Enemy(0, 0, "orc", frames, mirrored)
+    enemy.frame_index = 2
+    enemy.image = frames[2]
+    assert enemy.current_image() is frames[2]
+    enemy.facing_left = True
+    assert enemy.current_image() is mirrored[2]
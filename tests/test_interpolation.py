@@ -0,0 +1,27 @@
+import random
+
+import pytest
+
+from game import Game
+
+
+def render_rects(use_bullet_array, alpha, seed=3):
+    """Fire the same bullets, run a tick and return the bullets' rects at alpha through the next one."""
+    game = Game(headless=True, seed=seed, use_bullet_array=use_bullet_array)
+    rng = random.Random(seed)
+    player = game.player
+    for _ in range(300):
+        player.bullet_size = rng.choice([5, 10, 15])
+        # Velocities on half pixels put many positions exactly between two pixels
+        vx, vy = rng.randint(-12, 12) / 4, rng.randint(-12, 12) / 4
+        player.add_bullet(rng.randint(200, 600) + rng.choice([0, 0.25, 0.5]), rng.randint(150, 450), vx, vy)
+    game.save_previous_positions()
+    player.update()
+    game.move_to_render_positions(alpha)
+    return [tuple(bullet.rect) for bullet in player.bullets]
+
+
+@pytest.mark.parametrize("alpha", [0.0, 0.25, 0.5, 0.75, 1.0])
+def test_array_bullets_interpolate_like_list_bullets(alpha):
+    pytest.importorskip("numpy")
+    assert render_rects(True, alpha) == render_rects(False, alpha)
@@ -0,0 +1,77 @@
+import math
+from types import SimpleNamespace
+
+import app
+from lod import LODScheduler
+
+
+class CountingEnemy:
+    """Stands in for an Enemy and counts how it was updated."""
+
+    def __init__(self, distance):
+        self.player_distance = distance
+        self.lod_tier = 0
+        self.lod_phase = None
+        self.knockback = False
+        self.full_updates = 0
+        self.extrapolations = 0
+        self.update_ticks = []
+
+    def update(self, player):
+        self.full_updates += 1
+        self.update_ticks.append(player.tick)
+
+    def extrapolate(self):
+        self.extrapolations += 1
+
+
+def run(bands, enemies, ticks, scheduler=None, start=0):
+    scheduler = scheduler or LODScheduler(bands)
+    player = SimpleNamespace(tick=0)  # Lets the stand-ins note which tick they were updated on
+    for tick in range(start, start + ticks):
+        player.tick = tick
+        scheduler.update(enemies, player, tick)
+    return scheduler
+
+
+def test_every_band_uses_its_interval():
+    near = CountingEnemy(100)
+    far = CountingEnemy(2000)
+    scheduler = run(((900, 3), (float("inf"), 4)), [near, far], 30)
+    assert near.full_updates == 10
+    assert near.extrapolations == 20
+    # The far enemy is in band 0 until its first full update (tick 2) measures its
+    # distance, then updates on ticks 3, 7, ..., 27
+    assert far.lod_tier == 1
+    assert far.full_updates == 8
+    assert scheduler.tier_counts == [1, 1]
+
+
+def test_interval_one_updates_every_tick():
+    enemies = [CountingEnemy(100) for _ in range(5)]
+    run(((900, 1), (float("inf"), 4)), enemies, 30)
+    assert all(enemy.full_updates == 30 and enemy.extrapolations == 0 for enemy in enemies)
+
+
+def test_knocked_back_enemies_always_update():
+    enemy = CountingEnemy(2000)
+    enemy.knockback = True
+    run(((900, 2), (float("inf"), 4)), [enemy], 12)
+    assert enemy.full_updates == 12
+
+
+def test_enemies_dying_doesnt_shift_anyone_elses_turn():
+    bands = ((900, 3), (float("inf"), 4))
+    enemies = [CountingEnemy(100) for _ in range(4)]
+    scheduler = run(bands, enemies, 6)
+    before = [list(enemy.update_ticks) for enemy in enemies]
+    del enemies[0]  # The first enemy dies, the others move up the list
+    run(bands, enemies, 6, scheduler, start=6)
+    for enemy, ticks in zip(enemies, before[1:]):
+        assert enemy.update_ticks == ticks + [tick + 6 for tick in ticks]
+
+
+def test_first_band_covers_the_whole_screen():
+    # An enemy in the far corner of the screen from a player in the other corner
+    assert app.LOD_BANDS[0][0] >= math.hypot(app.WIDTH, app.HEIGHT)
+    assert app.LOD_BANDS[0][1] == 1
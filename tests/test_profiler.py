@@ -0,0 +1,45 @@
+import pygame
+import pytest
+
+from profiler import FrameProfiler, ProfilerOverlay
+
+
+@pytest.mark.parametrize("count_lines", [0, 4, 9])
+def test_overlay_draws_only_inside_its_rect(count_lines):
+    pygame.font.init()
+    profiler = FrameProfiler()
+    for _ in range(5):
+        profiler.begin_frame()
+        for name in ("update", "draw"):
+            with profiler.phase(name):
+                pass
+        profiler.end_frame({f"entity{i}": i for i in range(count_lines)})
+
+    background = (10, 20, 30)
+    surface = pygame.Surface((400, 600))
+    surface.fill(background)
+    rect = ProfilerOverlay().draw(surface, profiler, {"startup": "1 ms", "lod": "3/2/1"}, pos=(50, 20))
+
+    # Everything the overlay touched must be inside the rect it returns (dirty-rect mode erases only that)
+    changed = pygame.mask.from_threshold(surface, background, (1, 1, 1, 255))
+    changed.invert()
+    touched = pygame.Rect(changed.get_bounding_rects()[0]).unionall(changed.get_bounding_rects())
+    assert rect.contains(touched)
+    assert touched.bottom > rect.bottom - 2 * ProfilerOverlay.LINE_HEIGHT
+
+
+def test_overlay_graphs_work_time_not_the_idle_wait():
+    pygame.font.init()
+    profiler = FrameProfiler()
+    for frame in range(20):
+        profiler.begin_frame()
+        profiler.end_frame()
+        # A light frame padded out to the full frame time by waiting for vsync (the last one overruns)
+        work = 0.030 if frame == 19 else 0.002
+        profiler.frames[-1].update(total=work + 0.015, phases={"idle": 0.015, "update": work})
+
+    surface = pygame.Surface((400, 300))
+    ProfilerOverlay().draw(surface, profiler, pos=(0, 0))
+    red = pygame.mask.from_threshold(surface, (220, 60, 60), (1, 1, 1, 255))
+    bars = red.get_bounding_rects()
+    assert bars and pygame.Rect(bars[0]).unionall(bars).width <= 3  # Only the overrunning frame is red
@@ -0,0 +1,24 @@
+import pytest
+
+import bots
+import replay
+from game import Game
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("seed", [7, 9])
+def test_enemy_pool_replay_reproduces_run(tmp_path, seed):
+    # Enemies die and are released all through the run, which reorders the pool's slots
+    path = str(tmp_path / "run.rpl")
+    game = Game(headless=True, seed=seed, use_enemy_pool=True, chunked_world=True)
+    game.recorder = replay.ReplayWriter(path, game)
+    game.input_source = bots.RandomBot(1)
+    for _ in range(3600):
+        game.tick()
+    game.recorder.close()
+
+    result = replay.play(path)
+    assert result["divergence"] is None
+    assert result["ticks"] == 3600
+    assert result["hashes_checked"] > 0
@@ -0,0 +1,62 @@
+import math
+import random
+
+import pygame
+import pytest
+
+from game import Game
+from steering import FlowField
+
+VIEW = pygame.Rect(0, 0, 800, 600)
+
+
+def test_flow_field_only_searches_when_the_player_changes_cell():
+    field = FlowField(cell_size=64)
+    assert field.update(100, 100, VIEW)
+    assert not field.update(120, 110, VIEW)  # Same cell
+    assert field.update(130, 100, VIEW)  # Next cell over
+    assert field.update(130, 100, VIEW.move(64, 0))  # The grid moved with the view
+    assert field.recomputes == 3
+
+
+@pytest.mark.parametrize("start", [(-50, 30), (850, 640), (-50, 500), (300, -50), (790, 10)])
+def test_flow_field_paths_lead_to_the_player(start):
+    field = FlowField()
+    px, py = 400, 300
+    field.update(px, py, VIEW)
+    x, y = start
+    steps = 0
+    while math.hypot(px - x, py - y) > 2:
+        tx, ty = field.target(x, y) or (px, py)
+        d = math.hypot(tx - x, ty - y)
+        x += (tx - x) / d * 2
+        y += (ty - y) / d * 2
+        steps += 1
+        assert steps < 1000
+    # In the open the path is barely longer than the straight line
+    assert steps <= math.hypot(px - start[0], py - start[1]) / 2 * 1.05 + 1
+
+
+def test_pooled_enemies_steer_like_plain_enemies():
+    pytest.importorskip("numpy")
+    positions = []
+    for use_enemy_pool in (False, True):
+        game = Game(headless=True, seed=4, use_enemy_pool=use_enemy_pool, lod=False, entity_caps=None)
+        if game.enemy_pool is not None:
+            game.enemy_pool.separation = False  # The plain path has no separation push
+        rng = random.Random(4)
+        enemy_types = list(game.assets["enemies"])
+        for _ in range(60):
+            x, y = rng.choice([(rng.uniform(-100, 900), -60), (-60, rng.uniform(-100, 700))])
+            game.enemies.append(game.create_enemy(x, y, rng.choice(enemy_types)))
+        game.spawn_enemies = lambda: None  # Only the enemies placed above
+        game.player.health = 10 ** 9
+        for tick in range(120):
+            game.player.x += 2  # Walk across cells so the field is searched again
+            game.update()
+        assert game.flow_field.recomputes > 1
+        positions.append([(enemy.x, enemy.y) for enemy in game.enemies])
+    plain, pooled = positions
+    assert len(plain) == len(pooled)
+    for (ax, ay), (bx, by) in zip(plain, pooled):
+        assert ax == pytest.approx(bx, abs=1e-6) and ay == pytest.approx(by, abs=1e-6)
@@ -0,0 +1,43 @@
+import app
+
+class FixedTimestep:
+    """
+    Accumulator that turns real elapsed time into fixed-length simulation ticks.
+
+    Every frame, advance() is given the time since the last frame and answers
+    how many ticks to run so the simulation keeps pace with the clock. What is
+    left over (less than one tick) carries on to the next frame, and alpha()
+    says how far the frame sits between the last tick and the next one, for
+    interpolating positions when drawing.
+
+    If the game falls too far behind (a long stall, a slow machine), only
+    max_catch_up ticks are run in one frame and the rest of the backlog is
+    dropped, so a slow frame can't cause an ever longer one.
+    """
+
+    def __init__(self, tick_rate=app.FPS, max_catch_up=app.MAX_CATCH_UP_TICKS):
+        self.tick_seconds = 1 / tick_rate  # Length of one simulation tick
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0  # Elapsed time not simulated yet
+        self.dropped_ticks = 0  # Ticks skipped because the game fell too far behind
+
+    def advance(self, seconds):
+        """
+        Add a frame's elapsed time.
+
+        Returns:
+        - The number of ticks to run this frame (0 when frames are shorter than ticks).
+        """
+        self.accumulator += seconds
+        ticks = int(self.accumulator / self.tick_seconds)
+        if ticks > self.max_catch_up:
+            self.dropped_ticks += ticks - self.max_catch_up
+            ticks = self.max_catch_up
+        self.accumulator = max(0.0, self.accumulator - ticks * self.tick_seconds)
+        if self.accumulator >= self.tick_seconds:
+            self.accumulator %= self.tick_seconds  # Drop the backlog, keep the fraction of a tick
+        return ticks
+
+    def alpha(self):
+        """Return how far (0 to 1) the current frame is between the last tick and the next."""
+        return min(1.0, self.accumulator / self.tick_seconds)
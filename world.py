@@ -0,0 +1,116 @@
+import random
+from collections import OrderedDict
+
+import pygame
+import app
+
+class Camera:
+    """
+    The part of the world that is on screen.
+    (x, y) is the world position of the screen's top-left corner.
+    """
+
+    def __init__(self, x=0, y=0, width=app.WIDTH, height=app.HEIGHT):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def follow(self, target_x, target_y):
+        """
+        Centre the camera on a world position.
+
+        Returns:
+        - True if the camera moved.
+        """
+        x = int(target_x) - self.width // 2
+        y = int(target_y) - self.height // 2
+        moved = x != self.x or y != self.y
+        self.x, self.y = x, y
+        return moved
+
+    def offset(self):
+        """Return the amount to subtract from world positions to get screen positions."""
+        return self.x, self.y
+
+    def view_rect(self):
+        """Return the visible part of the world as a rect in world coordinates."""
+        return pygame.Rect(self.x, self.y, self.width, self.height)
+
+
+class ChunkedWorld:
+    """
+    An endless floor made of square chunks of tiles.
+
+    Each chunk's tiles are picked with its own RNG seeded from the world seed and
+    the chunk's coordinates, so a chunk always looks the same no matter when it
+    is generated. Rendered chunks are kept in an LRU cache limited by memory,
+    and only the chunks the camera can see are drawn.
+    """
+
+    def __init__(self, floor_tiles, seed, chunk_tiles=app.CHUNK_TILES, memory_budget=app.CHUNK_CACHE_BYTES):
+        self.floor_tiles = floor_tiles
+        self.seed = seed
+        self.tile_w = floor_tiles[0].get_width()
+        self.tile_h = floor_tiles[0].get_height()
+        self.chunk_tiles = chunk_tiles
+        self.chunk_w = self.tile_w * chunk_tiles  # Chunk size in pixels
+        self.chunk_h = self.tile_h * chunk_tiles
+        self.memory_budget = memory_budget
+        self.chunks = OrderedDict()  # (chunk_x, chunk_y) -> rendered chunk surface
+        self.memory_used = 0  # Bytes of pixel data held by cached chunks
+        self.chunks_generated = 0  # Total chunks rendered (including ones rendered again after eviction)
+
+    def chunk_rng(self, cx, cy):
+        """Return the random generator for one chunk (the same every time for the same chunk)."""
+        return random.Random(f"{self.seed}:{cx}:{cy}")
+
+    def generate_chunk(self, cx, cy):
+        """Render one chunk's tiles onto a new surface."""
+        rng = self.chunk_rng(cx, cy)
+        surface = pygame.Surface((self.chunk_w, self.chunk_h)).convert()
+        for y in range(0, self.chunk_h, self.tile_h):
+            for x in range(0, self.chunk_w, self.tile_w):
+                surface.blit(rng.choice(self.floor_tiles), (x, y))
+        self.chunks_generated += 1
+        return surface
+
+    def get_chunk(self, cx, cy, keep=0):
+        """
+        Return a chunk's surface from the cache, rendering it if needed.
+
+        Arguments:
+        - cx, cy: Chunk coordinates.
+        - keep: Number of most recently used chunks that must not be evicted
+          (the chunks already fetched for the current frame).
+        """
+        key = (cx, cy)
+        surface = self.chunks.get(key)
+        if surface is not None:
+            self.chunks.move_to_end(key)  # Mark as most recently used
+            return surface
+
+        surface = self.generate_chunk(cx, cy)
+        self.chunks[key] = surface
+        self.memory_used += surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+        # Evict the least recently used chunks until we're back under budget
+        while self.memory_used > self.memory_budget and len(self.chunks) > keep + 1:
+            _, old = self.chunks.popitem(last=False)
+            self.memory_used -= old.get_width() * old.get_height() * old.get_bytesize()
+        return surface
+
+    def visible_chunks(self, view):
+        """Return the coordinates of every chunk overlapping a world-space rect."""
+        x0, x1 = view.left // self.chunk_w, (view.right - 1) // self.chunk_w
+        y0, y1 = view.top // self.chunk_h, (view.bottom - 1) // self.chunk_h
+        return [(cx, cy) for cy in range(y0, y1 + 1) for cx in range(x0, x1 + 1)]
+
+    def draw(self, surface, camera):
+        """Draw the chunks the camera can see."""
+        ox, oy = camera.offset()
+        blits = []
+        for i, (cx, cy) in enumerate(self.visible_chunks(camera.view_rect())):
+            chunk = self.get_chunk(cx, cy, keep=i)
+            blits.append((chunk, (cx * self.chunk_w - ox, cy * self.chunk_h - oy)))
+        surface.blits(blits, doreturn=False)